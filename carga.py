@@ -0,0 +1,294 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import time
+
+import protocolo
+import sesiones
+from estadisticas import percentil, percentiles_censurados
+
+# --- Generador de carga sin interfaz gráfica ---
+# Simula muchos carros que siguen el mismo protocolo que carro_lifecycle en interfaz.py
+# (HELLO CAR, REQUEST_CROSS, GRANT_CROSS, RELEASE_BRIDGE), con una conexión por carro o
+# varios carros por conexión, y mide permisos por segundo y latencia desde la solicitud
+# hasta el permiso. Con --puentes N las conexiones se reparten entre los puentes 0..N-1 de
+# un servidor lanzado con --puentes: todos los carros de una conexión usan el mismo puente,
+# así cada conexión acaba en el proceso dueño de su puente si el servidor usa --procesos.
+
+HOST, PORT = '127.0.0.1', 65432
+SATURACION_PENDIENTES = 0.05  # Fracción de solicitudes aún sin permiso al cortar que indica saturación
+SATURACION_ESPERA = 0.25      # Fracción de la duración que, si la lleva esperando la más antigua, indica saturación
+
+def subir_limite_descriptores():
+    """Permite abrir tantas conexiones como deje el sistema (solo Unix)."""
+    try:
+        import resource
+        blando, duro = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if blando < duro:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (duro, duro))
+    except (ImportError, ValueError, OSError):
+        pass
+
+def _campos_stat(pid):
+    with open(f"/proc/{pid}/stat") as f:
+        return f.read().rsplit(')', 1)[1].split()
+
+def tiempo_cpu_proceso(pid):
+    """Segundos de CPU (usuario + sistema) consumidos por un proceso y sus hijos vivos (los trabajadores
+    de servidor.py --procesos), o None si no se puede leer /proc."""
+    try:
+        total = 0
+        for entrada in os.listdir("/proc"):
+            if not entrada.isdigit(): continue
+            try:
+                campos = _campos_stat(entrada)
+            except OSError:
+                continue  # Terminó mientras se recorría /proc
+            if int(entrada) == pid or int(campos[1]) == pid:
+                total += int(campos[11]) + int(campos[12])
+        return total / os.sysconf('SC_CLK_TCK')
+    except (OSError, IndexError, ValueError, AttributeError):
+        return None
+
+class Estadisticas:
+    """Contadores de un proceso generador."""
+    def __init__(self):
+        self.latencias = []        # Segundos entre REQUEST_CROSS y GRANT_CROSS, ambos dentro de la ventana de medida
+        self.permisos = 0          # Permisos recibidos dentro de la ventana de medida
+        self.conexiones_abiertas = 0
+        self.conexiones_fallidas = 0
+        self.desconexiones = 0
+        self.concesiones_vencidas = 0
+        self.solicitudes_rechazadas = 0  # Carros cuya solicitud contestó el servidor con ERROR
+        self.liberaciones_rechazadas = 0 # RELEASE_BRIDGE que el servidor contestó con ERROR
+        self.esperas_pendientes = []     # Segundos que llevaba esperando permiso, al cortar la prueba, cada solicitud sin contestar
+
+    def a_dict(self):
+        return dict(self.__dict__)
+
+async def carro(car_id, puente, conexion, args, stats, inicio_medida, fin):
+    """Un carro: descansa, pide paso, espera el permiso, cruza y libera, hasta el final de la prueba."""
+    direccion = random.choice(["NORTH", "SOUTH"])
+    descanso_medio = args.carros / args.tasa  # Cada carro pide paso a ritmo tasa/carros
+    try:
+        while time.monotonic() < fin:
+            await asyncio.sleep(min(random.expovariate(1 / descanso_medio), max(0.0, fin - time.monotonic())))
+            if time.monotonic() >= fin: break
+
+            t0 = time.monotonic()
+            try:
+                lease_id = await asyncio.wait_for(conexion.solicitar(car_id, direccion, puente),
+                                                  timeout=max(0.01, fin - time.monotonic()))
+            except asyncio.TimeoutError:
+                stats.esperas_pendientes.append(max(0.0, fin - t0))  # La prueba terminó con el carro aún en cola
+                return
+            except sesiones.SolicitudRechazada:
+                stats.solicitudes_rechazadas += 1
+                return
+            t1 = time.monotonic()
+            if inicio_medida <= t1 <= fin:
+                stats.permisos += 1
+                if inicio_medida <= t0:
+                    stats.latencias.append(t1 - t0)
+
+            await asyncio.sleep(max(0.0, random.gauss(args.cruce, args.cruce_desv)))
+            conexion.liberar(car_id, lease_id, puente)
+            direccion = "SOUTH" if direccion == "NORTH" else "NORTH"
+    except (ConnectionError, OSError):
+        stats.desconexiones += 1
+
+async def grupo(numero, ids, args, stats, inicio_medida, fin):
+    """Los carros de `ids` comparten la conexión `numero` (uno solo con --carros-por-conexion 1) y su puente."""
+    try:
+        conexion = await sesiones.ConexionCompartida.abrir(args.host, args.port, protocolo.CODECS[args.protocolo])
+    except OSError:
+        stats.conexiones_fallidas += 1
+        return
+    stats.conexiones_abiertas += 1
+    try:
+        puente = numero % args.puentes
+        await asyncio.gather(*(carro(car_id, puente, conexion, args, stats, inicio_medida, fin) for car_id in ids))
+    finally:
+        stats.concesiones_vencidas += conexion.concesiones_vencidas
+        stats.liberaciones_rechazadas += conexion.liberaciones_rechazadas
+        conexion.cerrar()
+
+async def observador(args, fin, bytes_recibidos):
+    """Observador que solo lee STATUS_UPDATE/STATUS_DELTA, para medir el coste de difusión."""
+    try:
+        reader, writer = await asyncio.open_connection(args.host, args.port)
+    except OSError:
+        return
+    writer.write(b"HELLO OBSERVER\n")
+    if args.puentes > 1:
+        writer.write(protocolo.TEXTO.suscripcion())
+    try:
+        while time.monotonic() < fin:
+            datos = await asyncio.wait_for(reader.read(65536), timeout=max(0.01, fin - time.monotonic()))
+            if not datos: break
+            bytes_recibidos[0] += len(datos)
+    except (asyncio.TimeoutError, ConnectionError, OSError):
+        pass
+    finally:
+        writer.close()
+
+async def generar(grupos, observadores, args, inicio_medida, fin):
+    """Abre los observadores y las conexiones de `grupos` ((número, ids) de cada una) al ritmo --ritmo-conexiones y espera a que terminen."""
+    stats = Estadisticas()
+    bytes_observados = [0]
+    tareas = [asyncio.create_task(observador(args, fin, bytes_observados)) for _ in range(observadores)]
+    pausa = 1 / args.ritmo_conexiones if args.ritmo_conexiones > 0 else 0
+    for numero, ids in grupos:
+        tareas.append(asyncio.create_task(grupo(numero, ids, args, stats, inicio_medida, fin)))
+        if pausa: await asyncio.sleep(pausa)
+    await asyncio.gather(*tareas)
+    resultado = stats.a_dict()
+    resultado["bytes_observados"] = bytes_observados[0]
+    return resultado
+
+def ejecutar_proceso(grupos, observadores, args, inicio_medida, fin):
+    """Punto de entrada de cada proceso generador."""
+    subir_limite_descriptores()
+    return asyncio.run(generar(grupos, observadores, args, inicio_medida, fin))
+
+def combinar(resultados):
+    total = {}
+    for r in resultados:
+        for clave, valor in r.items():
+            total[clave] = total.get(clave, 0 if not isinstance(valor, list) else []) + valor
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description="Generador de carga sin interfaz para servidor.py.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--carros", type=int, default=1000, help="Carros simulados.")
+    parser.add_argument("--tasa", type=float, default=200.0, help="Solicitudes de cruce por segundo en total.")
+    parser.add_argument("--cruce", type=float, default=0.05, help="Tiempo medio sobre el puente, en segundos.")
+    parser.add_argument("--cruce-desv", type=float, default=0.0, help="Desviación típica del tiempo de cruce.")
+    parser.add_argument("--carros-por-conexion", type=int, default=1,
+                        help="Carros que comparten cada conexión (sesiones multiplexadas).")
+    parser.add_argument("--protocolo", choices=sorted(protocolo.CODECS), default=protocolo.TEXTO.nombre,
+                        help="Codificación que negocian los carros con el servidor.")
+    parser.add_argument("--puentes", type=int, default=1,
+                        help="Puentes entre los que se reparten los carros (el servidor debe tener al menos tantos).")
+    parser.add_argument("--observadores", type=int, default=0, help="Conexiones de observadores adicionales.")
+    parser.add_argument("--duracion", type=float, default=20.0, help="Segundos de medida.")
+    parser.add_argument("--calentamiento", type=float, default=5.0, help="Segundos antes de empezar a medir.")
+    parser.add_argument("--ritmo-conexiones", type=float, default=1000.0, help="Conexiones nuevas por segundo (0 = todas a la vez).")
+    parser.add_argument("--procesos", type=int, default=1, help="Procesos generadores (reparte los carros).")
+    parser.add_argument("--id-inicial", type=int, default=1000, help="Primer id de carro.")
+    parser.add_argument("--pid-servidor", type=int, default=None, help="PID del servidor para medir su CPU.")
+    parser.add_argument("--lanzar-servidor", default=None, metavar="ARGS",
+                        help="Lanza servidor.py con estos argumentos (p. ej. \"--modo eventos\") y mide su CPU.")
+    parser.add_argument("--json", action="store_true", help="Imprime el resultado como JSON.")
+    args = parser.parse_args()
+    if args.carros_por_conexion < 1:
+        parser.error("--carros-por-conexion debe ser al menos 1")
+    if args.puentes < 1:
+        parser.error("--puentes debe ser al menos 1")
+
+    servidor = None
+    pid_servidor = args.pid_servidor
+    if args.lanzar_servidor is not None:
+        ruta = os.path.join(os.path.dirname(os.path.abspath(__file__)), "servidor.py")
+        servidor = subprocess.Popen([sys.executable, ruta, *args.lanzar_servidor.split()],
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        pid_servidor = servidor.pid
+        time.sleep(1)
+        if servidor.poll() is not None:
+            sys.exit(f"servidor.py terminó al arrancar (código {servidor.returncode}); ¿está ocupado el puerto {args.port}?")
+
+    subir_limite_descriptores()
+    ids = list(range(args.id_inicial, args.id_inicial + args.carros))
+    # Las conexiones se numeran antes de repartirlas entre procesos: el puente sale del número,
+    # así que cada conexión usa un solo puente con cualquier --procesos
+    grupos = list(enumerate(ids[i:i + args.carros_por_conexion] for i in range(0, len(ids), args.carros_por_conexion)))
+    inicio_medida = time.monotonic() + args.calentamiento
+    fin = inicio_medida + args.duracion
+
+    try:
+        cpu_inicio = None
+        if args.procesos > 1:
+            with multiprocessing.Pool(args.procesos) as pool:
+                pendientes = pool.starmap_async(ejecutar_proceso,
+                                                [(grupos[i::args.procesos], len(range(i, args.observadores, args.procesos)), args, inicio_medida, fin)
+                                                 for i in range(args.procesos)])
+                time.sleep(max(0.0, inicio_medida - time.monotonic()))
+                cpu_inicio = tiempo_cpu_proceso(pid_servidor) if pid_servidor else None
+                resultados = combinar(pendientes.get())
+        else:
+            async def con_medida_cpu():
+                nonlocal cpu_inicio
+                tarea = asyncio.create_task(generar(grupos, args.observadores, args, inicio_medida, fin))
+                await asyncio.sleep(max(0.0, inicio_medida - time.monotonic()))
+                cpu_inicio = tiempo_cpu_proceso(pid_servidor) if pid_servidor else None
+                return await tarea
+            resultados = asyncio.run(con_medida_cpu())
+        cpu_fin = tiempo_cpu_proceso(pid_servidor) if pid_servidor else None
+    finally:
+        if servidor is not None:
+            servidor.terminate()
+            servidor.wait()
+
+    latencias = resultados.pop("latencias")
+    esperas = sorted(resultados.pop("esperas_pendientes"))
+    # Las latencias medidas solo cuentan solicitudes hechas dentro de la ventana; las pendientes, igual
+    censuradas = [e for e in esperas if e <= args.duracion]
+    nombres = {50: "p50", 95: "p95", 99: "p99", 100: "max"}
+    percentiles = percentiles_censurados(latencias, censuradas, nombres)
+    informe = {
+        "carros": args.carros,
+        "procesos": args.procesos,
+        "duracion": args.duracion,
+        "permisos_por_segundo": resultados["permisos"] / args.duracion,
+        **{f"latencia_{nombre}_ms": percentiles[p][0] * 1000 for p, nombre in nombres.items()},
+        "latencia_censurada": [nombre for p, nombre in nombres.items() if percentiles[p][1]],  # Valores que son cotas inferiores
+        "solicitudes_pendientes": len(esperas),
+        "espera_pendiente_p50_ms": percentil(esperas, 50) * 1000 if esperas else 0.0,
+        "espera_pendiente_max_ms": esperas[-1] * 1000 if esperas else 0.0,
+        "servidor_saturado": bool(censuradas) and (
+            len(censuradas) >= SATURACION_PENDIENTES * (len(latencias) + len(censuradas))
+            or censuradas[-1] >= SATURACION_ESPERA * args.duracion),
+        **resultados,
+    }
+    if cpu_inicio is not None and cpu_fin is not None:
+        informe["cpu_servidor_pct"] = 100 * (cpu_fin - cpu_inicio) / args.duracion
+
+    if args.json:
+        print(json.dumps(informe))
+        return
+    print(f"Carros: {args.carros} en {informe['conexiones_abiertas']} conexiones ({informe['conexiones_fallidas']} fallidas, "
+          f"{informe['desconexiones']} carros desconectados)")
+    print(f"Permisos/s: {informe['permisos_por_segundo']:.1f}")
+    if latencias or censuradas:
+        valores = "  ".join(f"{nombre} {'≥' if nombre in informe['latencia_censurada'] else ''}{informe[f'latencia_{nombre}_ms']:.1f}"
+                            for nombre in nombres.values())
+        print(f"Latencia solicitud->permiso (ms): {valores}")
+    else:
+        print("Latencia solicitud->permiso: ninguna solicitud dentro de la ventana de medida")
+    if esperas:
+        print(f"Solicitudes sin permiso al cortar: {len(esperas)} (espera p50 {informe['espera_pendiente_p50_ms']:.1f} ms, "
+              f"max {informe['espera_pendiente_max_ms']:.1f} ms)")
+        if informe["latencia_censurada"]:
+            print("  Latencia censurada: los valores con ≥ son cotas inferiores.")
+        if informe["servidor_saturado"]:
+            print("  Muchas solicitudes pendientes o muy antiguas: el servidor no dio abasto.")
+    if informe["concesiones_vencidas"]:
+        print(f"Concesiones vencidas: {informe['concesiones_vencidas']}")
+    if informe["solicitudes_rechazadas"]:
+        print(f"Solicitudes rechazadas por el servidor: {informe['solicitudes_rechazadas']}")
+    if informe["liberaciones_rechazadas"]:
+        print(f"Liberaciones rechazadas por el servidor: {informe['liberaciones_rechazadas']}")
+    if args.observadores:
+        print(f"Bytes recibidos por observadores: {informe['bytes_observados']}")
+    if "cpu_servidor_pct" in informe:
+        print(f"CPU del servidor: {informe['cpu_servidor_pct']:.0f}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import os
+import queue
+import struct
+import threading
+import zlib
+
+# --- Diario de transiciones del puente (write-ahead journal) ---
+# Con --diario RUTA el servidor anota cada transición del puente (encolar, conceder, liberar,
+# cancelar y los eventos del log) en un archivo binario de solo anexado. anotar() solo guarda
+# la tupla en el lote en curso; al final de cada lote del planificador, confirmar() lo pasa
+# al hilo escritor, que junta todo lo pendiente en una escritura y un fsync (group commit).
+# Ni el planificador ni los permisos esperan al disco; a cambio, una caída puede perder los
+# últimos milisegundos de transiciones.
+#
+# Cada REGISTROS_POR_SNAPSHOT registros el diario se compacta: el estado completo se escribe
+# en un archivo nuevo (INICIO y los registros mínimos que lo rehacen) que sustituye al
+# anterior con un rename atómico. Al arrancar, el servidor relee el diario y reconstruye
+# colas, concesiones y log (puente.Puente.restaurar).
+#
+# Formato: MAGICO y después registros [largo u16][tipo u8][carga][crc32 u32], con el CRC
+# sobre tipo y carga. La lectura se detiene en el primer registro cortado o corrupto.
+
+MAGICO = b"PDI1"
+REGISTROS_POR_SNAPSHOT = 50000
+MAX_TEXTO = 1024  # Bytes UTF-8 del texto de un evento; los más largos se recortan
+
+CABECERA = struct.Struct("<HB")  # Largo de la carga y tipo
+CRC = struct.Struct("<I")
+DIRECCIONES = (None, "NORTH", "SOUTH")
+
+# Tipo de cada registro y formato de su carga
+INICIO, ENCOLAR, CONCEDER, LIBERAR, CANCELAR, EVENTO = range(1, 7)
+FORMATOS = {
+    INICIO: struct.Struct("<IIQ"),    # siguiente lease_id, concesiones recuperadas, seq del log
+    ENCOLAR: struct.Struct("<iBd"),   # car_id, dirección, instante (time.time()) en que se encoló
+    CONCEDER: struct.Struct("<IiBd"), # lease_id, car_id, dirección, instante (time.time()) en que vence
+    LIBERAR: struct.Struct("<IB"),    # lease_id, 1 si se reclamó por vencimiento
+    CANCELAR: struct.Struct("<i"),    # car_id que sale de la cola sin cruzar
+    EVENTO: struct.Struct("<QdiB"),   # seq, instante, car_id (-1 = ninguno), bytes del tipo; detrás, tipo y texto
+}
+NOMBRES = {INICIO: "INICIO", ENCOLAR: "ENCOLAR", CONCEDER: "CONCEDER", LIBERAR: "LIBERAR",
+           CANCELAR: "CANCELAR", EVENTO: "EVENTO"}
+TIPOS = {nombre: tipo for tipo, nombre in NOMBRES.items()}
+
+def codificar(registro):
+    """Un registro ("ENCOLAR", car_id, dirección, instante), etc., como bytes del diario."""
+    tipo = TIPOS[registro[0]]
+    if tipo == EVENTO:
+        _, seq, instante, clase, car_id, texto = registro
+        clase = clase.encode('utf-8')
+        carga = FORMATOS[EVENTO].pack(seq, instante, -1 if car_id is None else car_id, len(clase)) + clase \
+            + texto.encode('utf-8')[:MAX_TEXTO]
+    elif tipo == ENCOLAR:
+        _, car_id, direccion, instante = registro
+        carga = FORMATOS[ENCOLAR].pack(car_id, DIRECCIONES.index(direccion), instante)
+    elif tipo == CONCEDER:
+        _, lease_id, car_id, direccion, vence = registro
+        carga = FORMATOS[CONCEDER].pack(lease_id, car_id, DIRECCIONES.index(direccion), vence)
+    else:
+        carga = FORMATOS[tipo].pack(*registro[1:])
+    cuerpo = bytes([tipo]) + carga
+    return struct.pack("<H", len(carga)) + cuerpo + CRC.pack(zlib.crc32(cuerpo))
+
+def _codificar_lote(registros):
+    """Registros codificados uno detrás de otro. Uno que no cabe en su formato se avisa y se omite:
+    si el error escapara, el hilo escritor moriría y el diario dejaría de escribirse sin decir nada."""
+    partes = []
+    for registro in registros:
+        try:
+            partes.append(codificar(registro))
+        except (struct.error, ValueError) as e:
+            print(f"[ERROR] Diario: registro omitido {registro!r}: {e}")
+    return b"".join(partes)
+
+def _decodificar(tipo, datos, inicio, fin):
+    campos = FORMATOS[tipo].unpack_from(datos, inicio)
+    if tipo == EVENTO:
+        seq, instante, car_id, largo_clase = campos
+        inicio += FORMATOS[EVENTO].size
+        clase = bytes(datos[inicio:inicio + largo_clase]).decode('utf-8')
+        texto = bytes(datos[inicio + largo_clase:fin]).decode('utf-8', 'ignore')
+        return ("EVENTO", seq, instante, clase, None if car_id < 0 else car_id, texto)
+    if tipo == ENCOLAR:
+        car_id, direccion, instante = campos
+        return ("ENCOLAR", car_id, DIRECCIONES[direccion], instante)
+    if tipo == CONCEDER:
+        lease_id, car_id, direccion, vence = campos
+        return ("CONCEDER", lease_id, car_id, DIRECCIONES[direccion], vence)
+    return (NOMBRES[tipo], *campos)
+
+def leer(ruta):
+    """(registros, bytes válidos) del diario en RUTA; ([], 0) si no existe.
+
+    Se detiene en el primer registro cortado o con CRC incorrecto: lo que quedó a medio
+    escribir en una caída se descarta.
+    """
+    try:
+        with open(ruta, "rb") as archivo:
+            datos = memoryview(archivo.read())
+    except FileNotFoundError:
+        return [], 0
+    if bytes(datos[:len(MAGICO)]) != MAGICO:
+        raise ValueError(f"{ruta} no es un diario del puente")
+    registros = []
+    pos, total = len(MAGICO), len(datos)
+    while total - pos >= CABECERA.size:
+        largo, tipo = CABECERA.unpack_from(datos, pos)
+        fin = pos + CABECERA.size + largo
+        if fin + CRC.size > total or tipo not in FORMATOS:
+            break
+        if zlib.crc32(datos[pos + 2:fin]) != CRC.unpack_from(datos, fin)[0]:
+            break
+        registros.append(_decodificar(tipo, datos, pos + CABECERA.size, fin))
+        pos = fin + CRC.size
+    return registros, pos
+
+class Diario:
+    """Escritor del diario. anotar() y compactar() los llama el planificador; el disco solo lo toca el hilo escritor."""
+    def __init__(self, ruta, largo_valido=0):
+        self.ruta = ruta
+        self.pendientes = queue.SimpleQueue()  # Lotes de registros, ("SNAPSHOT", registros) o None para terminar
+        self.lote = []
+        self.anotados = 0      # Registros desde la última compactación
+        self.escrituras = 0    # Escrituras con fsync (cada una agrupa todo lo pendiente)
+        if largo_valido:
+            os.truncate(ruta, largo_valido)  # Descarta la cola cortada de una caída
+            self.archivo = open(ruta, "ab")
+        else:
+            self.archivo = open(ruta, "wb")
+            self.archivo.write(MAGICO)
+        self.hilo = threading.Thread(target=self._escribir, daemon=True)
+        self.hilo.start()
+
+    def anotar(self, registro):
+        self.lote.append(registro)
+        self.anotados += 1
+
+    def confirmar(self):
+        """Pasa al escritor lo anotado desde la última llamada."""
+        if self.lote:
+            self.pendientes.put(self.lote)
+            self.lote = []
+
+    def compactar(self, registros):
+        """Sustituye el diario por `registros` (el estado completo en este instante); lo anotado después se añade detrás."""
+        self.lote = []
+        self.pendientes.put(("SNAPSHOT", registros))
+        self.anotados = 0
+
+    def _escribir(self):
+        """Hilo escritor: toma todo lo pendiente, lo escribe de una vez y hace un solo fsync."""
+        while True:
+            lote = [self.pendientes.get()]
+            while True:
+                try:
+                    lote.append(self.pendientes.get_nowait())
+                except queue.Empty:
+                    break
+            datos = bytearray()
+            for elemento in lote:
+                if elemento is None:
+                    self._volcar(datos)
+                    self.archivo.close()
+                    return
+                if elemento[0] == "SNAPSHOT":
+                    self._volcar(datos)
+                    datos = bytearray()
+                    self._reemplazar(elemento[1])
+                else:
+                    datos += _codificar_lote(elemento)
+            self._volcar(datos)
+
+    def _volcar(self, datos):
+        if not datos: return
+        self.archivo.write(datos)
+        self.archivo.flush()
+        os.fsync(self.archivo.fileno())
+        self.escrituras += 1
+
+    def _reemplazar(self, registros):
+        temporal = self.ruta + ".tmp"
+        with open(temporal, "wb") as archivo:
+            archivo.write(MAGICO + _codificar_lote(registros))
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        os.replace(temporal, self.ruta)
+        self.archivo.close()
+        self.archivo = open(self.ruta, "ab")
+
+    def cerrar(self):
+        """Escribe lo pendiente y cierra el archivo."""
+        self.confirmar()
+        self.pendientes.put(None)
+        self.hilo.join(timeout=5)
@@ -0,0 +1,186 @@
+import math
+import threading
+
+import numpy as np
+
+# --- Geometría de la escena y reglas de movimiento de los carros ---
+# Sin pygame: la usan interfaz.py para mover y dibujar los carros y simulacion.py
+# para calcular cuánto tarda cada tramo del recorrido con el mismo modelo. FlotaCarros
+# aplica esas reglas a todos los carros de la interfaz a la vez, con arreglos NumPy.
+
+SIM_WIDTH, SIM_HEIGHT = 900, 600
+BRIDGE_START_X, BRIDGE_END_X = 200, 700
+BRIDGE_Y_CENTER = SIM_HEIGHT / 2
+BRIDGE_HEIGHT = 80
+CAR_WIDTH, CAR_HEIGHT = 30, 20
+FPS = 60
+
+SAFE_DISTANCE_ON_BRIDGE = 25
+QUEUE_GAP = 10
+
+def sentido(direccion):
+    """+1 si la dirección avanza hacia la derecha (NORTH), -1 si hacia la izquierda (SOUTH)."""
+    return 1 if direccion == 'NORTH' else -1
+
+def posicion_inicial(direccion):
+    """x donde aparece el carro al salir a la carretera, justo fuera de la escena."""
+    return -CAR_WIDTH if direccion == 'NORTH' else SIM_WIDTH
+
+def linea_de_espera(direccion):
+    """x donde se detiene el primer carro de la cola, antes de la entrada del puente."""
+    return (BRIDGE_START_X - 20 - CAR_WIDTH) if direccion == 'NORTH' else (BRIDGE_END_X + 20)
+
+def lugar_en_cola(direccion, puesto):
+    """x del carro que tiene `puesto` carros delante en la cola."""
+    return linea_de_espera(direccion) - sentido(direccion) * puesto * (QUEUE_GAP + CAR_WIDTH)
+
+def salida_del_puente(direccion):
+    """x a partir de la cual el carro ha dejado el puente."""
+    return BRIDGE_END_X if direccion == 'NORTH' else BRIDGE_START_X - CAR_WIDTH
+
+def salida_de_escena(direccion):
+    """x a partir de la cual el carro ha salido de la escena y vuelve a descansar."""
+    return SIM_WIDTH if direccion == 'NORTH' else -2 * CAR_WIDTH
+
+def segundos_para_recorrer(distancia, velocidad):
+    """Tiempo que tarda un carro en avanzar `distancia` píxeles a `velocidad` píxeles por cuadro."""
+    return math.ceil(abs(distancia) / velocidad) / FPS
+
+def carril_y(direction):
+    """Altura del carril por el que circula un carro fuera del puente."""
+    return (BRIDGE_Y_CENTER - BRIDGE_HEIGHT / 4 - CAR_HEIGHT) if direction == 'NORTH' else (BRIDGE_Y_CENTER + BRIDGE_HEIGHT / 4)
+
+# --- Física de los carros en arreglos (struct of arrays) ---
+ESTADOS = ('IDLE', 'DRIVING_TO_BRIDGE', 'WAITING', 'CROSSING', 'RETURNING', 'ERROR')
+IDLE, DRIVING_TO_BRIDGE, WAITING, CROSSING, RETURNING, ERROR = range(len(ESTADOS))
+CODIGO_ESTADO = {nombre: codigo for codigo, nombre in enumerate(ESTADOS)}
+SIN_CARRIL, COLA_NORTE, COLA_SUR, PUENTE_NORTE, PUENTE_SUR = range(5)
+
+class FlotaCarros:
+    """Posición, velocidad, estado, dirección y carril de todos los carros en arreglos NumPy.
+
+    actualizar() mueve todos los carros en un solo paso: ordena los carriles por posición una
+    vez por cuadro para encontrar el carro de delante de cada uno, en lugar de que cada carro
+    recorra a todos los demás (O(n log n) por cuadro en vez de O(n²)).
+    """
+    CAMPOS = ('x', 'y', 'velocidad', 'velocidad_original', 'estado', 'sentido', 'carril')
+
+    def __init__(self, capacidad=64):
+        self.lock = threading.Lock()  # Protege los arreglos frente al bucle de los carros y los formularios
+        self.n = 0
+        self.al_cambiar_estado = None  # Recibe [(estado, índices)] con los carros que cambiaron de estado en un paso
+        self.carros = []  # Carro de cada índice
+        self.x = np.zeros(capacidad)
+        self.y = np.zeros(capacidad)
+        self.velocidad = np.zeros(capacidad)           # Píxeles por cuadro; 0 si frena en el puente
+        self.velocidad_original = np.zeros(capacidad)
+        self.estado = np.zeros(capacidad, dtype=np.int8)
+        self.sentido = np.zeros(capacidad, dtype=np.int8)  # +1 NORTH (hacia la derecha), -1 SOUTH
+        self.carril = np.zeros(capacidad, dtype=np.int8)   # Cola o puente de cada dirección; se recalcula en cada cuadro
+        vacia = Instantanea(self, 0, 0.0)
+        self.instantaneas = (vacia, vacia)  # (anterior, actual) publicadas por el hilo de simulación
+
+    def agregar(self, carro, x, y, velocidad, direction):
+        """Reserva un índice para el carro y devuelve su posición en los arreglos."""
+        with self.lock:
+            if self.n == len(self.x):
+                for campo in self.CAMPOS:
+                    arreglo = getattr(self, campo)
+                    setattr(self, campo, np.concatenate([arreglo, np.zeros_like(arreglo)]))
+            i = self.n
+            self.x[i], self.y[i] = x, y
+            self.velocidad[i] = self.velocidad_original[i] = velocidad
+            self.estado[i] = IDLE
+            self.sentido[i] = sentido(direction)
+            self.carros.append(carro)
+            self.n += 1
+            return i
+
+    def actualizar(self):
+        """Avanza un cuadro: las mismas reglas de cola, puente y regreso que tenía Carro.update, para todos a la vez."""
+        with self.lock:
+            n = self.n
+            if n == 0: return
+            x, y, estado, sentido = self.x[:n], self.y[:n], self.estado[:n], self.sentido[:n]
+            norte = sentido > 0
+            en_cola = (estado == DRIVING_TO_BRIDGE) | (estado == WAITING)
+            cruzando = estado == CROSSING
+            regresando = estado == RETURNING
+            carril = np.where(en_cola, np.where(norte, COLA_NORTE, COLA_SUR),
+                              np.where(cruzando, np.where(norte, PUENTE_NORTE, PUENTE_SUR), SIN_CARRIL))
+            self.carril[:n] = carril
+
+            # El de delante es el siguiente del mismo carril con un avance estrictamente mayor
+            avance = sentido * x  # Crece en el sentido de la marcha en ambas direcciones
+            clave = carril * 1e5 + avance
+            orden = np.argsort(clave, kind='stable')
+            clave_ordenada = clave[orden]
+            siguiente = np.minimum(np.searchsorted(clave_ordenada, clave_ordenada, side='right'), n - 1)
+            valido = (clave_ordenada[siguiente] > clave_ordenada) & (carril[orden][siguiente] == carril[orden])
+            lider = np.full(n, -1)
+            lider[orden] = np.where(valido, orden[siguiente], -1)
+            tiene_lider = lider >= 0
+            x_lider = x[np.maximum(lider, 0)]
+
+            # --- Puente: frenar si el de delante está a menos de la distancia de seguridad ---
+            velocidad = self.velocidad_original[:n].copy()
+            hueco = sentido * (x_lider - x) - CAR_WIDTH
+            velocidad[cruzando & tiene_lider & (hueco < SAFE_DISTANCE_ON_BRIDGE)] = 0
+            self.velocidad[:n] = velocidad
+            nueva_x = x + sentido * velocidad
+
+            # --- Cola: avanzar hasta detrás del de delante o hasta la línea de espera ---
+            linea = np.where(norte, linea_de_espera('NORTH'), linea_de_espera('SOUTH'))
+            objetivo = np.where(tiene_lider, x_lider - sentido * (QUEUE_GAP + CAR_WIDTH), linea)
+            avanza = en_cola & (avance < sentido * objetivo)
+            llega = en_cola & ~avanza
+            x_cola = np.where(norte, np.minimum(nueva_x, SIM_WIDTH - CAR_WIDTH), np.maximum(nueva_x, 0))
+
+            # --- Puente y regreso: avanzar hasta la salida correspondiente ---
+            salida_puente = np.where(norte, salida_del_puente('NORTH'), salida_del_puente('SOUTH'))
+            salida_escena = np.where(norte, salida_de_escena('NORTH'), salida_de_escena('SOUTH'))
+            cruza = cruzando & (avance < sentido * salida_puente)
+            regresa = regresando & (avance < sentido * salida_escena)
+
+            x[avanza] = x_cola[avanza]
+            x[llega] = objetivo[llega]
+            x[cruza | regresa] = nueva_x[cruza | regresa]
+            y[cruzando] = BRIDGE_Y_CENTER - CAR_HEIGHT / 2
+            y[regresando] = np.where(norte, carril_y('NORTH'), carril_y('SOUTH'))[regresando]
+            cambios = [(WAITING, np.flatnonzero(llega & (estado == DRIVING_TO_BRIDGE))),
+                       (RETURNING, np.flatnonzero(cruzando & ~cruza)),
+                       (IDLE, np.flatnonzero(regresando & ~regresa))]
+            estado[llega] = WAITING
+            estado[cruzando & ~cruza] = RETURNING
+            estado[regresando & ~regresa] = IDLE
+        cambios = [(codigo, indices) for codigo, indices in cambios if len(indices)]
+        if cambios and self.al_cambiar_estado is not None:
+            self.al_cambiar_estado(cambios)
+
+    def publicar(self, instante):
+        """Copia el estado recién calculado y lo publica junto al anterior; el dibujo nunca toma self.lock."""
+        with self.lock:
+            nueva = Instantanea(self, self.n, instante)
+        self.instantaneas = (self.instantaneas[1], nueva)  # Asignación atómica del par
+
+class Instantanea:
+    """Copia inmutable del estado de la flota en un paso de simulación."""
+    __slots__ = ("instante", "n", "x", "y", "velocidad", "estado", "sentido")
+
+    def __init__(self, flota, n, instante):
+        self.instante = instante
+        self.n = n
+        self.x = flota.x[:n].copy()
+        self.y = flota.y[:n].copy()
+        self.velocidad = flota.velocidad[:n].copy()
+        self.estado = flota.estado[:n].copy()
+        self.sentido = flota.sentido[:n].copy()
+
+def interpolar(anterior, actual, alfa):
+    """Posiciones entre dos pasos de simulación; los saltos (p. ej. al volver al inicio) no se interpolan."""
+    x, y = actual.x.copy(), actual.y.copy()
+    m = anterior.n
+    suave = np.abs(actual.x[:m] - anterior.x[:m]) <= 2 * CAR_WIDTH
+    x[:m][suave] = anterior.x[:m][suave] + (actual.x[:m][suave] - anterior.x[:m][suave]) * alfa
+    y[:m][suave] = anterior.y[:m][suave] + (actual.y[:m][suave] - anterior.y[:m][suave]) * alfa
+    return x, y
@@ -0,0 +1,29 @@
+# --- Percentiles de latencias y esperas ---
+# Sin dependencias: los usan carga.py para las latencias medidas contra el servidor y
+# simulacion.py para las esperas de la simulación con reloj virtual.
+
+def percentil(valores, p):
+    """Percentil p (0-100) de una lista ya ordenada."""
+    if not valores:
+        return float('nan')
+    indice = min(len(valores) - 1, max(0, round(p / 100 * (len(valores) - 1))))
+    return valores[indice]
+
+def percentiles_censurados(latencias, esperas, ps):
+    """Percentiles de la latencia contando también las solicitudes que seguían sin permiso al cortar.
+
+    De esas solo se sabe que su latencia es al menos la espera que llevaban (dato censurado).
+    Devuelve {p: (valor, es_cota)}: es_cota indica que el valor es solo una cota inferior, porque
+    el valor que cae en su posición es la espera de una solicitud pendiente. Una pendiente más
+    corta que el valor no lo marca: que siguiera esperando unos milisegundos no dice nada de la cola.
+    """
+    muestras = sorted([(l, False) for l in latencias] + [(e, True) for e in esperas])
+    resultado = {}
+    for p in ps:
+        if not muestras:
+            resultado[p] = (float('nan'), False)
+            continue
+        indice = min(len(muestras) - 1, max(0, round(p / 100 * (len(muestras) - 1))))
+        valor = muestras[indice][0]
+        resultado[p] = (valor, any(censurada and espera >= valor for espera, censurada in muestras[:indice + 1]))
+    return resultado
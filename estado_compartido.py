@@ -0,0 +1,163 @@
+import os
+import struct
+import time
+from multiprocessing import shared_memory
+
+# --- Canal de estado en memoria compartida ---
+# Cuando servidor.py e interfaz.py corren en la misma máquina, el servidor publica el
+# estado del puente en un registro de formato fijo dentro de un bloque de memoria
+# compartida y la interfaz lo lee sin JSON ni sockets. El registro se protege con un
+# seqlock: el contador es impar mientras el servidor escribe, y un lector que ve el
+# contador cambiar (o impar) durante la lectura la repite. Los observadores remotos
+# siguen usando STATUS_UPDATE/STATUS_DELTA por TCP.
+
+MAGICO = b"PNT1"
+MAX_CRUZANDO = 64        # Ids de carros sobre el puente que caben en el registro
+MAX_LOG = 10             # Entradas del log (igual que puente.MAX_LOG)
+LARGO_POLITICA = 64
+LARGO_ENTRADA_LOG = 160  # Bytes UTF-8 por entrada; las más largas se recortan
+
+# magico, pid del servidor, contador del seqlock
+CABECERA = struct.Struct("<4sIQ")
+# seq, ocupado, dirección, en espera N/S, desalojos, concesiones recuperadas, carros cruzando,
+# entradas del log, ids cruzando, política y entradas del log
+REGISTRO = struct.Struct(f"<QBBIIIIHH{MAX_CRUZANDO}i{LARGO_POLITICA}s" + f"{LARGO_ENTRADA_LOG}s" * MAX_LOG)
+TAMANO = CABECERA.size + REGISTRO.size
+
+DIRECCIONES = (None, "NORTH", "SOUTH")
+
+def _recortar(texto, largo):
+    """Codifica en UTF-8 sin pasar de `largo` bytes ni partir un carácter."""
+    return texto.encode('utf-8')[:largo].decode('utf-8', 'ignore').encode('utf-8')
+
+class PublicadorEstado:
+    """Lado del servidor: crea el bloque y escribe el registro; un único escritor (el planificador)."""
+    def __init__(self, nombre):
+        try:
+            self.memoria = shared_memory.SharedMemory(name=nombre, create=True, size=TAMANO)
+        except FileExistsError:
+            # Bloque huérfano de un servidor anterior que no se cerró limpiamente
+            viejo = shared_memory.SharedMemory(name=nombre)
+            viejo.close(); viejo.unlink()
+            self.memoria = shared_memory.SharedMemory(name=nombre, create=True, size=TAMANO)
+        self.contador = 0
+        CABECERA.pack_into(self.memoria.buf, 0, MAGICO, os.getpid(), self.contador)
+
+    def publicar(self, seq, estado, log):
+        """Escribe el estado (campos de construir_estado) y las entradas del log."""
+        cruzando = estado["crossing_cars"][:MAX_CRUZANDO]
+        entradas = [_recortar(e, LARGO_ENTRADA_LOG) for e in list(log)[-MAX_LOG:]]
+        valores = (seq, estado["bridge_status"] == "OCUPADO", DIRECCIONES.index(estado["current_direction"]),
+                   estado["waiting_north"], estado["waiting_south"], estado["evicted_clients"],
+                   estado["reclaimed_leases"], len(cruzando), len(entradas),
+                   *cruzando, *[0] * (MAX_CRUZANDO - len(cruzando)),
+                   _recortar(estado["policy"], LARGO_POLITICA),
+                   *entradas, *[b""] * (MAX_LOG - len(entradas)))
+        buf = self.memoria.buf
+        self.contador += 1  # Impar: escritura en curso
+        struct.pack_into("<Q", buf, 8, self.contador)
+        REGISTRO.pack_into(buf, CABECERA.size, *valores)
+        self.contador += 1
+        struct.pack_into("<Q", buf, 8, self.contador)
+
+    def cerrar(self):
+        self.memoria.close()
+        self.memoria.unlink()
+
+class LectorEstado:
+    """Lado de la interfaz: se adjunta al bloque y devuelve el último estado leído de forma consistente."""
+    INTERVALO_VIDA = 1.0  # Cada cuántos segundos se comprueba que el servidor sigue vivo
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.memoria, self.pid = self._adjuntar(nombre)
+        self.contador_leido = None
+        self.ultimo = ({}, [])
+        self.proxima_revision = 0.0
+
+    @staticmethod
+    def _adjuntar(nombre):
+        try:
+            memoria = shared_memory.SharedMemory(name=nombre, track=False)
+        except TypeError:
+            # Python < 3.13: el resource_tracker borraría el bloque del servidor al salir la interfaz
+            from multiprocessing import resource_tracker
+            memoria = shared_memory.SharedMemory(name=nombre)
+            resource_tracker.unregister(memoria._name, "shared_memory")
+        magico, pid, _ = CABECERA.unpack_from(memoria.buf, 0)
+        if magico != MAGICO:
+            memoria.close()
+            raise ValueError(f"El bloque {nombre} no contiene un registro de estado del puente")
+        return memoria, pid
+
+    @staticmethod
+    def _vivo(pid):
+        try:
+            os.kill(pid, 0)
+            return True
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+
+    def _servidor_vivo(self):
+        """Si el servidor murió y otro creó de nuevo el bloque (un reinicio), se adjunta al nuevo."""
+        if self._vivo(self.pid):
+            return True
+        try:
+            memoria, pid = self._adjuntar(self.nombre)
+        except (FileNotFoundError, ValueError):
+            return False
+        if pid == self.pid or not self._vivo(pid):
+            memoria.close()
+            return False
+        self.memoria.close()
+        self.memoria, self.pid = memoria, pid
+        self.contador_leido = None
+        return True
+
+    def leer(self):
+        """(estado, log) como los de STATUS_UPDATE; sin cambios devuelve los mismos objetos, sin copiar."""
+        ahora = time.monotonic()
+        if ahora >= self.proxima_revision:
+            self.proxima_revision = ahora + self.INTERVALO_VIDA
+            if not self._servidor_vivo():
+                self.contador_leido = None
+                self.ultimo = ({"error": "Servidor no conectado"}, self.ultimo[1])
+                return self.ultimo
+        buf = self.memoria.buf
+        for _ in range(100):
+            antes = struct.unpack_from("<Q", buf, 8)[0]
+            if antes == self.contador_leido or antes == 0:
+                return self.ultimo
+            if antes & 1:
+                continue  # El servidor está escribiendo
+            valores = REGISTRO.unpack_from(buf, CABECERA.size)
+            if struct.unpack_from("<Q", buf, 8)[0] == antes:
+                break
+        else:
+            return self.ultimo
+        self.contador_leido = antes
+        (seq, ocupado, direccion, espera_n, espera_s, desalojos, recuperadas,
+         n_cruzando, n_log) = valores[:9]
+        cruzando = list(valores[9:9 + n_cruzando])
+        politica = valores[9 + MAX_CRUZANDO]
+        log = [e.rstrip(b"\0").decode('utf-8') for e in valores[10 + MAX_CRUZANDO:10 + MAX_CRUZANDO + n_log]]
+        direccion = DIRECCIONES[direccion]
+        estado = {
+            "bridge_status": "OCUPADO" if ocupado else "LIBRE",
+            "current_direction": direccion,
+            "waiting_north": espera_n,
+            "waiting_south": espera_s,
+            "crossing_cars": cruzando,
+            "traffic_light": direccion if ocupado and direccion else "NONE",
+            "evicted_clients": desalojos,
+            "policy": politica.rstrip(b"\0").decode('utf-8'),
+            "reclaimed_leases": recuperadas,
+            "seq": seq,
+        }
+        self.ultimo = (estado, log)
+        return self.ultimo
+
+    def cerrar(self):
+        self.memoria.close()
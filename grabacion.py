@@ -0,0 +1,250 @@
+import argparse
+import json
+import mmap
+import os
+import random
+import struct
+import time
+from collections import deque
+
+from puente import MAX_LOG
+
+# --- Grabación y reproducción del estado del puente ---
+# Un Grabador guarda la secuencia de estados que ve un observador (interfaz.py --grabar) o
+# que difunde el propio servidor (servidor.py --grabar) en un archivo de solo anexado.
+# Cada cuadro lleva su instante y es un keyframe (estado completo, como STATUS_UPDATE) o un
+# delta (campos que cambiaron y líneas nuevas del log, como STATUS_DELTA).
+#
+# El primer cuadro de cada RESOLUCION_INDICE segundos es siempre un keyframe, y el índice
+# (RUTA.idx) guarda para cada uno de esos intervalos la posición del keyframe con el que
+# empieza, o la del anterior si en ese intervalo no hubo cuadros. Buscar un instante es
+# calcular su intervalo, leer una entrada del índice y aplicar como mucho los deltas de un
+# intervalo: cuesta lo mismo al principio que tras horas de grabación. El Reproductor
+# proyecta ambos archivos con mmap y no necesita el servidor.
+#
+# Formato: CABECERA (MAGICO, instante inicial, resolución) y cuadros
+# [largo u32][tipo u8][instante f64][JSON]; el índice es un arreglo de u64.
+
+MAGICO = b"PGR1"
+RESOLUCION_INDICE = 1.0  # Segundos por entrada del índice (y entre keyframes forzados)
+
+CABECERA = struct.Struct("<4sdd")  # magico, instante del primer cuadro, resolución del índice
+CUADRO = struct.Struct("<IBd")     # largo del JSON, tipo, instante
+ENTRADA_INDICE = struct.Struct("<Q")
+KEYFRAME, DELTA = 1, 2
+
+def ruta_indice(ruta):
+    return ruta + ".idx"
+
+def _json(objeto):
+    return json.dumps(objeto, separators=(",", ":")).encode('utf-8')
+
+class Grabador:
+    """Escribe la grabación; anotar() recibe cada estado completo y decide entre keyframe y delta."""
+    def __init__(self, ruta, resolucion=RESOLUCION_INDICE):
+        self.ruta = ruta
+        self.resolucion = resolucion
+        self.datos = open(ruta, "wb")
+        self.indice = open(ruta_indice(ruta), "wb")
+        self.inicio = None
+        self.intervalo = -1        # Intervalo del índice del último cuadro escrito
+        self.ultimo_keyframe = 0   # Posición del último keyframe
+        self.posicion = CABECERA.size
+        self.estado = {}
+        self.log = []
+        self.log_seq = None        # Secuencia de la última línea grabada, si se conoce
+        self.cuadros = 0
+
+    def anotar(self, estado, log, instante=None, log_seq=None):
+        """Graba `estado` (campos de STATUS_UPDATE sin el log) y las líneas del log que se ven ahora.
+
+        `log_seq` es el número de secuencia de la última línea de `log` (puente.RegistroEventos.seq):
+        las nuevas son las últimas log_seq - anterior, aunque haya líneas con el mismo texto. Sin
+        él no hay forma de saberlo, y un log distinto del anterior se graba en un keyframe.
+        """
+        instante = time.time() if instante is None else instante
+        log = list(log)[-MAX_LOG:]
+        if self.inicio is None:
+            self.inicio = instante
+            self.datos.write(CABECERA.pack(MAGICO, instante, self.resolucion))
+        intervalo = max(int((instante - self.inicio) / self.resolucion), self.intervalo)
+        if intervalo > self.intervalo:
+            # Primer cuadro del intervalo: keyframe, y entradas del índice hasta él
+            huecos = intervalo - self.intervalo - 1
+            self.indice.write(ENTRADA_INDICE.pack(self.ultimo_keyframe) * huecos + ENTRADA_INDICE.pack(self.posicion))
+            self.ultimo_keyframe = self.posicion
+            self.intervalo = intervalo
+            self._escribir(KEYFRAME, instante, {**estado, "log": log})
+            self.datos.flush()
+            self.indice.flush()
+        elif self.estado.keys() - estado.keys() or (nuevas := self._lineas_nuevas(log, log_seq)) is None:
+            # Un delta no puede quitar campos ni llevar líneas que no se sabe si son nuevas
+            self._escribir(KEYFRAME, instante, {**estado, "log": log})
+        else:
+            cambios = {clave: valor for clave, valor in estado.items() if self.estado.get(clave) != valor}
+            if not cambios and not nuevas:
+                return
+            self._escribir(DELTA, instante, {"changes": cambios, "log": nuevas})
+        self.estado = dict(estado)
+        self.log = log
+        self.log_seq = log_seq
+
+    def _lineas_nuevas(self, log, log_seq):
+        """Líneas de `log` posteriores a las ya grabadas, o None si no se puede saber cuáles son."""
+        if log_seq is None or self.log_seq is None:
+            return [] if log == self.log else None
+        nuevas = log_seq - self.log_seq
+        if not 0 <= nuevas <= len(log):
+            return None  # Se perdieron líneas entre medias (o el log empezó de nuevo)
+        return log[len(log) - nuevas:]
+
+    def _escribir(self, tipo, instante, contenido):
+        carga = _json(contenido)
+        self.datos.write(CUADRO.pack(len(carga), tipo, instante) + carga)
+        self.posicion += CUADRO.size + len(carga)
+        self.cuadros += 1
+
+    def cerrar(self):
+        self.datos.close()
+        self.indice.close()
+
+class Reproductor:
+    """Lee una grabación con mmap: buscar() salta a cualquier instante y siguiente()/anterior() avanzan de cuadro en cuadro."""
+    def __init__(self, ruta):
+        with open(ruta, "rb") as archivo:
+            self.datos = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        magico, self.inicio, self.resolucion = CABECERA.unpack_from(self.datos, 0)
+        if magico != MAGICO:
+            raise ValueError(f"{ruta} no es una grabación del puente")
+        with open(ruta_indice(ruta), "rb") as archivo:
+            self.intervalos = os.fstat(archivo.fileno()).st_size // ENTRADA_INDICE.size
+            if not self.intervalos:
+                raise ValueError(f"{ruta} no tiene cuadros")
+            self.indice = mmap.mmap(archivo.fileno(), self.intervalos * ENTRADA_INDICE.size, access=mmap.ACCESS_READ)
+        # Posición y estado del cuadro actual
+        self.posicion = None
+        self.instante = self.inicio
+        self.estado = {}
+        self.log = deque(maxlen=MAX_LOG)
+        # El final se busca desde el último keyframe: solo se recorre un intervalo
+        self.fin = self.inicio
+        for _, _, instante, _ in self._cuadros(self._keyframe(self.intervalos - 1)):
+            self.fin = instante
+        self.buscar(self.inicio)
+
+    @property
+    def duracion(self):
+        return self.fin - self.inicio
+
+    def _keyframe(self, intervalo):
+        return ENTRADA_INDICE.unpack_from(self.indice, intervalo * ENTRADA_INDICE.size)[0]
+
+    def _cuadros(self, posicion):
+        """(posición, tipo, instante, siguiente posición) de cada cuadro completo desde `posicion`."""
+        total = len(self.datos)
+        while posicion + CUADRO.size <= total:
+            largo, tipo, instante = CUADRO.unpack_from(self.datos, posicion)
+            siguiente = posicion + CUADRO.size + largo
+            if siguiente > total:
+                break  # Cuadro cortado al final de una grabación interrumpida
+            yield posicion, tipo, instante, siguiente
+            posicion = siguiente
+
+    def _aplicar(self, posicion, tipo, siguiente):
+        contenido = json.loads(self.datos[posicion + CUADRO.size:siguiente])
+        if tipo == KEYFRAME:
+            self.log.clear()
+            self.log.extend(contenido.pop("log"))
+            self.estado = contenido
+        else:
+            self.estado = {**self.estado, **contenido["changes"]}
+            self.log.extend(contenido["log"])
+
+    def _intervalo(self, instante):
+        return min(max(int((instante - self.inicio) / self.resolucion), 0), self.intervalos - 1)
+
+    def buscar(self, instante):
+        """Deja como actual el último cuadro grabado en o antes de `instante` (segundos Unix)."""
+        intervalo = self._intervalo(instante)
+        keyframe = self._keyframe(intervalo)
+        if intervalo > 0 and CUADRO.unpack_from(self.datos, keyframe)[2] > instante:
+            keyframe = self._keyframe(intervalo - 1)  # Antes del primer cuadro de su intervalo
+        self._reconstruir(keyframe, hasta_instante=instante)
+        return self.estado, list(self.log)
+
+    def _reconstruir(self, keyframe, hasta_instante=None, hasta_posicion=None):
+        self.posicion = None
+        for posicion, tipo, instante, siguiente in self._cuadros(keyframe):
+            if self.posicion is not None and (hasta_instante is not None and instante > hasta_instante
+                                              or hasta_posicion is not None and posicion > hasta_posicion):
+                break
+            self._aplicar(posicion, tipo, siguiente)
+            self.posicion, self.instante = posicion, instante
+
+    def siguiente(self):
+        """Avanza un cuadro; False si ya estaba en el último."""
+        for posicion, tipo, instante, siguiente in self._cuadros(self.posicion):
+            if posicion == self.posicion:
+                continue
+            self._aplicar(posicion, tipo, siguiente)
+            self.posicion, self.instante = posicion, instante
+            return True
+        return False
+
+    def anterior(self):
+        """Retrocede un cuadro; False si ya estaba en el primero."""
+        intervalo = self._intervalo(self.instante)
+        while intervalo > 0 and self._keyframe(intervalo) >= self.posicion:
+            intervalo -= 1  # El actual abre su intervalo: el anterior está en otro
+        keyframe = self._keyframe(intervalo)
+        if keyframe >= self.posicion:
+            return False
+        previo = keyframe
+        for posicion, _, _, _ in self._cuadros(keyframe):
+            if posicion >= self.posicion: break
+            previo = posicion
+        self._reconstruir(keyframe, hasta_posicion=previo)
+        return True
+
+    def avanzar_hasta(self, instante):
+        """Para la reproducción continua: aplica en orden los cuadros hasta `instante`; si está lejos, busca."""
+        if instante < self.instante or instante - self.instante > self.resolucion:
+            return self.buscar(instante)
+        for posicion, tipo, cuadro, siguiente in self._cuadros(self.posicion):
+            if posicion == self.posicion:
+                continue
+            if cuadro > instante: break
+            self._aplicar(posicion, tipo, siguiente)
+            self.posicion, self.instante = posicion, cuadro
+        return self.estado, list(self.log)
+
+    def cerrar(self):
+        self.datos.close()
+        self.indice.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Consulta una grabación del estado del puente sin el servidor.")
+    parser.add_argument("ruta")
+    parser.add_argument("--en", type=float, default=None, metavar="SEG",
+                        help="Muestra el estado a SEG segundos del inicio de la grabación.")
+    parser.add_argument("--medir", type=int, default=0, metavar="N", help="Mide N búsquedas a instantes aleatorios.")
+    args = parser.parse_args()
+    try:
+        reproductor = Reproductor(args.ruta)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    print(f"{args.ruta}: {reproductor.duracion:.1f} s desde {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(reproductor.inicio))}, "
+          f"{os.path.getsize(args.ruta) / 1024:.0f} KiB, {reproductor.intervalos} entradas de índice")
+    if args.en is not None:
+        estado, log = reproductor.buscar(reproductor.inicio + args.en)
+        print(json.dumps(estado, indent=2))
+        print("\n".join(log))
+    if args.medir:
+        instantes = [reproductor.inicio + random.uniform(0, reproductor.duracion) for _ in range(args.medir)]
+        inicio = time.perf_counter()
+        for instante in instantes:
+            reproductor.buscar(instante)
+        print(f"Búsqueda media: {(time.perf_counter() - inicio) / args.medir * 1e6:.0f} µs")
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,30 @@
 import pygame
+import asyncio
 import socket
 import threading
 import random
 import time
 import customtkinter as ctk
 import json
+import functools
+import argparse
 from collections import deque
 
+import numpy as np
+
+import escena
+import sesiones
+import protocolo
+import estado_compartido
+import grabacion
+from escena import SIM_WIDTH, SIM_HEIGHT, BRIDGE_START_X, BRIDGE_END_X, BRIDGE_Y_CENTER, BRIDGE_HEIGHT, CAR_WIDTH, CAR_HEIGHT, FPS
+from escena import ESTADOS, CODIGO_ESTADO, WAITING, CROSSING, FlotaCarros, carril_y, interpolar
 
 # --- Constantes de Configuración de Pygame ---
-SIM_WIDTH, PANEL_WIDTH = 900, 350
-SCREEN_WIDTH, SCREEN_HEIGHT = SIM_WIDTH + PANEL_WIDTH, 600
-BRIDGE_Y_CENTER = SCREEN_HEIGHT / 2
-BRIDGE_HEIGHT = 80
-BRIDGE_START_X, BRIDGE_END_X = 200, 700
-CAR_WIDTH, CAR_HEIGHT = 30, 20
-FPS = 60
-
-# --- Constantes de Colisión y Diseño ---
-SAFE_DISTANCE_ON_BRIDGE = 25
-QUEUE_GAP = 10
+PANEL_WIDTH = 350
+SCREEN_WIDTH, SCREEN_HEIGHT = SIM_WIDTH + PANEL_WIDTH, SIM_HEIGHT
+
+# --- Constantes de Diseño (la geometría del recorrido está en escena.py) ---
 LANE_LINE_WIDTH, LANE_LINE_HEIGHT = 20, 5
 LANE_LINE_GAP = 20
 
@@ -32,176 +37,284 @@ GREEN_LIGHT, RED_LIGHT, OFF_LIGHT = (0, 255, 0), (255, 0, 0), (80, 80, 80)
 PROGRESS_BAR_BG = (60, 60, 80)
 PROGRESS_BAR_FG = (100, 100, 220)
 
+# --- Reproducción de grabaciones (--reproducir) ---
+BARRA_REPRODUCCION = pygame.Rect(150, SCREEN_HEIGHT - 45, SIM_WIDTH - 170, 14)
+SALTO_REPRODUCCION = 10.0  # Segundos que avanzan o retroceden Mayús+flechas
+
 # --- Estado compartido y Thread-safety ---
 carros_lock = threading.Lock()
 status_lock = threading.Lock()
 current_server_status = {}
-event_log = deque(maxlen=13)
+event_log = deque(maxlen=10)
+# Secuencia de la última línea de event_log para el grabador: cuenta las líneas de cada delta. Un
+# keyframe no dice cuántas de las suyas son nuevas y la salta más de una ventana: se graba entero
+event_log_seq = 0
+
+# --- Hilo de simulación (la física de la flota está en escena.FlotaCarros) ---
+PASO_SIMULACION = 1 / FPS   # Las velocidades están en píxeles por paso, no por cuadro dibujado
+MAX_PASOS_POR_CICLO = 5     # Si la simulación se atrasa más, se descarta el atraso en lugar de acumularlo
+
+def simular_flota(flota, detener):
+    """Hilo de simulación: avanza la flota a paso fijo, independiente de lo que tarde cada cuadro en dibujarse."""
+    siguiente = time.perf_counter()
+    while not detener.is_set():
+        pasos = 0
+        while time.perf_counter() >= siguiente and pasos < MAX_PASOS_POR_CICLO:
+            flota.actualizar()
+            siguiente += PASO_SIMULACION
+            pasos += 1
+        if pasos:
+            # Sellada con el instante en que tocaba el último paso, no con el del siguiente: el dibujo
+            # la alcanza en ese momento y, hasta la próxima, avanza desde la anterior hacia ella
+            flota.publicar(siguiente - PASO_SIMULACION)
+        if pasos == MAX_PASOS_POR_CICLO:
+            siguiente = max(siguiente, time.perf_counter())
+        time.sleep(max(0.0, siguiente - time.perf_counter()))
+
+flota = FlotaCarros()
+
+# --- Bucle asyncio compartido por todos los carros ---
+bucle_carros = asyncio.new_event_loop()
+conexion_carros = None            # sesiones.ConexionCompartida por la que viajan todos los carros
+codec_servidor = protocolo.BINARIO  # Codec que se negocia con el servidor (--protocolo)
+puente_servidor = 0                # Puente del servidor que usan los carros y que muestra el panel (--puente)
+apertura_conexion = asyncio.Lock()
+REINTENTOS_CONEXION = 15  # Intentos de reconexión si el servidor se cae (cubren un reinicio con --diario)
+ESPERA_RECONEXION = 1.0   # Segundos entre intentos
+ESPERA_MAX_REGRESO = 60.0 # Segundos que un carro espera el aviso de fin de regreso antes de recolocarse igualmente
+
+def despachar_cambios(cambios):
+    """En el bucle de los carros: despierta a los que esperaban llegar a su nuevo estado."""
+    for codigo, indices in cambios:
+        for i in indices:
+            carro = flota.carros[i]
+            if carro.esperado == codigo and carro.aviso is not None and not carro.aviso.done():
+                carro.aviso.set_result(codigo)
+
+def iniciar_bucle_carros():
+    """Arranca el hilo del bucle de los carros y conecta los avisos de la simulación (una llamada por paso, no por carro)."""
+    flota.al_cambiar_estado = lambda cambios: bucle_carros.call_soon_threadsafe(despachar_cambios, cambios)
+    threading.Thread(target=bucle_carros.run_forever, daemon=True).start()
+
+def detener_bucle_carros():
+    """Cancela los ciclos de vida pendientes, cierra la conexión compartida y detiene el bucle de los carros."""
+    async def cancelar():
+        tareas = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for tarea in tareas: tarea.cancel()
+        await asyncio.gather(*tareas, return_exceptions=True)
+        if conexion_carros is not None:
+            conexion_carros.cerrar()
+    if bucle_carros.is_running():
+        asyncio.run_coroutine_threadsafe(cancelar(), bucle_carros).result(timeout=2)
+        bucle_carros.call_soon_threadsafe(bucle_carros.stop)
+
+def iniciar_carro(carro):
+    """Programa el ciclo de vida de un carro en el bucle compartido; se puede llamar desde cualquier hilo."""
+    asyncio.run_coroutine_threadsafe(carro_lifecycle(carro), bucle_carros)
 
 class Carro:
+    """Vista de un carro dentro de la flota: sus datos viven en los arreglos de FlotaCarros."""
     def __init__(self, car_id, direction, speed, delay_time):
         self.id = car_id
-        self.direction = direction
         self.color = (random.randint(100, 255), random.randint(100, 255), random.randint(100, 255))
-        self.original_speed = speed
         self.delay_time = delay_time
-        self.speed = self.original_speed
-        y_pos = (BRIDGE_Y_CENTER - BRIDGE_HEIGHT / 4 - CAR_HEIGHT) if direction == 'NORTH' else (BRIDGE_Y_CENTER + BRIDGE_HEIGHT / 4)
-        self.original_y = y_pos
-
-        self.start_pos_x = -CAR_WIDTH if direction == 'NORTH' else (SIM_WIDTH - CAR_WIDTH)
-        
-        self.rect = pygame.Rect(self.start_pos_x, self.original_y, CAR_WIDTH, CAR_HEIGHT)
-        self.state = 'IDLE'
+        self.esperado = None  # Estado que espera carro_lifecycle y futuro que se completa al alcanzarlo
+        self.aviso = None
+        self.indice = flota.agregar(self, escena.posicion_inicial(direction), carril_y(direction), speed, direction)
+
+    @property
+    def direction(self):
+        return 'NORTH' if flota.sentido[self.indice] > 0 else 'SOUTH'
+
+    @property
+    def state(self):
+        return ESTADOS[flota.estado[self.indice]]
+
+    @state.setter
+    def state(self, valor):
+        with flota.lock:
+            flota.estado[self.indice] = CODIGO_ESTADO[valor]
+
+    @property
+    def speed(self):
+        return float(flota.velocidad[self.indice])
+
+    @speed.setter
+    def speed(self, valor):
+        with flota.lock:
+            flota.velocidad[self.indice] = valor
+
+    @property
+    def original_speed(self):
+        return float(flota.velocidad_original[self.indice])
+
+    @original_speed.setter
+    def original_speed(self, valor):
+        with flota.lock:
+            flota.velocidad_original[self.indice] = valor
+
+    @property
+    def start_pos_x(self):
+        return escena.posicion_inicial(self.direction)
+
+    @property
+    def original_y(self):
+        return carril_y(self.direction)
+
+    def esperar_estado(self, estado):
+        """Futuro que se completa cuando la simulación lleve al carro a `estado`; se llama desde bucle_carros."""
+        self.aviso = bucle_carros.create_future()
+        self.esperado = CODIGO_ESTADO[estado]
+        return self.aviso
+
+    def colocar(self, x, y):
+        with flota.lock:
+            flota.x[self.indice], flota.y[self.indice] = x, y
 
     def reset_position_and_direction(self):
         """Resetea la posición y dirección del carro después de cruzar el puente."""
-        self.direction = 'SOUTH' if self.direction == 'NORTH' else 'NORTH'
-        self.original_y = (BRIDGE_Y_CENTER - BRIDGE_HEIGHT / 4 - CAR_HEIGHT) if self.direction == 'NORTH' else (BRIDGE_Y_CENTER + BRIDGE_HEIGHT / 4)
-        self.start_pos_x = -CAR_WIDTH if self.direction == 'NORTH' else SIM_WIDTH
-        self.rect.x, self.rect.y = self.start_pos_x, self.original_y
-
-    def update(self, all_cars):
-        """Actualiza la posición y estado del carro según su lógica de movimiento."""
-        self.speed = self.original_speed
-        # --- Lógica de la cola de espera ---
-        if self.state in ['DRIVING_TO_BRIDGE', 'WAITING']:
-            front_car = None
-            min_dist = float('inf')
-            for other in all_cars:
-                if other.id != self.id and other.direction == self.direction and other.state in ['WAITING', 'DRIVING_TO_BRIDGE']:
-                    if self.direction == 'NORTH' and self.rect.x < other.rect.x:
-                        dist = other.rect.x - self.rect.x
-                        if dist < min_dist: min_dist, front_car = dist, other
-                    elif self.direction == 'SOUTH' and self.rect.x > other.rect.x:
-                        dist = self.rect.x - other.rect.x
-                        if dist < min_dist: min_dist, front_car = dist, other
-            
-            if self.direction == 'NORTH':
-                target_x = (front_car.rect.left - QUEUE_GAP - CAR_WIDTH) if front_car else (BRIDGE_START_X - 20 - CAR_WIDTH)
-                if self.rect.x < target_x:
-                    self.rect.x += self.speed
-                    # Limitar para no pasar el borde de simulación
-                    if self.rect.right > SIM_WIDTH:
-                        self.rect.x = SIM_WIDTH - CAR_WIDTH
-                else:
-                    self.rect.x, self.state = target_x, 'WAITING'
-            else: 
-                target_x = (front_car.rect.right + QUEUE_GAP) if front_car else (BRIDGE_END_X + 20)
-                if self.rect.x > target_x:
-                    self.rect.x -= self.speed
-                    if self.rect.x < 0:
-                        self.rect.x = 0
-                else:
-                    self.rect.x, self.state = target_x, 'WAITING'
-        
-        # --- Lógica de cruce en el puente ---
-        elif self.state == 'CROSSING':
-            self.rect.y = BRIDGE_Y_CENTER - CAR_HEIGHT / 2
-            for other in all_cars:
-                if other.id != self.id and other.direction == self.direction and other.state == 'CROSSING':
-                    if self.direction == 'NORTH' and other.rect.x > self.rect.x and other.rect.x - self.rect.right < SAFE_DISTANCE_ON_BRIDGE:
-                        self.speed = 0; break
-                    elif self.direction == 'SOUTH' and other.rect.x < self.rect.x and self.rect.left - other.rect.right < SAFE_DISTANCE_ON_BRIDGE:
-                        self.speed = 0; break
-            
-            if self.direction == 'NORTH':
-                if self.rect.x < BRIDGE_END_X: self.rect.x += self.speed
-                else: self.state = 'RETURNING'
-            else:
-                if self.rect.right > BRIDGE_START_X: self.rect.x -= self.speed
-                else: self.state = 'RETURNING'
-        
-        # --- Lógica de salida de la simulación ---
-        elif self.state == 'RETURNING':
-            self.rect.y = self.original_y
-            if self.direction == 'NORTH':
-                # Se elimina "+ CAR_WIDTH" para que el carro desaparezca justo en el borde.
-                if self.rect.x < SIM_WIDTH: 
-                    self.rect.x += self.speed
-                else: 
-                    self.state = 'IDLE'
-            else: # SOUTH
-                # 
-                if self.rect.right > -CAR_WIDTH: 
-                    self.rect.x -= self.speed
-                else: 
-                    self.state = 'IDLE'
-
-    def draw(self, screen, font):
-        """Dibuja el carro en la pantalla."""
-        pygame.draw.rect(screen, self.color, self.rect)
-        id_render = font.render(str(self.id), True, BLACK)
-        screen.blit(id_render, (self.rect.centerx - id_render.get_width() / 2, self.rect.centery - id_render.get_height() / 2))
+        with flota.lock:
+            flota.sentido[self.indice] = -flota.sentido[self.indice]
+        self.colocar(self.start_pos_x, self.original_y)
+
+    def draw(self, screen, font, rect, frenando, sentido):
+        """Dibuja el carro en la pantalla en la posición interpolada `rect`."""
+        pygame.draw.rect(screen, self.color, rect)
+        id_render = render_texto(font, str(self.id), BLACK)
+        sucio = rect.union(screen.blit(id_render, (rect.centerx - id_render.get_width() / 2, rect.centery - id_render.get_height() / 2)))
         
         # Dibujar luces de freno
-        if self.speed == 0 and self.state in ['WAITING', 'CROSSING']:
-            if self.direction == 'NORTH': # Yendo a la derecha
-                brake_rect = pygame.Rect(self.rect.left - 3, self.rect.centery - 2, 3, 4)
+        if frenando:
+            if sentido > 0: # Yendo a la derecha
+                brake_rect = pygame.Rect(rect.left - 3, rect.centery - 2, 3, 4)
             else: # Yendo a la izquierda
-                brake_rect = pygame.Rect(self.rect.right, self.rect.centery - 2, 3, 4)
-            pygame.draw.rect(screen, RED_LIGHT, brake_rect)
+                brake_rect = pygame.Rect(rect.right, rect.centery - 2, 3, 4)
+            sucio.union_ip(pygame.draw.rect(screen, RED_LIGHT, brake_rect))
+        return sucio  # Zona de pantalla modificada, para borrarla en el siguiente cuadro
 
-def carro_lifecycle(carro: Carro):
-    """Ciclo de vida y lógica de red para un carro."""
+async def obtener_conexion_carros():
+    """Conexión compartida por todos los carros; se abre con el primero y se reabre si el servidor la cerró."""
+    global conexion_carros
     HOST, PORT = '127.0.0.1', 65432
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+    async with apertura_conexion:
+        if conexion_carros is None or conexion_carros.cerrada:
+            conexion_carros = await sesiones.ConexionCompartida.abrir(HOST, PORT, codec_servidor)
+        return conexion_carros
+
+async def pedir_paso(carro):
+    """REQUEST_CROSS y espera del permiso. Si el servidor se cae, reconecta y vuelve a pedir:
+    con --diario el servidor recuerda su puesto en la cola (o su permiso) y el carro lo recupera."""
+    for intento in range(REINTENTOS_CONEXION):
+        try:
+            conexion = await obtener_conexion_carros()
+            return await conexion.solicitar(carro.id, carro.direction, puente_servidor)
+        except (ConnectionError, OSError):
+            if intento + 1 == REINTENTOS_CONEXION: raise
+            await asyncio.sleep(ESPERA_RECONEXION)
+
+async def soltar_puente(carro, lease_id):
+    """RELEASE_BRIDGE por la conexión compartida, reabriéndola si el servidor la cerró."""
+    for intento in range(REINTENTOS_CONEXION):
         try:
-            s.connect((HOST, PORT))
-        except ConnectionRefusedError:
-            carro.state = 'ERROR'; return
+            (await obtener_conexion_carros()).liberar(carro.id, lease_id, puente_servidor)
+            return
+        except (ConnectionError, OSError):
+            if intento + 1 == REINTENTOS_CONEXION: raise
+            await asyncio.sleep(ESPERA_RECONEXION)
+
+async def carro_lifecycle(carro: Carro):
+    """Ciclo de vida y lógica de red para un carro, como corrutina en bucle_carros.
+
+    Los descansos son temporizadores del bucle y los cambios de estado llegan como avisos
+    de la simulación, así que REQUEST_CROSS y RELEASE_BRIDGE salen en el mismo paso en que
+    el carro llega a la cola o sale del puente. Todos los carros comparten una conexión.
+    """
+    try:
         while True:
             carro.state = 'IDLE'
-            carro.rect.x, carro.rect.y = carro.start_pos_x, carro.original_y
+            carro.colocar(carro.start_pos_x, carro.original_y)
             carro.speed = carro.original_speed
-            time.sleep(carro.delay_time)
+            await asyncio.sleep(carro.delay_time)
 
+            llegada = carro.esperar_estado('WAITING')
             carro.state = 'DRIVING_TO_BRIDGE'
-            while carro.state == 'DRIVING_TO_BRIDGE': time.sleep(0.1)
+            await llegada
 
-            carro.state = 'WAITING'
-            s.sendall(f"REQUEST_CROSS {carro.direction} {carro.id}\n".encode('utf-8'))
-            while True:
-                try:
-                    data = s.recv(1024).decode('utf-8')
-                    if not data: carro.state = 'ERROR'; return
-                    if 'GRANT_CROSS' in data: break
-                except (ConnectionAbortedError, ConnectionResetError):
-                    carro.state = 'ERROR'; return
+            lease_id = await pedir_paso(carro)
 
+            salida = carro.esperar_estado('RETURNING')
             carro.state = 'CROSSING'
-            while carro.state == 'CROSSING': time.sleep(0.1)
+            await salida
 
-            s.sendall("RELEASE_BRIDGE\n".encode('utf-8'))
-            while carro.state == 'RETURNING': time.sleep(0.1)
+            # El aviso de regreso se pide antes de liberar: si soltar_puente tiene que reconectar,
+            # el carro puede terminar de regresar mientras tanto y su aviso se perdería
+            regreso = carro.esperar_estado('IDLE')
+            await soltar_puente(carro, lease_id)
+            try:
+                await asyncio.wait_for(regreso, ESPERA_MAX_REGRESO)
+            except asyncio.TimeoutError:
+                pass  # Sin aviso, el carro se recoloca igualmente en lugar de quedarse parado para siempre
             carro.reset_position_and_direction()
+    except (ConnectionError, OSError, sesiones.SolicitudRechazada):
+        carro.state = 'ERROR'
 
-def listen_for_server_updates():
+def listen_for_server_updates(codec=protocolo.TEXTO, puente=0):
     """Hilo dedicado a escuchar al servidor y actualizar el estado global."""
-    global current_server_status, event_log
+    global current_server_status, event_log, event_log_seq
     HOST, PORT = '127.0.0.1', 65432
     while True:
         try:
             client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             client_socket.connect((HOST, PORT))
-            buffer = ""
+            client_socket.sendall(protocolo.saludo("OBSERVER", codec))
+            lector = protocolo.TEXTO  # Hasta el WELCOME el servidor habla en texto
+            if puente and codec is protocolo.TEXTO:
+                client_socket.sendall(lector.suscripcion([puente]))
+            buffer = bytearray()
+            seq = None  # Versión del estado local; None mientras se espera un keyframe
             while True:
-                data = client_socket.recv(4096).decode('utf-8')
+                data = client_socket.recv(65536)
                 if not data: break
                 buffer += data
-                while '\n' in buffer:
-                    line, buffer = buffer.split('\n', 1)
-                    parts = line.strip().split(' ', 1)
-                    if parts[0] == "STATUS_UPDATE" and len(parts) > 1:
-                        try:
-                            status_data = json.loads(parts[1])
-                            with status_lock:
-                                current_server_status = status_data
-                                if 'log' in status_data:
-                                    event_log.clear()
-                                    event_log.extend(status_data['log'])
-                        except json.JSONDecodeError:
-                            print("Error decodificando JSON del servidor")
+                pos = 0
+                while True:
+                    try:
+                        mensaje, pos = lector.extraer_respuesta(buffer, pos)
+                    except json.JSONDecodeError:
+                        print("Error decodificando JSON del servidor")
+                        pos = buffer.find(b"\n", pos) + 1
+                        continue
+                    if mensaje is None: break
+                    if mensaje[0] in ("STATUS_UPDATE", "STATUS_DELTA") and mensaje[1].get('bridge', 0) != puente:
+                        continue  # Keyframe del puente 0 que el servidor manda antes de atender SUBSCRIBE
+                    if mensaje[0] == "WELCOME":
+                        lector = protocolo.CODECS.get(mensaje[1].strip(), protocolo.TEXTO)
+                        if puente:
+                            client_socket.sendall(lector.suscripcion([puente]))
+                    elif mensaje[0] == "STATUS_UPDATE":
+                        status_data = mensaje[1]
+                        seq = status_data.get('seq')
+                        with status_lock:
+                            current_server_status = status_data
+                            if 'log' in status_data:
+                                event_log.clear()
+                                event_log.extend(status_data['log'])
+                                event_log_seq += event_log.maxlen + 1
+                    elif mensaje[0] == "STATUS_DELTA":
+                        delta = mensaje[1]
+                        if seq is None: continue  # Ya se pidió un keyframe
+                        if delta['base'] != seq:
+                            # Hueco en la secuencia: pedir el estado completo
+                            seq = None
+                            client_socket.sendall(lector.resync(puente))
+                            continue
+                        seq = delta['seq']
+                        with status_lock:
+                            # Con el seq del delta, que la clave del panel lo vea cambiar aunque solo cambien campos
+                            current_server_status = {**current_server_status, **delta['changes'], 'seq': seq}
+                            event_log.extend(delta['log'])
+                            event_log_seq += len(delta['log'])
+                del buffer[:pos]
         except Exception as e:
             print(f"Error de conexión con el servidor: {e}. Reintentando en 5s...")
             with status_lock:
@@ -256,7 +369,7 @@ def abrir_formulario_agregar_carro(lista_carros, lock):
             )
             with lock:
                 lista_carros.append(nuevo_carro)
-            thread = threading.Thread(target=carro_lifecycle, args=(nuevo_carro,), daemon=True); thread.start()
+            iniciar_carro(nuevo_carro)
             app.destroy()
         except Exception as e:
             error_label.configure(text=f"Error inesperado: {e}")
@@ -336,8 +449,22 @@ def abrir_formulario_modificar_carro(lista_carros, lock):
     mostrar_lista_ids()
     app.mainloop()
 
+# --- Fondo estático en caché ---
+_fondo = None
+_clave_fondo = None
+
+def obtener_fondo(tamano, tema=None):
+    """Fondo de la escena ya dibujado; solo se vuelve a dibujar si cambia el tamaño de la ventana o el tema."""
+    global _fondo, _clave_fondo
+    clave = (tuple(tamano), tema)
+    if _fondo is None or clave != _clave_fondo:
+        _fondo = pygame.Surface(tamano).convert()
+        draw_scenery(_fondo)
+        _clave_fondo = clave
+    return _fondo
+
 def draw_scenery(screen):
-    """Dibuja el fondo, río, líneas de carril y árboles."""
+    """Dibuja el fondo, río, líneas de carril y árboles (se llama solo al construir el fondo en caché)."""
     screen.fill(GRASS_COLOR)
     # Río
     pygame.draw.rect(screen, RIVER_COLOR, (BRIDGE_START_X, 0, BRIDGE_END_X - BRIDGE_START_X, SCREEN_HEIGHT))
@@ -362,14 +489,37 @@ def draw_scenery(screen):
     screen.blit(south_text, (800, BRIDGE_Y_CENTER + BRIDGE_HEIGHT - 20))  # SOUTH abajo del puente
 
 def draw_traffic_lights(screen, status):
-    """Dibuja los semáforos en los extremos del puente."""
+    """Dibuja los semáforos en los extremos del puente y devuelve las zonas que ocupan."""
     light_status = status.get('traffic_light', 'NONE')
     # Semáforo Norte (izquierda)
     north_light_color = GREEN_LIGHT if light_status == 'NORTH' else RED_LIGHT
-    pygame.draw.circle(screen, north_light_color, (BRIDGE_START_X - 25, BRIDGE_Y_CENTER - 20), 10)
+    norte = pygame.draw.circle(screen, north_light_color, (BRIDGE_START_X - 25, BRIDGE_Y_CENTER - 20), 10)
     # Semáforo Sur (derecha)
     south_light_color = GREEN_LIGHT if light_status == 'SOUTH' else RED_LIGHT
-    pygame.draw.circle(screen, south_light_color, (BRIDGE_END_X + 25, BRIDGE_Y_CENTER + 20), 10)
+    sur = pygame.draw.circle(screen, south_light_color, (BRIDGE_END_X + 25, BRIDGE_Y_CENTER + 20), 10)
+    return [norte, sur]
+
+# --- Caché de textos renderizados ---
+@functools.lru_cache(maxsize=4096)
+def render_texto(font, texto, color):
+    """Superficie del texto, reutilizada mientras el mismo (texto, fuente, color) siga en el LRU."""
+    return font.render(texto, True, color)
+
+@functools.lru_cache(maxsize=1024)
+def ajustar_texto(font, texto, ancho_maximo):
+    """Parte el texto en líneas que caben en ancho_maximo; mide con font.size en lugar de renderizar cada prueba."""
+    lineas = []
+    linea = ""
+    for palabra in texto.split(' '):
+        prueba = linea + (" " if linea else "") + palabra
+        if font.size(prueba)[0] > ancho_maximo and linea:
+            lineas.append(linea)
+            linea = palabra
+        else:
+            linea = prueba
+    if linea:
+        lineas.append(linea)
+    return tuple(lineas)
 
 def draw_stats_panel(screen, status, log, fonts):
     """Dibuja el panel de estadísticas en el lado derecho con log responsivo."""
@@ -378,23 +528,23 @@ def draw_stats_panel(screen, status, log, fonts):
     
     y_pos = 20
     # Título
-    title = fonts['title'].render("Panel de Control", True, WHITE)
+    title = render_texto(fonts['title'], "Panel de Control", WHITE)
     screen.blit(title, (SIM_WIDTH + (PANEL_WIDTH - title.get_width()) / 2, y_pos)); y_pos += 40
     
     # Estado del Puente
     status_text = status.get('bridge_status', 'DESCONOCIDO')
     status_color = (100, 255, 100) if status_text == 'LIBRE' else (255, 150, 50)
-    text_surf = fonts['large'].render(f"Puente: {status_text}", True, status_color)
+    text_surf = render_texto(fonts['large'], f"Puente: {status_text}", status_color)
     screen.blit(text_surf, (SIM_WIDTH + 20, y_pos)); y_pos += 35
     
     # Dirección
     direction_text = status.get('current_direction') or "N/A"
-    text_surf = fonts['medium'].render(f"Dirección: {direction_text}", True, WHITE)
+    text_surf = render_texto(fonts['medium'], f"Dirección: {direction_text}", WHITE)
     screen.blit(text_surf, (SIM_WIDTH + 20, y_pos)); y_pos += 45
     
     # Cola Norte
     waiting_n = status.get('waiting_north', 0)
-    text_surf = fonts['medium'].render(f"Esperando en Norte: {waiting_n}", True, WHITE)
+    text_surf = render_texto(fonts['medium'], f"Esperando en Norte: {waiting_n}", WHITE)
     screen.blit(text_surf, (SIM_WIDTH + 20, y_pos)); y_pos += 25
     pygame.draw.rect(screen, PROGRESS_BAR_BG, (SIM_WIDTH + 20, y_pos, PANEL_WIDTH - 40, 10))
     if waiting_n > 0: pygame.draw.rect(screen, PROGRESS_BAR_FG, (SIM_WIDTH + 20, y_pos, min(PANEL_WIDTH-40, waiting_n * 20), 10))
@@ -402,44 +552,80 @@ def draw_stats_panel(screen, status, log, fonts):
 
     # Cola Sur
     waiting_s = status.get('waiting_south', 0)
-    text_surf = fonts['medium'].render(f"Esperando en Sur: {waiting_s}", True, WHITE)
+    text_surf = render_texto(fonts['medium'], f"Esperando en Sur: {waiting_s}", WHITE)
     screen.blit(text_surf, (SIM_WIDTH + 20, y_pos)); y_pos += 25
     pygame.draw.rect(screen, PROGRESS_BAR_BG, (SIM_WIDTH + 20, y_pos, PANEL_WIDTH - 40, 10))
     if waiting_s > 0: pygame.draw.rect(screen, PROGRESS_BAR_FG, (SIM_WIDTH + 20, y_pos, min(PANEL_WIDTH-40, waiting_s * 20), 10))
     y_pos += 45
     
     # Log de Eventos responsivo
-    log_title = fonts['large'].render("Registro de Eventos", True, WHITE)
+    log_title = render_texto(fonts['large'], "Registro de Eventos", WHITE)
     screen.blit(log_title, (SIM_WIDTH + 20, y_pos)); y_pos += 30
 
     max_log_width = PANEL_WIDTH - 40
     for entry in log:
-        # Wrap manual usando el ancho máximo y el font
-        wrapped_lines = []
-        words = entry.split(' ')
-        line = ""
-        for word in words:
-            test_line = line + (" " if line else "") + word
-            test_surf = fonts['small'].render(test_line, True, GRAY)
-            if test_surf.get_width() > max_log_width and line:
-                wrapped_lines.append(line)
-                line = word
-            else:
-                line = test_line
-        if line:
-            wrapped_lines.append(line)
-        for wline in wrapped_lines:
-            log_surf = fonts['small'].render(wline, True, GRAY)
+        # Cada entrada se ajusta una sola vez; las siguientes veces sale de la caché
+        for wline in ajustar_texto(fonts['small'], entry, max_log_width):
+            log_surf = render_texto(fonts['small'], wline, GRAY)
             screen.blit(log_surf, (SIM_WIDTH + 20, y_pos))
             y_pos += 20
 
 
+def draw_reproduccion(screen, fondo, font, reproductor, instante, velocidad, pausado):
+    """Barra de progreso de la reproducción con la hora grabada y la velocidad; devuelve la zona que ocupa."""
+    zona = pygame.Rect(BARRA_REPRODUCCION.x, BARRA_REPRODUCCION.y - 22, BARRA_REPRODUCCION.width, BARRA_REPRODUCCION.height + 22)
+    screen.blit(fondo, zona, zona)
+    pygame.draw.rect(screen, PROGRESS_BAR_BG, BARRA_REPRODUCCION)
+    avance = (instante - reproductor.inicio) / reproductor.duracion if reproductor.duracion > 0 else 1.0
+    lleno = BARRA_REPRODUCCION.copy()
+    lleno.width = int(BARRA_REPRODUCCION.width * min(max(avance, 0.0), 1.0))
+    pygame.draw.rect(screen, PROGRESS_BAR_FG, lleno)
+    texto = (f"{'Pausa' if pausado else 'Reproduciendo'} x{velocidad:g}  "
+             f"{time.strftime('%H:%M:%S', time.localtime(instante))}  "
+             f"({instante - reproductor.inicio:.1f} / {reproductor.duracion:.1f} s)")
+    screen.blit(render_texto(font, texto, WHITE), (zona.x, zona.y))
+    return zona
+
+def abrir_canal_estado(nombre):
+    """Se adjunta al estado en memoria compartida del servidor; None si no está disponible (se usa TCP)."""
+    try:
+        return estado_compartido.LectorEstado(nombre)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Memoria compartida '{nombre}' no disponible ({e}); se usa el canal TCP.")
+        return None
+
 def main():
     """Función principal para iniciar la interfaz gráfica y la simulación."""
+    parser = argparse.ArgumentParser(description="Visualizador del puente de una vía.")
+    parser.add_argument("--memoria-compartida", default=None, metavar="NOMBRE",
+                        help="Lee el estado del bloque de memoria compartida que publica servidor.py en la misma máquina.")
+    parser.add_argument("--protocolo", choices=sorted(protocolo.CODECS), default=protocolo.BINARIO.nombre,
+                        help="Codificación que se negocia con el servidor (TEXTO para depurar).")
+    parser.add_argument("--puente", type=int, default=0, metavar="ID",
+                        help="Puente de un servidor con --puentes que usan los carros y muestra el panel.")
+    parser.add_argument("--grabar", default=None, metavar="RUTA",
+                        help="Graba los estados que muestra el panel en RUTA (grabacion.py).")
+    parser.add_argument("--reproducir", default=None, metavar="RUTA",
+                        help="Reproduce una grabación sin conectarse al servidor. Espacio pausa, flechas: cuadro a cuadro "
+                             "(con Mayús, saltos de 10 s), arriba/abajo: velocidad; un clic en la barra salta a ese instante.")
+    parser.add_argument("--velocidad", type=float, default=1.0, help="Velocidad inicial de la reproducción.")
+    args = parser.parse_args()
+    reproductor = None
+    if args.reproducir:
+        try:
+            reproductor = grabacion.Reproductor(args.reproducir)
+        except (OSError, ValueError) as e:
+            parser.error(f"No se pudo abrir la grabación: {e}")
+    global codec_servidor, puente_servidor
+    codec_servidor = protocolo.CODECS[args.protocolo]
+    puente_servidor = args.puente
+    if args.puente and args.memoria_compartida:
+        parser.error("--memoria-compartida solo publica el puente 0")
+
     pygame.init()
     ctk.set_appearance_mode("system")
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-    pygame.display.set_caption("Simulador del Puente de Una Vía")
+    pygame.display.set_caption("Simulador del Puente de Una Vía" + (" - Reproducción" if reproductor else ""))
     clock = pygame.time.Clock()
     fonts = {
         'car_id': pygame.font.SysFont("Arial", 10, bold=True),
@@ -469,15 +655,27 @@ def main():
         start_icon_img = None
         stop_icon_img = None
 
-    # Iniciar hilo para escuchar al servidor
-    network_thread = threading.Thread(target=listen_for_server_updates, daemon=True); network_thread.start()
+    # Iniciar el bucle de los carros y el hilo de simulación a paso fijo
+    iniciar_bucle_carros()
+    detener_simulacion = threading.Event()
+    threading.Thread(target=simular_flota, args=(flota, detener_simulacion), daemon=True).start()
+
+    # Leer el estado de la memoria compartida o, si no hay, iniciar hilo para escuchar al servidor
+    canal_estado = abrir_canal_estado(args.memoria_compartida) if args.memoria_compartida and not reproductor else None
+    if canal_estado is None and reproductor is None:
+        network_thread = threading.Thread(target=listen_for_server_updates, args=(codec_servidor, puente_servidor), daemon=True); network_thread.start()
+    grabador = grabacion.Grabador(args.grabar) if args.grabar and not reproductor else None
+    # Reproducción: instante de la grabación que se muestra, y el reloj real del cuadro anterior
+    instante_reproduccion = reproductor.inicio if reproductor else None
+    velocidad, pausado = args.velocidad, False
+    reloj_anterior = time.perf_counter()
 
     carros = []
-    num_carros = random.randint(1, 7) # Número aleatorio de carros entre 1 y 7
+    num_carros = random.randint(1, 7) if reproductor is None else 0 # Número aleatorio de carros entre 1 y 7
     for i in range(num_carros):
         carro = Carro(i + 1, random.choice(["NORTH", "SOUTH"]), random.uniform(2, 4), random.uniform(4, 10))
         carros.append(carro)
-        thread = threading.Thread(target=carro_lifecycle, args=(carro,), daemon=True); thread.start()
+        iniciar_carro(carro)
 
     add_button_rect = pygame.Rect(SIM_WIDTH - 160, 10, 150, 40)
     modify_button_rect = pygame.Rect(SIM_WIDTH - 160, 60, 150, 40)
@@ -492,6 +690,12 @@ def main():
     MODIFY_BTN_COLOR = BUTTON_COLOR
     MODIFY_BTN_HOVER = (130, 180, 255)
 
+    # --- Repintado por zonas: el fondo se copia una vez y luego solo se actualiza lo que cambia ---
+    fondo = None
+    rects_carros = []      # Zonas donde se dibujaron carros en el cuadro anterior
+    panel_dibujado = None  # (seq, error, log) que muestra el panel ahora mismo
+    panel_rect = pygame.Rect(SIM_WIDTH, 0, PANEL_WIDTH, SCREEN_HEIGHT)
+
     running = True
     while running:
         mouse_pos = pygame.mouse.get_pos()
@@ -510,11 +714,37 @@ def main():
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT: running = False
+            if event.type == pygame.WINDOWEXPOSED:
+                fondo = None  # La ventana volvió a mostrarse: repintarla entera en este cuadro
+            if reproductor is not None and event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    if pausado and instante_reproduccion >= reproductor.fin:
+                        instante_reproduccion = reproductor.inicio  # Al final, espacio vuelve a empezar
+                    pausado = not pausado
+                elif event.key in (pygame.K_RIGHT, pygame.K_LEFT):
+                    if event.mod & pygame.KMOD_SHIFT:
+                        salto = SALTO_REPRODUCCION if event.key == pygame.K_RIGHT else -SALTO_REPRODUCCION
+                        instante_reproduccion = min(max(instante_reproduccion + salto, reproductor.inicio), reproductor.fin)
+                    else:
+                        pausado = True
+                        if event.key == pygame.K_RIGHT:
+                            reproductor.siguiente()
+                        else:
+                            reproductor.anterior()
+                        instante_reproduccion = reproductor.instante
+                elif event.key == pygame.K_UP:
+                    velocidad = min(velocidad * 2, 1024)
+                elif event.key == pygame.K_DOWN:
+                    velocidad = max(velocidad / 2, 1 / 16)
+            if reproductor is not None and event.type == pygame.MOUSEBUTTONDOWN:
+                if BARRA_REPRODUCCION.collidepoint(event.pos):
+                    fraccion = (event.pos[0] - BARRA_REPRODUCCION.x) / BARRA_REPRODUCCION.width
+                    instante_reproduccion = reproductor.inicio + fraccion * reproductor.duracion
             if event.type == pygame.MOUSEBUTTONDOWN:
-                if add_button_rect.collidepoint(event.pos):
+                if reproductor is None and add_button_rect.collidepoint(event.pos):
                     form_thread = threading.Thread(target=abrir_formulario_agregar_carro, args=(carros, carros_lock), daemon=True)
                     form_thread.start()
-                if modify_button_rect.collidepoint(event.pos):
+                if reproductor is None and modify_button_rect.collidepoint(event.pos):
                     form_thread = threading.Thread(target=abrir_formulario_modificar_carro, args=(carros, carros_lock), daemon=True)
                     form_thread.start()
                 # Solo permite click si el botón está habilitado
@@ -529,25 +759,58 @@ def main():
                     music_playing = False
 
         # --- Lógica de Dibujo ---
-        draw_scenery(screen)
+        nuevo_fondo = obtener_fondo(screen.get_size(), ctk.get_appearance_mode())
+        if nuevo_fondo is not fondo:
+            # Fondo nuevo (primer cuadro, cambio de tamaño o de tema): repintar la pantalla completa
+            fondo = nuevo_fondo
+            screen.blit(fondo, (0, 0))
+            panel_dibujado = None
+            sucios = [screen.get_rect()]
+        else:
+            sucios = []
+        # Borrar los carros del cuadro anterior restaurando el fondo bajo ellos
+        for rect in rects_carros:
+            screen.blit(fondo, rect, rect)
+        sucios.extend(rects_carros)
         
-        # Obtener una copia segura del estado para dibujar
-        with status_lock:
-            status_copy = current_server_status.copy()
-            log_copy = list(event_log)
+        # Obtener una copia segura del estado para dibujar (la memoria compartida ya da una instantánea consistente)
+        if reproductor is not None:
+            ahora = time.perf_counter()
+            if not pausado:
+                instante_reproduccion = min(instante_reproduccion + (ahora - reloj_anterior) * velocidad, reproductor.fin)
+                pausado = instante_reproduccion >= reproductor.fin
+            reloj_anterior = ahora
+            status_copy, log_copy = reproductor.avanzar_hasta(instante_reproduccion)
+            sucios.append(draw_reproduccion(screen, fondo, fonts['medium'], reproductor, instante_reproduccion, velocidad, pausado))
+        elif canal_estado is not None:
+            status_copy, log_copy = canal_estado.leer()
+            log_seq = None
+        else:
+            with status_lock:
+                status_copy = current_server_status.copy()
+                log_copy = list(event_log)
+                log_seq = event_log_seq
         
-        draw_traffic_lights(screen, status_copy)
-        draw_stats_panel(screen, status_copy, log_copy, fonts)
+        sucios.extend(draw_traffic_lights(screen, status_copy))
+        # El panel solo se vuelve a componer si cambió la secuencia del estado o el contenido del log
+        clave_panel = (status_copy.get('seq'), status_copy.get('error'), log_copy)
+        if clave_panel != panel_dibujado:
+            draw_stats_panel(screen, status_copy, log_copy, fonts)
+            panel_dibujado = clave_panel
+            sucios.append(panel_rect)
+            if grabador is not None and status_copy:
+                grabador.anotar({k: v for k, v in status_copy.items() if k != 'log'}, log_copy, log_seq=log_seq)
 
         #Botón "Agregar" con hover
+        sucios.extend([add_button_rect, modify_button_rect, music_start_btn_rect, music_stop_btn_rect])
         pygame.draw.rect(screen, ADD_BTN_HOVER if mouse_over_add else ADD_BTN_COLOR, add_button_rect)
-        add_text = fonts['button'].render("Agregar Carro", True, BUTTON_TEXT_COLOR)
+        add_text = render_texto(fonts['button'], "Agregar Carro", BUTTON_TEXT_COLOR)
         screen.blit(add_text, (add_button_rect.x + (add_button_rect.width - add_text.get_width()) / 2, 
                                add_button_rect.y + (add_button_rect.height - add_text.get_height()) / 2))
 
         # Botón "Modificar" con hover
         pygame.draw.rect(screen, MODIFY_BTN_HOVER if mouse_over_modify else MODIFY_BTN_COLOR, modify_button_rect)
-        modify_text = fonts['button'].render("Modificar", True, BUTTON_TEXT_COLOR)
+        modify_text = render_texto(fonts['button'], "Modificar", BUTTON_TEXT_COLOR)
         screen.blit(modify_text, (modify_button_rect.x + (modify_button_rect.width - modify_text.get_width()) / 2,
                                   modify_button_rect.y + (modify_button_rect.height - modify_text.get_height()) / 2))
 
@@ -561,7 +824,9 @@ def main():
             start_btn_alpha = 255
             stop_btn_alpha = 120  # Deshabilitado
 
-        # Crear superficies con alpha para simular deshabilitado
+        # Crear superficies con alpha para simular deshabilitado (sobre el fondo limpio, para no acumular transparencias)
+        screen.blit(fondo, music_start_btn_rect, music_start_btn_rect)
+        screen.blit(fondo, music_stop_btn_rect, music_stop_btn_rect)
         start_btn_surface = pygame.Surface((music_start_btn_rect.width, music_start_btn_rect.height), pygame.SRCALPHA)
         stop_btn_surface = pygame.Surface((music_stop_btn_rect.width, music_stop_btn_rect.height), pygame.SRCALPHA)
         start_btn_surface.fill((*start_btn_color, start_btn_alpha))
@@ -572,27 +837,39 @@ def main():
         if start_icon_img:
             screen.blit(start_icon_img, (music_start_btn_rect.x + 9, music_start_btn_rect.y + 4))
         else:
-            start_text = fonts['button'].render("Play", True, WHITE if not music_playing else GRAY)
+            start_text = render_texto(fonts['button'], "Play", WHITE if not music_playing else GRAY)
             screen.blit(start_text, (music_start_btn_rect.x + 5, music_start_btn_rect.y + 8))
         if stop_icon_img:
             screen.blit(stop_icon_img, (music_stop_btn_rect.x + 9, music_stop_btn_rect.y + 4))
         else:
-            stop_text = fonts['button'].render("Stop", True, WHITE if music_playing else GRAY)
+            stop_text = render_texto(fonts['button'], "Stop", WHITE if music_playing else GRAY)
             screen.blit(stop_text, (music_stop_btn_rect.x + 5, music_stop_btn_rect.y + 8))
 
-        with carros_lock:
-            for carro in list(carros):
-                # Evitar que los vehículos se dibujen sobre el panel lateral
-                if carro.rect.right <= SIM_WIDTH:
-                    carro.update(carros)
-                    carro.draw(screen, fonts['car_id'])
-                else:
-                    # Si el carro está fuera del área de simulación, no lo dibujes
-                    carro.update(carros)
-
-        pygame.display.flip()
+        # Carros: se leen las dos últimas instantáneas del hilo de simulación y se interpola entre ellas,
+        # con un retraso de un intervalo entre instantáneas (que puede abarcar varios pasos)
+        anterior, actual = flota.instantaneas
+        intervalo = actual.instante - anterior.instante if actual.instante > anterior.instante else PASO_SIMULACION
+        alfa = min(1.0, max(0.0, (time.perf_counter() - actual.instante) / intervalo))
+        xs, ys = interpolar(anterior, actual, alfa)
+        frenando = (actual.velocidad == 0) & ((actual.estado == WAITING) | (actual.estado == CROSSING))
+        # Solo se dibujan los carros dentro del área de simulación (no sobre el panel lateral)
+        rects_carros = []
+        for i in np.flatnonzero((xs + CAR_WIDTH <= SIM_WIDTH) & (xs + CAR_WIDTH > 0)):
+            rect = pygame.Rect(int(xs[i]), int(ys[i]), CAR_WIDTH, CAR_HEIGHT)
+            rects_carros.append(flota.carros[i].draw(screen, fonts['car_id'], rect, frenando[i], actual.sentido[i]))
+        sucios.extend(rects_carros)
+
+        pygame.display.update(sucios)
         clock.tick(FPS)
 
+    detener_simulacion.set()
+    detener_bucle_carros()
+    if canal_estado is not None:
+        canal_estado.cerrar()
+    if grabador is not None:
+        grabador.cerrar()
+    if reproductor is not None:
+        reproductor.cerrar()
     pygame.quit()
 
 if __name__ == "__main__":
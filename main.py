@@ -1,20 +1,36 @@
 import subprocess
 import time
 import sys
+import os
+import tempfile
+
+# --- Reinicio del servidor ---
+ESPERA_REINICIO_INICIAL = 1.0  # Segundos antes del primer reinicio; se duplica con cada fallo rápido seguido
+ESPERA_REINICIO_MAX = 30.0
+VIDA_MINIMA_SERVIDOR = 10.0    # Un servidor que termina antes de esto cuenta como fallo rápido
+MAX_FALLOS_RAPIDOS = 5         # Fallos rápidos seguidos tras los que se deja de reiniciar
 
 class SimulacionManager:
     def __init__(self):
         self.procesos = []
+        self.inicio_servidor = None
+        self.fallos_rapidos = 0  # Fallos rápidos seguidos del servidor
+        self.memoria_compartida = f"puente_{os.getpid()}"  # Canal de estado local entre servidor e interfaz
+        self.diario = os.path.join(tempfile.gettempdir(), f"puente_{os.getpid()}.diario")  # Estado que sobrevive a un reinicio del servidor
+
+    def iniciar_servidor(self):
+        self.inicio_servidor = time.monotonic()
+        return subprocess.Popen([sys.executable, "servidor.py", "--memoria-compartida", self.memoria_compartida,
+                                 "--diario", self.diario])
 
     def iniciar_procesos(self):
         """Inicia los procesos del servidor y del visualizador de la simulación."""
         print("Iniciando el servidor...")
-        servidor_proceso = subprocess.Popen([sys.executable, "servidor.py"])
-        self.procesos.append(servidor_proceso)
+        self.procesos.append(self.iniciar_servidor())
         time.sleep(2)  # Darle tiempo al servidor para que inicie
 
         print("Iniciando el Visualizador de la simulación...")
-        visualizador_proceso = subprocess.Popen([sys.executable, "interfaz.py"])
+        visualizador_proceso = subprocess.Popen([sys.executable, "interfaz.py", "--memoria-compartida", self.memoria_compartida])
         self.procesos.append(visualizador_proceso)
         print("\nSimulación en marcha. Cierra esta ventana para terminar todos los procesos.")
 
@@ -23,21 +39,54 @@ class SimulacionManager:
         print("\nTerminando la simulación...")
         for p in self.procesos:
             p.terminate()
+        for p in self.procesos:
+            p.wait()
+        if os.path.exists(self.diario):
+            os.remove(self.diario)
         print("Todos los procesos han sido terminados.")
 
     def close_window(self):
         """Cierra todos los procesos de la simulación (incluye la ventana de interfaz)."""
         self.terminar_procesos()
 
+    def espera_reinicio(self, ret):
+        """Segundos hasta reiniciar el servidor que terminó con código `ret`, o None si hay que rendirse.
+
+        Cada fallo rápido seguido duplica la espera; uno que llevaba en marcha un buen rato reinicia la cuenta.
+        """
+        if time.monotonic() - self.inicio_servidor < VIDA_MINIMA_SERVIDOR:
+            self.fallos_rapidos += 1
+        else:
+            self.fallos_rapidos = 1
+        if self.fallos_rapidos >= MAX_FALLOS_RAPIDOS:
+            print(f"[ERROR] El servidor falló {self.fallos_rapidos} veces seguidas al poco de arrancar "
+                  f"(último código {ret}); no se vuelve a reiniciar. Revisa su salida para ver la causa.")
+            return None
+        return min(ESPERA_REINICIO_MAX, ESPERA_REINICIO_INICIAL * 2 ** (self.fallos_rapidos - 1))
+
     def run(self):
         """Inicia la simulación y monitorea los procesos."""
         self.iniciar_procesos()
+        reinicio = None  # Instante en que se reinicia el servidor caído
+        avisados = set()  # PIDs cuyo final ya se notificó
         try:
             while True:
                 for i, p in enumerate(self.procesos):
                     ret = p.poll()
-                    if ret is not None:
-                        print(f"[AVISO] El proceso {i} (PID {p.pid}) terminó con código {ret}.")
+                    if ret is None or p.pid in avisados: continue
+                    avisados.add(p.pid)
+                    print(f"[AVISO] El proceso {i} (PID {p.pid}) terminó con código {ret}.")
+                    if i == 0:
+                        espera = self.espera_reinicio(ret)
+                        if espera is None:
+                            self.terminar_procesos()
+                            return
+                        print(f"[AVISO] Reiniciando el servidor en {espera:.0f} s...")
+                        reinicio = time.monotonic() + espera
+                if reinicio is not None and time.monotonic() >= reinicio:
+                    # El servidor recupera su estado del diario y los carros reconectan solos
+                    self.procesos[0] = self.iniciar_servidor()
+                    reinicio = None
                 time.sleep(1)
         except KeyboardInterrupt:
             self.terminar_procesos()
@@ -0,0 +1,224 @@
+import json
+import time
+
+# --- Políticas de planificación del puente ---
+# Cada política decide, a partir de una vista del estado del puente:
+#   - elegir_turno: qué dirección pasa y cuántos carros cuando el puente queda vacío.
+#   - admitir_inmediato: si un carro recién llegado puede seguir a los que ya cruzan en su dirección.
+#   - admitir_mas: cuántos carros en cola de la dirección actual entran al liberarse sitio.
+
+def opuesta(direccion):
+    return "NORTH" if direccion == "SOUTH" else "SOUTH"
+
+def _parametro(nombre, valor, tipo, minimo):
+    """Convierte un parámetro de política y comprueba que no baje de `minimo`.
+
+    Un k menor que 1 haría que cada turno no admitiera a nadie y el puente buscaría turno sin fin.
+    """
+    valor = tipo(valor)
+    if not valor >= minimo:
+        raise ValueError(f"{nombre} debe ser al menos {minimo} (recibido {valor})")
+    return valor
+
+class VistaPuente:
+    """Estado del puente que el servidor expone a la política."""
+    def __init__(self, direccion_actual, coches_en_puente, cola, cupo_libre, ahora=None):
+        self.direccion_actual = direccion_actual
+        self.coches_en_puente = coches_en_puente
+        self.cola = cola
+        self.cupo_libre = cupo_libre
+        self.ahora = time.monotonic() if ahora is None else ahora
+
+    def espera(self, direccion):
+        """Segundos que lleva esperando el primer carro de la cola, o None si está vacía."""
+        entrada = self.cola.primero(direccion)
+        return None if entrada is None else self.ahora - entrada.instante
+
+class Politica:
+    """Política base: lleva la cuenta del turno en curso (dirección, inicio y carros admitidos)."""
+    nombre = None
+
+    def __init__(self):
+        self.direccion_turno = None
+        self.inicio_turno = None
+        self.concedidos_turno = 0
+
+    def registrar_concesion(self, direccion, ahora):
+        if direccion != self.direccion_turno:
+            self.direccion_turno = direccion
+            self.inicio_turno = ahora
+            self.concedidos_turno = 0
+        self.concedidos_turno += 1
+
+    def reiniciar_turno(self):
+        """El puente quedó libre y sin colas: el próximo carro abre un turno nuevo."""
+        self.direccion_turno = None
+
+    def elegir_turno(self, vista):
+        raise NotImplementedError
+
+    def admitir_inmediato(self, vista, direccion):
+        return vista.cola.longitud(opuesta(direccion)) == 0
+
+    def admitir_mas(self, vista):
+        return 0
+
+    def describir(self):
+        return self.nombre
+
+class Alternancia(Politica):
+    """Alternancia estricta: un carro por turno, primero la dirección contraria a la actual."""
+    nombre = "alternancia"
+
+    def elegir_turno(self, vista):
+        primero = opuesta(vista.direccion_actual) if vista.direccion_actual else "NORTH"
+        for direccion in (primero, opuesta(primero)):
+            if vista.cola.longitud(direccion) > 0:
+                return direccion, 1
+        return None
+
+class Lote(Alternancia):
+    """Alterna la dirección, pero cada turno admite hasta k carros (incluidos los que llegan durante el turno)."""
+    nombre = "lote"
+
+    def __init__(self, k=4):
+        super().__init__()
+        self.k = _parametro("k", k, int, 1)
+
+    def elegir_turno(self, vista):
+        turno = super().elegir_turno(vista)
+        return None if turno is None else (turno[0], self.k)
+
+    def _restantes(self, direccion):
+        if direccion != self.direccion_turno:
+            return self.k
+        return self.k - self.concedidos_turno
+
+    def admitir_inmediato(self, vista, direccion):
+        if vista.cola.longitud(opuesta(direccion)) == 0:
+            return True
+        return self._restantes(direccion) > 0
+
+    def admitir_mas(self, vista):
+        return max(0, self._restantes(vista.direccion_actual))
+
+    def describir(self):
+        return f"{self.nombre}(k={self.k})"
+
+class Antiguedad(Politica):
+    """El carro que más tiempo lleva esperando pasa primero.
+
+    La dirección actual recibe una ventaja de `bono` segundos para no cambiar de sentido
+    en cada carro; como la espera del otro lado crece sin límite, acaba ganando (envejecimiento).
+    """
+    nombre = "antiguedad"
+
+    def __init__(self, bono=2.0, k=1):
+        super().__init__()
+        self.bono = _parametro("bono", bono, float, 0.0)
+        self.k = _parametro("k", k, int, 1)
+
+    def _prioridad(self, vista, direccion):
+        espera = vista.espera(direccion)
+        if espera is None:
+            return None
+        return espera + (self.bono if direccion == vista.direccion_actual else 0.0)
+
+    def elegir_turno(self, vista):
+        candidatas = [(p, d) for d in ("NORTH", "SOUTH") if (p := self._prioridad(vista, d)) is not None]
+        if not candidatas:
+            return None
+        return max(candidatas)[1], self.k
+
+    def admitir_inmediato(self, vista, direccion):
+        espera = vista.espera(opuesta(direccion))
+        return espera is None or espera < self.bono
+
+    def describir(self):
+        return f"{self.nombre}(bono={self.bono}, k={self.k})"
+
+class ColaMasLarga(Politica):
+    """Pasa la dirección con más carros esperando; `max_espera` evita que la cola corta espere indefinidamente."""
+    nombre = "cola_larga"
+
+    def __init__(self, k=4, max_espera=30.0):
+        super().__init__()
+        self.k = _parametro("k", k, int, 1)
+        self.max_espera = _parametro("max_espera", max_espera, float, 0.0)
+
+    def elegir_turno(self, vista):
+        largo = {d: vista.cola.longitud(d) for d in ("NORTH", "SOUTH")}
+        if not any(largo.values()):
+            return None
+        for direccion in ("NORTH", "SOUTH"):
+            espera = vista.espera(direccion)
+            if espera is not None and espera > self.max_espera:
+                return direccion, self.k
+        preferida = opuesta(vista.direccion_actual) if vista.direccion_actual else "NORTH"
+        direccion = max((preferida, opuesta(preferida)), key=lambda d: largo[d])
+        return direccion, self.k
+
+    def describir(self):
+        return f"{self.nombre}(k={self.k}, max_espera={self.max_espera})"
+
+class Fases(Politica):
+    """Fases de verde por tiempo: cada dirección tiene el paso durante `duracion` segundos.
+
+    Durante la fase entran todos los carros que quepan; al agotarse, si el otro lado espera,
+    no se admiten más y el turno cambia cuando el puente se vacía.
+    """
+    nombre = "fases"
+
+    def __init__(self, duracion=10.0):
+        super().__init__()
+        self.duracion = _parametro("duracion", duracion, float, 0.0)
+
+    def _fase_vigente(self, vista, direccion):
+        if direccion != self.direccion_turno or self.inicio_turno is None:
+            return False
+        if vista.cola.longitud(opuesta(direccion)) == 0:
+            return True  # Nadie espera al otro lado: la fase se prolonga
+        return vista.ahora - self.inicio_turno < self.duracion
+
+    def elegir_turno(self, vista):
+        actual = vista.direccion_actual
+        if actual and vista.cola.longitud(actual) > 0 and self._fase_vigente(vista, actual):
+            return actual, vista.cupo_libre
+        primero = opuesta(actual) if actual else "NORTH"
+        for direccion in (primero, opuesta(primero)):
+            if vista.cola.longitud(direccion) > 0:
+                self.reiniciar_turno()  # Empieza una fase nueva
+                return direccion, vista.cupo_libre
+        return None
+
+    def admitir_inmediato(self, vista, direccion):
+        return self._fase_vigente(vista, direccion)
+
+    def admitir_mas(self, vista):
+        if self._fase_vigente(vista, vista.direccion_actual):
+            return vista.cupo_libre
+        return 0
+
+    def describir(self):
+        return f"{self.nombre}(duracion={self.duracion})"
+
+POLITICAS = {cls.nombre: cls for cls in (Alternancia, Lote, Antiguedad, ColaMasLarga, Fases)}
+
+def crear_politica(nombre, **parametros):
+    """Instancia una política registrada en POLITICAS con sus parámetros."""
+    if nombre not in POLITICAS:
+        raise ValueError(f"Política desconocida: {nombre}. Disponibles: {', '.join(POLITICAS)}")
+    return POLITICAS[nombre](**parametros)
+
+def leer_parametros(pares):
+    """Convierte ["k=4", "duracion=8"] en {"k": "4", "duracion": "8"}."""
+    parametros = {}
+    for par in pares:
+        clave, _, valor = par.partition("=")
+        parametros[clave.strip()] = valor.strip()
+    return parametros
+
+def cargar_configuracion(ruta):
+    """Lee un JSON como {"politica": "fases", "parametros": {"duracion": 8}, "capacidad": 3}."""
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f)
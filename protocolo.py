@@ -0,0 +1,442 @@
+import argparse
+import json
+import struct
+import time
+
+# --- Codificación del protocolo ---
+# Dos codificaciones de los mismos mensajes:
+#   - TEXTO: una línea por mensaje, palabras separadas por espacios y el estado en JSON
+#     (STATUS_UPDATE/STATUS_DELTA). Es la de siempre y la más cómoda para depurar.
+#   - BIN1: tramas binarias con prefijo de longitud y campos de tamaño fijo empaquetados con struct.
+# La conexión empieza siempre en texto; el cliente pide otra versión en el saludo
+# (HELLO <rol> <versión>) y el servidor contesta WELCOME <versión> con la que usará
+# desde ese momento en ambos sentidos (TEXTO si no conoce la pedida).
+#
+# Los dos codecs tienen el mismo interfaz:
+#   - extraer_comandos(buf): lector incremental del servidor. Devuelve todos los comandos
+#     completos de buf y cuántos bytes ocupan; el resto espera a la próxima lectura.
+#   - extraer_respuesta(buf, pos): lector incremental del cliente. Devuelve (mensaje, nueva_pos),
+#     o (None, pos) si en buf no hay aún un mensaje completo.
+#   - permiso, vencida, error, keyframe, delta, eventos: mensajes del servidor.
+#   - solicitud, liberacion, resync, log_desde, suscripcion: mensajes del cliente.
+#
+# Un servidor puede llevar varios puentes, numerados desde 0. Los mensajes del cliente
+# nombran su puente (`puente`, 0 por defecto) y el estado y los eventos dicen de qué
+# puente son; en texto, los comandos sin puente son los de siempre y van al puente 0.
+
+DIRECCIONES = (None, "NORTH", "SOUTH")
+
+class ErrorProtocolo(ValueError):
+    """Datos que no se pueden interpretar y tras los que no es posible recuperar el flujo."""
+
+def id_32(valor):
+    """Id de carro o de concesión de un comando: tiene que caber en los campos de 32 bits de BIN1 y del diario."""
+    valor = int(valor)
+    if not -(1 << 31) <= valor < (1 << 31):
+        raise ValueError(f"Id fuera de rango: {valor}")
+    return valor
+
+def _invalida(largo):
+    raise ErrorProtocolo(f"Trama de tamaño fijo con longitud {largo} o dirección desconocida")
+
+def _campos_evento(evento):
+    """Un evento de puente.RegistroEventos como lo reciben los clientes en LOG_ENTRIES."""
+    seq, instante, tipo, car_id, texto = evento
+    return {"seq": seq, "time": instante, "kind": tipo, "car_id": car_id, "text": texto}
+
+class CodecTexto:
+    """Protocolo de texto: un mensaje por línea."""
+    nombre = "TEXTO"
+
+    # Lado del servidor
+    def extraer_comando(self, buf, pos):
+        """Siguiente línea como lista de palabras ([] si está vacía). Se usa hasta el saludo, que puede cambiar de codec."""
+        fin = buf.find(b"\n", pos)
+        if fin < 0:
+            return None, pos
+        return bytes(buf[pos:fin]).decode('utf-8').split(), fin + 1
+
+    def extraer_comandos(self, buf):
+        """Todas las líneas completas, decodificadas de una vez."""
+        fin = buf.rfind(b"\n")
+        if fin < 0:
+            return [], 0
+        return [linea.split() for linea in bytes(buf[:fin]).decode('utf-8').split("\n")], fin + 1
+
+    def permiso(self, car_id, lease_id, duracion):
+        return f"GRANT_CROSS {car_id} {lease_id} {duracion:g}\n".encode('utf-8')
+
+    def vencida(self, car_id, lease_id):
+        return f"LEASE_EXPIRED {car_id} {lease_id}\n".encode('utf-8')
+
+    def error(self, texto):
+        return f"ERROR {texto}\n".encode('utf-8')
+
+    def keyframe(self, estado):
+        """STATUS_UPDATE con los campos de construir_estado (incluido el puente) más seq y log."""
+        return f"STATUS_UPDATE {json.dumps(estado)}\n".encode('utf-8')
+
+    def delta(self, estado, seq, base, cambios, log_nuevo):
+        """STATUS_DELTA con solo los campos que cambiaron; seq y base son del puente del estado."""
+        delta = {'bridge': estado['bridge'], 'seq': seq, 'base': base, 'changes': cambios, 'log': log_nuevo}
+        return f"STATUS_DELTA {json.dumps(delta)}\n".encode('utf-8')
+
+    def eventos(self, eventos, puente=0):
+        """LOG_ENTRIES con una tanda de eventos del log de un puente, del más viejo al más nuevo; `seq` es el del último."""
+        tanda = {'bridge': puente, 'seq': eventos[-1][0], 'entries': [_campos_evento(e) for e in eventos]}
+        return f"LOG_ENTRIES {json.dumps(tanda)}\n".encode('utf-8')
+
+    # Lado del cliente
+    def solicitud(self, direccion, car_id, puente=0):
+        if puente:
+            return f"REQUEST_CROSS {puente} {direccion} {car_id}\n".encode('utf-8')
+        return f"REQUEST_CROSS {direccion} {car_id}\n".encode('utf-8')
+
+    def liberacion(self, lease_id, car_id, puente=0):
+        if puente:
+            return f"RELEASE_BRIDGE {puente} {int(lease_id or 0)} {car_id}\n".encode('utf-8')
+        if not lease_id:
+            return b"RELEASE_BRIDGE\n"
+        return (f"RELEASE_BRIDGE {lease_id} {car_id}\n" if car_id >= 0 else f"RELEASE_BRIDGE {lease_id}\n").encode('utf-8')
+
+    def resync(self, puente=None):
+        """RESYNC [<puente>]: keyframe de ese puente, o de todos los observados."""
+        return b"RESYNC\n" if puente is None else f"RESYNC {puente}\n".encode('utf-8')
+
+    def log_desde(self, seq=None, puente=0):
+        """LOG_SINCE: suscripción al log de un puente a partir del evento siguiente a `seq` (sin seq, solo los nuevos)."""
+        if puente:
+            return f"LOG_SINCE {-1 if seq is None else seq} {puente}\n".encode('utf-8')
+        return b"LOG_SINCE\n" if seq is None else f"LOG_SINCE {seq}\n".encode('utf-8')
+
+    def suscripcion(self, puentes=None):
+        """SUBSCRIBE: puentes cuyo estado recibe un observador (None = todos)."""
+        return b"SUBSCRIBE *\n" if puentes is None else f"SUBSCRIBE {' '.join(map(str, puentes))}\n".encode('utf-8')
+
+    def extraer_respuesta(self, buf, pos):
+        """Siguiente mensaje del servidor como tupla (tipo, ...) con los campos ya convertidos."""
+        fin = buf.find(b"\n", pos)
+        if fin < 0:
+            return None, pos
+        linea = bytes(buf[pos:fin]).decode('utf-8').strip()
+        tipo, _, resto = linea.partition(' ')
+        if tipo == "GRANT_CROSS":
+            partes = resto.split()
+            mensaje = (tipo, int(partes[0]), int(partes[1]), float(partes[2]))
+        elif tipo == "LEASE_EXPIRED":
+            partes = resto.split()
+            mensaje = (tipo, int(partes[0]), int(partes[1]))
+        elif tipo in ("STATUS_UPDATE", "STATUS_DELTA", "LOG_ENTRIES"):
+            mensaje = (tipo, json.loads(resto))
+        else:
+            mensaje = (tipo, resto)
+        return mensaje, fin + 1
+
+class CodecBinario:
+    """Protocolo BIN1: [longitud u32][tipo u8][carga]. Los comandos, permisos y vencimientos tienen tamaño fijo
+    y se leen con un único unpack de la trama completa; solo el estado lleva partes variables."""
+    nombre = "BIN1"
+    MAX_TRAMA = 1 << 20
+
+    (T_SOLICITUD, T_LIBERACION, T_RESYNC, T_PERMISO, T_VENCIDA, T_ERROR, T_ESTADO, T_LOG_DESDE, T_EVENTOS,
+     T_SUSCRIPCION) = range(1, 11)
+    TODOS = 0xFFFF  # Puente comodín: en RESYNC y SUBSCRIBE, todos
+
+    CABECERA = struct.Struct("<IB")       # Longitud de la carga y tipo
+    # Solicitudes y liberaciones comparten formato para que un lote mezclado se lea de una vez:
+    # + dirección (solo solicitudes), puente, car_id (-1 = sin comprobar), lease_id (0 = la más antigua de la conexión)
+    COMANDO = struct.Struct("<IBBHiI")
+    PERMISO = struct.Struct("<IBiIf")     # + car_id, lease_id, segundos
+    VENCIDA = struct.Struct("<IBiI")      # + car_id, lease_id
+    # + keyframe, puente, seq, base (-1 en keyframes), ocupado, dirección, en espera N/S, desalojos,
+    # concesiones recuperadas, carros cruzando, bytes de la política y bytes del log
+    # (entradas separadas por \0); detrás van los ids, la política y el log
+    ESTADO = struct.Struct("<IBBHQqBBIIIIIBI")
+    LOG_DESDE = struct.Struct("<IBqH")    # + seq (-1 = solo los eventos nuevos), puente
+    RESYNC = struct.Struct("<IBH")        # + puente (TODOS = los observados); sin carga, todos
+    # Una trama de eventos empieza con su número (u32) y el puente (u16). Cada evento: seq,
+    # instante, car_id (-1 = ninguno), bytes del tipo y bytes del texto; detrás van el tipo y el texto
+    EVENTOS = struct.Struct("<IH")
+    EVENTO = struct.Struct("<QdiBH")
+
+    def _cabecera(self, buf, pos):
+        """(longitud, tipo, fin) de la trama en pos, o None si aún no llegó completa."""
+        if len(buf) - pos < self.CABECERA.size:
+            return None
+        largo, tipo = self.CABECERA.unpack_from(buf, pos)
+        if largo > self.MAX_TRAMA:
+            raise ErrorProtocolo(f"Trama de {largo} bytes")
+        fin = pos + self.CABECERA.size + largo
+        return None if fin > len(buf) else (largo, tipo, fin)
+
+    def _fija(self, formato, buf, pos):
+        """Campos de una trama de tamaño fijo, o None si aún no llegó completa.
+
+        La longitud se comprueba con la cabecera, antes de esperar al resto: una trama más corta que
+        su formato no llegaría nunca a completarse ni se podría desempaquetar.
+        """
+        largo, tipo = self.CABECERA.unpack_from(buf, pos)
+        if largo != formato.size - self.CABECERA.size:
+            raise ErrorProtocolo(f"Trama de tipo {tipo} con longitud {largo}")
+        if len(buf) - pos < formato.size:
+            return None
+        return formato.unpack_from(buf, pos)
+
+    # Lado del servidor
+    def _comandos(self, campos):
+        esperado = self.COMANDO.size - self.CABECERA.size
+        return [_invalida(largo) if largo != esperado
+                else ["REQUEST_CROSS", puente, DIRECCIONES[direccion] or _invalida(largo), car_id] if tipo == self.T_SOLICITUD
+                else ["RELEASE_BRIDGE", puente, lease_id, car_id]
+                for largo, tipo, direccion, puente, car_id, lease_id in campos]
+
+    def extraer_comandos(self, buf):
+        """Comandos completos de buf como listas equivalentes a las del texto, con los números ya convertidos.
+
+        Las solicitudes y liberaciones consecutivas (lo que envía en lote una conexión compartida
+        por muchos carros) se interpretan con un solo iter_unpack.
+        """
+        comandos = []
+        pos, total = 0, len(buf)
+        paso = self.COMANDO.size
+        try:
+            while total - pos >= self.CABECERA.size:
+                tipo = buf[pos + 4]
+                if tipo != self.T_SOLICITUD and tipo != self.T_LIBERACION:
+                    trama = self._cabecera(buf, pos)
+                    if trama is None: break
+                    if tipo == self.T_RESYNC:
+                        puente = self._fija(self.RESYNC, buf, pos)[2] if trama[0] else self.TODOS
+                        comandos.append(["RESYNC"] if puente == self.TODOS else ["RESYNC", puente])
+                    elif tipo == self.T_LOG_DESDE:
+                        _, _, seq, puente = self._fija(self.LOG_DESDE, buf, pos)
+                        comandos.append(["LOG_SINCE", seq, puente])
+                    elif tipo == self.T_SUSCRIPCION:
+                        if trama[0] % 2:
+                            raise ErrorProtocolo(f"SUBSCRIBE con {trama[0]} bytes: los puentes son u16")
+                        puentes = struct.unpack_from(f"<{trama[0] // 2}H", buf, pos + self.CABECERA.size)
+                        comandos.append(["SUBSCRIBE", "*"] if self.TODOS in puentes else ["SUBSCRIBE", *puentes])
+                    else:
+                        comandos.append(["TRAMA_INVALIDA", tipo])
+                    pos = trama[2]
+                    continue
+                completas = (total - pos) // paso
+                if completas == 0: break
+                # Tipos de las tramas siguientes suponiendo que todas son comandos; el tramo acaba en la primera que no lo es
+                tipos = bytes(buf[pos + 4:pos + completas * paso:paso])
+                fin = pos + (len(tipos) - len(tipos.lstrip(COMANDOS_FIJOS))) * paso
+                comandos.extend(self._comandos(self.COMANDO.iter_unpack(bytes(buf[pos:fin]))))
+                pos = fin
+        except IndexError:
+            raise ErrorProtocolo("Dirección desconocida en REQUEST_CROSS") from None
+        return comandos, pos
+
+    def permiso(self, car_id, lease_id, duracion):
+        return self.PERMISO.pack(self.PERMISO.size - self.CABECERA.size, self.T_PERMISO, car_id, lease_id, duracion)
+
+    def vencida(self, car_id, lease_id):
+        return self.VENCIDA.pack(self.VENCIDA.size - self.CABECERA.size, self.T_VENCIDA, car_id, lease_id)
+
+    def error(self, texto):
+        datos = texto.encode('utf-8')
+        return self.CABECERA.pack(len(datos), self.T_ERROR) + datos
+
+    def _estado(self, es_keyframe, estado, seq, base, log):
+        cruzando = estado["crossing_cars"]
+        politica = estado["policy"].encode('utf-8')[:255]
+        texto_log = "\0".join(log).encode('utf-8')
+        variable = struct.pack(f"<{len(cruzando)}i", *cruzando) + politica + texto_log
+        return self.ESTADO.pack(self.ESTADO.size - self.CABECERA.size + len(variable), self.T_ESTADO,
+                                es_keyframe, estado["bridge"], seq, base, estado["bridge_status"] == "OCUPADO",
+                                DIRECCIONES.index(estado["current_direction"]),
+                                estado["waiting_north"], estado["waiting_south"],
+                                estado["evicted_clients"], estado["reclaimed_leases"],
+                                len(cruzando), len(politica), len(texto_log)) + variable
+
+    def keyframe(self, estado):
+        return self._estado(True, estado, estado["seq"], -1, estado["log"])
+
+    def delta(self, estado, seq, base, cambios, log_nuevo):
+        """Los campos fijos viajan siempre completos: ocupan menos que el JSON de los cambios."""
+        return self._estado(False, estado, seq, base, log_nuevo)
+
+    def eventos(self, eventos, puente=0):
+        partes = [self.EVENTOS.pack(len(eventos), puente)]
+        for seq, instante, tipo, car_id, texto in eventos:
+            tipo = tipo.encode('utf-8')
+            texto = texto.encode('utf-8')[:0xFFFF]
+            partes += (self.EVENTO.pack(seq, instante, -1 if car_id is None else car_id, len(tipo), len(texto)), tipo, texto)
+        carga = b"".join(partes)
+        return self.CABECERA.pack(len(carga), self.T_EVENTOS) + carga
+
+    # Lado del cliente
+    def solicitud(self, direccion, car_id, puente=0):
+        return self.COMANDO.pack(self.COMANDO.size - self.CABECERA.size, self.T_SOLICITUD,
+                                 DIRECCIONES.index(direccion), puente, car_id, 0)
+
+    def liberacion(self, lease_id, car_id, puente=0):
+        return self.COMANDO.pack(self.COMANDO.size - self.CABECERA.size, self.T_LIBERACION,
+                                 0, puente, car_id, int(lease_id or 0))
+
+    def resync(self, puente=None):
+        if puente is None:
+            return self.CABECERA.pack(0, self.T_RESYNC)
+        return self.RESYNC.pack(self.RESYNC.size - self.CABECERA.size, self.T_RESYNC, puente)
+
+    def log_desde(self, seq=None, puente=0):
+        return self.LOG_DESDE.pack(self.LOG_DESDE.size - self.CABECERA.size, self.T_LOG_DESDE,
+                                   -1 if seq is None else seq, puente)
+
+    def suscripcion(self, puentes=None):
+        puentes = [self.TODOS] if puentes is None else list(puentes)
+        return self.CABECERA.pack(2 * len(puentes), self.T_SUSCRIPCION) + struct.pack(f"<{len(puentes)}H", *puentes)
+
+    def _leer_eventos(self, buf, pos):
+        pos += self.CABECERA.size
+        cantidad, puente = self.EVENTOS.unpack_from(buf, pos)
+        pos += self.EVENTOS.size
+        entradas = []
+        for _ in range(cantidad):
+            seq, instante, car_id, largo_tipo, largo_texto = self.EVENTO.unpack_from(buf, pos)
+            pos += self.EVENTO.size
+            tipo = bytes(buf[pos:pos + largo_tipo]).decode('utf-8')
+            pos += largo_tipo
+            texto = bytes(buf[pos:pos + largo_texto]).decode('utf-8')
+            pos += largo_texto
+            entradas.append({"seq": seq, "time": instante, "kind": tipo, "car_id": None if car_id < 0 else car_id, "text": texto})
+        return ("LOG_ENTRIES", {"bridge": puente, "seq": entradas[-1]["seq"] if entradas else 0, "entries": entradas})
+
+    def _leer_estado(self, buf, pos, fin):
+        (_, _, es_keyframe, puente, seq, base, ocupado, direccion, espera_n, espera_s, desalojos, recuperadas,
+         n_cruzando, largo_politica, largo_log) = self.ESTADO.unpack_from(buf, pos)
+        pos += self.ESTADO.size
+        cruzando = list(struct.unpack_from(f"<{n_cruzando}i", buf, pos))
+        pos += 4 * n_cruzando
+        politica = bytes(buf[pos:pos + largo_politica]).decode('utf-8')
+        pos += largo_politica
+        log = bytes(buf[pos:pos + largo_log]).decode('utf-8').split("\0") if largo_log else []
+        direccion = DIRECCIONES[direccion]
+        campos = {
+            "bridge": puente,
+            "bridge_status": "OCUPADO" if ocupado else "LIBRE",
+            "current_direction": direccion,
+            "waiting_north": espera_n,
+            "waiting_south": espera_s,
+            "crossing_cars": cruzando,
+            "traffic_light": direccion if ocupado else "NONE",
+            "evicted_clients": desalojos,
+            "policy": politica,
+            "reclaimed_leases": recuperadas,
+        }
+        if es_keyframe:
+            return ("STATUS_UPDATE", {**campos, "seq": seq, "log": log})
+        return ("STATUS_DELTA", {"bridge": puente, "seq": seq, "base": base, "changes": campos, "log": log})
+
+    def extraer_respuesta(self, buf, pos):
+        """Siguiente mensaje del servidor como tupla (tipo, ...), igual que CodecTexto.extraer_respuesta."""
+        if len(buf) - pos < self.CABECERA.size:
+            return None, pos
+        tipo = buf[pos + 4]
+        if tipo == self.T_PERMISO:
+            campos = self._fija(self.PERMISO, buf, pos)
+            if campos is None: return None, pos
+            return ("GRANT_CROSS", *campos[2:]), pos + self.PERMISO.size
+        if tipo == self.T_VENCIDA:
+            campos = self._fija(self.VENCIDA, buf, pos)
+            if campos is None: return None, pos
+            return ("LEASE_EXPIRED", *campos[2:]), pos + self.VENCIDA.size
+        trama = self._cabecera(buf, pos)
+        if trama is None:
+            return None, pos
+        fin = trama[2]
+        if tipo == self.T_ESTADO:
+            return self._leer_estado(buf, pos, fin), fin
+        if tipo == self.T_EVENTOS:
+            return self._leer_eventos(buf, pos), fin
+        if tipo == self.T_ERROR:
+            return ("ERROR", bytes(buf[pos + self.CABECERA.size:fin]).decode('utf-8')), fin
+        return ("TRAMA_INVALIDA", tipo), fin
+
+COMANDOS_FIJOS = bytes([CodecBinario.T_SOLICITUD, CodecBinario.T_LIBERACION])
+
+TEXTO = CodecTexto()
+BINARIO = CodecBinario()
+CODECS = {TEXTO.nombre: TEXTO, BINARIO.nombre: BINARIO}
+
+def codec_para(version):
+    """Codec que el servidor usará para la versión pedida en el saludo (texto si no la conoce)."""
+    return CODECS.get(version, TEXTO)
+
+def saludo(rol, codec):
+    """Línea HELLO (siempre en texto) que pide la versión del codec."""
+    return f"HELLO {rol}\n".encode('utf-8') if codec is TEXTO else f"HELLO {rol} {codec.nombre}\n".encode('utf-8')
+
+# --- Microbenchmark ---
+
+def _mensajes_de_prueba(n):
+    """Mezcla de n solicitudes, liberaciones, permisos y deltas de estado, como en una prueba de carga."""
+    estado = {"bridge": 0, "bridge_status": "OCUPADO", "current_direction": "NORTH", "waiting_north": 12, "waiting_south": 7,
+              "crossing_cars": [1041, 1077, 1102], "traffic_light": "NORTH", "evicted_clients": 0,
+              "policy": "lote(k=4)", "reclaimed_leases": 0}
+    for i in range(n):
+        car_id = 1000 + i % 5000
+        yield "comando", "solicitud", ("NORTH" if i % 2 else "SOUTH", car_id)
+        yield "comando", "liberacion", (i + 1, car_id)
+        yield "respuesta", "permiso", (car_id, i + 1, 30.0)
+        cambios = {"waiting_north": 11, "crossing_cars": [1077, 1102, car_id]}
+        log = [f"[12:00:00] Servidor: Permiso a Carro(s) {car_id} (NORTH)"]
+        yield "respuesta", "delta", (estado, i + 2, i + 1, cambios, log)
+
+def _valores(partes):
+    """Lo que servidor.interpretar_comando hace con los argumentos: convertir los números (en BIN1 ya vienen convertidos)."""
+    if partes[0] == "REQUEST_CROSS":
+        if len(partes) > 3:
+            return int(partes[1]), partes[2], int(partes[3])
+        return partes[1], int(partes[2])
+    return [int(p) for p in partes[1:]]
+
+def medir(codec, n, bloque):
+    """Codifica n rondas de mensajes, las entrega en trozos de `bloque` bytes y mide el coste de interpretarlas."""
+    flujos = {"comando": bytearray(), "respuesta": bytearray()}
+    for sentido, mensaje, argumentos in _mensajes_de_prueba(n):
+        flujos[sentido] += getattr(codec, mensaje)(*argumentos)
+    resultado = {}
+    for sentido in ("comando", "respuesta"):
+        datos = bytes(flujos[sentido])
+        mensajes = 0
+        t0 = time.perf_counter()
+        buf = bytearray()
+        for inicio in range(0, len(datos), bloque):
+            buf += datos[inicio:inicio + bloque]
+            if sentido == "comando":
+                comandos, pos = codec.extraer_comandos(buf)
+                for partes in comandos:
+                    _valores(partes)
+                mensajes += len(comandos)
+            else:
+                pos = 0
+                while True:
+                    mensaje, pos = codec.extraer_respuesta(buf, pos)
+                    if mensaje is None: break
+                    mensajes += 1
+            del buf[:pos]
+        segundos = time.perf_counter() - t0
+        resultado[sentido] = {"mensajes": mensajes, "bytes": len(datos), "ns_por_mensaje": segundos / mensajes * 1e9}
+    return resultado
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark de los lectores del protocolo de texto y BIN1.")
+    parser.add_argument("--rondas", type=int, default=50000, help="Rondas de solicitud, liberación, permiso y delta.")
+    parser.add_argument("--bloque", type=int, default=4096, help="Bytes entregados al lector en cada lectura.")
+    args = parser.parse_args()
+    resultados = {codec.nombre: medir(codec, args.rondas, args.bloque) for codec in (TEXTO, BINARIO)}
+    for sentido in ("comando", "respuesta"):
+        print(f"{sentido}s:")
+        for nombre, r in resultados.items():
+            print(f"  {nombre:6} {r[sentido]['mensajes']} mensajes, {r[sentido]['bytes']} bytes, "
+                  f"{r[sentido]['ns_por_mensaje']:.0f} ns/mensaje")
+        ahorro = 1 - resultados["BIN1"][sentido]["ns_por_mensaje"] / resultados["TEXTO"][sentido]["ns_por_mensaje"]
+        print(f"  BIN1 ahorra {ahorro:.0%} del coste de interpretación")
+
+if __name__ == "__main__":
+    main()
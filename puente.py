@@ -0,0 +1,507 @@
+import functools
+import math
+import time
+from collections import deque
+
+import politicas
+
+# --- Estado del puente y sus transiciones ---
+# Sin sockets, hilos ni cerrojos: un Puente lo modifica un único dueño (el Planificador de
+# servidor.py, o simulacion.py con su reloj virtual). Las conexiones son claves opacas; lo
+# que haya que enviarles se acumula en `salida` como mensajes ya decididos y el dueño los
+# entrega después de cada transición con tomar_mensajes().
+#
+# El log es un anillo de eventos estructurados con número de secuencia. Registrar un evento
+# solo guarda una tupla con sus campos; la línea "[HH:MM:SS] texto" se compone al difundirlo.
+#
+# Con un diario (diario.py) cada transición se anota también como tupla ("ENCOLAR", ...),
+# y restaurar() rehace el estado a partir de esas tuplas tras un reinicio. Lo recuperado
+# queda a nombre de la conexión None ("huérfano") hasta que su carro vuelva a pedir paso.
+
+CAPACIDAD_PUENTE = 0       # Máximo de carros a la vez sobre el puente (0 = sin límite)
+DURACION_CONCESION = 30.0  # Segundos que un carro puede ocupar el puente sin liberarlo
+MAX_LOG = 10               # Entradas del log que viajan con el estado (STATUS_UPDATE y memoria compartida)
+HISTORIAL_LOG = 4096       # Eventos que conserva el anillo para LOG_SINCE
+PLAZO_RECLAMO = 15.0       # Segundos que un carro tiene tras una recuperación para reclamar su puesto
+
+@functools.lru_cache(maxsize=64)
+def _hora(segundo):
+    return time.strftime("%H:%M:%S", time.localtime(segundo))
+
+def linea(evento):
+    """Un evento como "[HH:MM:SS] texto", la forma en que lo muestra el panel."""
+    return f"[{_hora(int(evento[1]))}] {evento[4]}"
+
+class RegistroEventos:
+    """Anillo con los últimos `capacidad` eventos del log; `seq` es el del último registrado.
+
+    Cada evento es una tupla (seq, instante, tipo, car_id, texto): instante es time.time()
+    y car_id es None si el evento no es de un solo carro.
+    """
+    def __init__(self, capacidad=HISTORIAL_LOG):
+        self.eventos = deque(maxlen=capacidad)
+        self.seq = 0
+
+    def agregar(self, texto, tipo, car_id=None):
+        self.seq += 1
+        self.eventos.append((self.seq, time.time(), tipo, car_id, texto))
+
+    def desde(self, seq, limite=None):
+        """Hasta `limite` eventos posteriores a `seq`, del más viejo al más nuevo. Los que ya salieron del anillo se pierden."""
+        nuevos = min(self.seq - seq, len(self.eventos))
+        if nuevos <= 0:
+            return []
+        inicio = len(self.eventos) - nuevos
+        fin = len(self.eventos) if limite is None else min(inicio + limite, len(self.eventos))
+        return [self.eventos[i] for i in range(inicio, fin)]  # Índices cerca del final: acceso rápido en la deque
+
+    def lineas(self, seq=None):
+        """Líneas de los últimos MAX_LOG eventos, o de los posteriores a `seq` si son menos."""
+        cantidad = MAX_LOG if seq is None else min(self.seq - seq, MAX_LOG)
+        return [linea(evento) for evento in self.desde(self.seq - cantidad)]
+
+    def __len__(self):
+        return len(self.eventos)
+
+class EntradaCola:
+    """Carro esperando en una de las colas del puente."""
+    __slots__ = ("conexion", "car_id", "direccion", "instante", "activa")
+
+    def __init__(self, conexion, car_id, direccion, instante):
+        self.conexion = conexion
+        self.car_id = car_id
+        self.direccion = direccion
+        self.instante = instante
+        self.activa = True
+
+class ColaEspera:
+    """Colas FIFO por dirección con índices por carro y por conexión.
+
+    Un carro se identifica por (conexion, car_id): clientes distintos pueden numerar sus
+    carros igual sin chocar. Encolar, desencolar, cancelar y consultar son O(1): las entradas canceladas
+    se marcan como inactivas y se descartan al llegar al frente de su cola.
+    """
+    def __init__(self):
+        self.colas = {"NORTH": deque(), "SOUTH": deque()}
+        self.tamanos = {"NORTH": 0, "SOUTH": 0}
+        self.por_carro = {}
+        self.por_conexion = {}
+
+    def encolar(self, direccion, conexion, car_id, instante):
+        entrada = EntradaCola(conexion, car_id, direccion, instante)
+        self.colas[direccion].append(entrada)
+        self.tamanos[direccion] += 1
+        self.por_carro[(conexion, car_id)] = entrada
+        self.por_conexion.setdefault(conexion, {})[car_id] = entrada
+        return entrada
+
+    def _limpiar_frente(self, direccion):
+        cola = self.colas[direccion]
+        while cola and not cola[0].activa:
+            cola.popleft()
+
+    def primero(self, direccion):
+        """Entrada al frente de la cola sin sacarla, o None."""
+        self._limpiar_frente(direccion)
+        cola = self.colas[direccion]
+        return cola[0] if cola else None
+
+    def desencolar(self, direccion):
+        """Saca y devuelve la entrada al frente de la cola, o None si está vacía."""
+        entrada = self.primero(direccion)
+        if entrada is not None:
+            self.colas[direccion].popleft()
+            self._quitar(entrada)
+        return entrada
+
+    def _quitar(self, entrada):
+        entrada.activa = False
+        self.tamanos[entrada.direccion] -= 1
+        del self.por_carro[(entrada.conexion, entrada.car_id)]
+        de_conexion = self.por_conexion[entrada.conexion]
+        del de_conexion[entrada.car_id]
+        if not de_conexion:
+            del self.por_conexion[entrada.conexion]
+
+    def cancelar(self, conexion, car_id):
+        entrada = self.por_carro.get((conexion, car_id))
+        if entrada is not None:
+            self._quitar(entrada)
+        return entrada
+
+    def cancelar_conexion(self, conexion):
+        """Retira de las colas todos los carros de una conexión."""
+        entradas = list(self.por_conexion.get(conexion, {}).values())
+        for entrada in entradas:
+            self._quitar(entrada)
+        return entradas
+
+    def adoptar(self, entrada, conexion):
+        """Pasa una entrada a otra conexión sin moverla de su puesto."""
+        de_conexion = self.por_conexion[entrada.conexion]
+        del de_conexion[entrada.car_id]
+        if not de_conexion:
+            del self.por_conexion[entrada.conexion]
+        del self.por_carro[(entrada.conexion, entrada.car_id)]
+        self.por_carro[(conexion, entrada.car_id)] = entrada
+        entrada.conexion = conexion
+        self.por_conexion.setdefault(conexion, {})[entrada.car_id] = entrada
+
+    def longitud(self, direccion):
+        return self.tamanos[direccion]
+
+    def __contains__(self, clave):
+        """`(conexion, car_id) in cola`."""
+        return clave in self.por_carro
+
+class RuedaTemporizadores:
+    """Rueda de temporizadores con ranuras de `resolucion` segundos.
+
+    Programar es O(1) y avanzar solo recorre las ranuras transcurridas desde la última
+    llamada. No hay cancelación explícita: el llamador descarta los elementos ya inactivos.
+    """
+    def __init__(self, ahora, resolucion=0.25, num_ranuras=512):
+        self.resolucion = resolucion
+        self.ranuras = [[] for _ in range(num_ranuras)]
+        self.tick = int(ahora / resolucion)
+
+    def programar(self, vence, elemento):
+        tick_vence = max(math.ceil(vence / self.resolucion), self.tick + 1)
+        self.ranuras[tick_vence % len(self.ranuras)].append((tick_vence, elemento))
+
+    def avanzar(self, ahora):
+        """Devuelve los elementos cuyo vencimiento ya pasó."""
+        objetivo = int(ahora / self.resolucion)
+        vencidos = []
+        for paso in range(1, min(objetivo - self.tick, len(self.ranuras)) + 1):
+            ranura = self.ranuras[(self.tick + paso) % len(self.ranuras)]
+            if not ranura: continue
+            pendientes = []
+            for tick_vence, elemento in ranura:
+                (vencidos if tick_vence <= objetivo else pendientes).append(elemento)
+            ranura[:] = pendientes
+        self.tick = max(self.tick, objetivo)
+        return vencidos
+
+class Concesion:
+    """Permiso de cruce (lease) de un carro, válido hasta `vence`."""
+    __slots__ = ("id", "car_id", "conexion", "direccion", "vence", "activa")
+
+    def __init__(self, lease_id, car_id, conexion, direccion, vence):
+        self.id = lease_id
+        self.car_id = car_id
+        self.conexion = conexion
+        self.direccion = direccion
+        self.vence = vence
+        self.activa = True
+
+class Puente:
+    """Máquina de estados del puente de una vía.
+
+    Cada método público es una transición completa. Los permisos y avisos de vencimiento
+    que resultan se añaden a `salida` como ("GRANT_CROSS", conexion, car_id, lease_id, duracion),
+    ("LEASE_EXPIRED", conexion, car_id, lease_id) y ("ERROR", conexion, texto); `version` cambia con cada modificación
+    para que el dueño sepa cuándo difundir, y `log.seq` con cada evento.
+    """
+    def __init__(self, politica=None, capacidad=CAPACIDAD_PUENTE, duracion_concesion=DURACION_CONCESION,
+                 reloj=time.monotonic, puente_id=0):
+        self.id = puente_id      # Número del puente en un servidor con varios
+        self.politica = politica if politica is not None else politicas.Alternancia()
+        self.capacidad = capacidad
+        self.duracion_concesion = duracion_concesion
+        self.reloj = reloj
+        self.ocupado = False
+        self.direccion = None
+        self.cola = ColaEspera()
+        self.coches = 0
+        self.cruzando = []
+        self.concesiones = {}    # lease_id -> Concesion activa
+        self.por_conexion = {}   # conexion -> {lease_id: Concesion} de sus carros sobre el puente
+        self.siguiente_concesion = 1
+        self.rueda = RuedaTemporizadores(reloj())
+        self.recuperadas = 0     # Concesiones vencidas que hubo que reclamar
+        self.log = RegistroEventos()
+        self.version = 0         # Se incrementa con cada cambio del puente o del log
+        self.salida = []
+        self.diario = None       # diario.Diario que anota cada transición, o None
+        self.fin_reclamo = None  # Tras restaurar: hasta cuándo pueden volver los carros huérfanos
+
+    # --- Consultas ---
+    def cupo_libre(self):
+        """Cuántos carros más caben en el puente."""
+        if self.capacidad <= 0:
+            return float('inf')
+        return self.capacidad - self.coches
+
+    def vista(self):
+        return politicas.VistaPuente(self.direccion, self.coches, self.cola, self.cupo_libre(), self.reloj())
+
+    def estado(self, desalojos=0):
+        """Campos del estado del puente, sin el log (los de STATUS_UPDATE)."""
+        return {
+            "bridge": self.id,
+            "bridge_status": "OCUPADO" if self.ocupado else "LIBRE",
+            "current_direction": self.direccion,
+            "waiting_north": self.cola.longitud("NORTH"),
+            "waiting_south": self.cola.longitud("SOUTH"),
+            "crossing_cars": self.cruzando[:],
+            "traffic_light": self.direccion if self.ocupado else "NONE",
+            "evicted_clients": desalojos,
+            "policy": self.politica.describir(),
+            "reclaimed_leases": self.recuperadas,
+        }
+
+    def tomar_mensajes(self):
+        """Devuelve y vacía los mensajes pendientes de entregar, en orden."""
+        mensajes, self.salida = self.salida, []
+        return mensajes
+
+    def registrar(self, texto, tipo="sistema", car_id=None):
+        """Añade un evento al log."""
+        self.log.agregar(texto, tipo, car_id)
+        self.version += 1
+        if self.diario is not None:
+            self.diario.anotar(("EVENTO", *self.log.eventos[-1]))
+
+    def _anotar(self, registro):
+        if self.diario is not None:
+            self.diario.anotar(registro)
+
+    # --- Transiciones ---
+    def solicitar(self, conexion, car_id, direccion):
+        """REQUEST_CROSS: paso inmediato si la política lo admite; si no, a la cola."""
+        self.registrar(f"Cliente: Carro {car_id} solicita cruce ({direccion})", "solicitud", car_id)
+        if self.fin_reclamo is not None and self._reclamar(conexion, car_id):
+            return
+        if (conexion, car_id) in self.cola or self._cruzando(conexion, car_id):
+            self.registrar(f"Servidor: Carro {car_id} ya está en cola o cruzando", "rechazo", car_id)
+            self._rechazar(conexion, "Carro ya en cola o cruzando", f"REQUEST_CROSS {self.id} {direccion} {car_id}")
+        elif not self.ocupado or (self.direccion == direccion and self.cola.longitud(direccion) == 0
+                                  and self.cupo_libre() > 0 and self.politica.admitir_inmediato(self.vista(), direccion)):
+            self._conceder(conexion, car_id, direccion)
+            self.registrar(f"Servidor: Permiso inmediato a Carro {car_id}", "permiso", car_id)
+        else:
+            self.cola.encolar(direccion, conexion, car_id, self.reloj())
+            self.version += 1
+            self._anotar(("ENCOLAR", car_id, direccion, time.time()))
+            self.registrar(f"Servidor: Encolado Carro {car_id} ({direccion})", "encolado", car_id)
+
+    def liberar(self, conexion, lease_id=None, car_id=None):
+        """RELEASE_BRIDGE [<lease_id> [<car_id>]]; sin id se libera la concesión más antigua de la conexión."""
+        comando = f"RELEASE_BRIDGE {self.id} {lease_id or 0} {-1 if car_id is None else car_id}"
+        if lease_id is not None:
+            concesion = self.concesiones.get(lease_id)
+            if concesion is None or concesion.conexion is not conexion and concesion.conexion is not None:
+                self.registrar(f"Servidor: RELEASE_BRIDGE de concesión {lease_id} desconocida o vencida", "rechazo", car_id)
+                self._rechazar(conexion, "Concesión desconocida o vencida", comando)
+                return
+            if car_id is not None and concesion.car_id != car_id:
+                self.registrar(f"Servidor: La concesión {lease_id} no es del Carro {car_id}", "rechazo", car_id)
+                self._rechazar(conexion, "La concesión es de otro carro", comando)
+                return
+        else:
+            concesion = next(iter(self.por_conexion.get(conexion, {}).values()), None)
+            if concesion is None:
+                self.registrar(f"Servidor: RELEASE_BRIDGE sin permiso desde {conexion}", "rechazo")
+                self._rechazar(conexion, "Sin concesión que liberar", comando)
+                return
+        self._liberar_concesion(concesion, "liberó el puente", "liberacion")
+
+    def desconectar(self, conexion):
+        """Retira de las colas los carros de una conexión cerrada y libera sus concesiones."""
+        canceladas = self.cola.cancelar_conexion(conexion)
+        if canceladas:
+            self.version += 1
+            for entrada in canceladas:
+                self._anotar(("CANCELAR", entrada.car_id))
+        for concesion in list(self.por_conexion.get(conexion, {}).values()):
+            self._liberar_concesion(concesion, "liberado por desconexión", "desconexion")
+
+    def revisar_concesiones(self, ahora=None):
+        """Reclama las concesiones vencidas para que un carro colgado no bloquee el puente. Devuelve cuántas."""
+        ahora = self.reloj() if ahora is None else ahora
+        if self.fin_reclamo is not None and ahora >= self.fin_reclamo:
+            self._abandonar_huerfanos()
+        vencidas = [c for c in self.rueda.avanzar(ahora) if c.activa]
+        for concesion in vencidas:
+            self.recuperadas += 1
+            if concesion.conexion is not None:
+                self.salida.append(("LEASE_EXPIRED", concesion.conexion, concesion.car_id, concesion.id))
+            self._liberar_concesion(concesion, f"perdió la concesión {concesion.id} por vencimiento", "vencimiento", True)
+        return len(vencidas)
+
+    # --- Diario y recuperación ---
+    def instantanea(self):
+        """Registros mínimos del diario que rehacen el estado actual (para compactarlo)."""
+        ahora, ahora_real = self.reloj(), time.time()
+        registros = [("INICIO", self.siguiente_concesion, self.recuperadas, self.log.seq)]
+        registros += [("EVENTO", *evento) for evento in self.log.eventos]
+        for direccion in ("NORTH", "SOUTH"):
+            for entrada in self.cola.colas[direccion]:
+                if entrada.activa:
+                    registros.append(("ENCOLAR", entrada.car_id, direccion, ahora_real - (ahora - entrada.instante)))
+        for concesion in self.concesiones.values():
+            registros.append(("CONCEDER", concesion.id, concesion.car_id, concesion.direccion,
+                              ahora_real + (concesion.vence - ahora)))
+        return registros
+
+    def restaurar(self, registros, plazo=PLAZO_RECLAMO):
+        """Rehace colas, concesiones y log a partir de los registros de un diario.
+
+        Todo lo recuperado queda huérfano (conexión None): un carro que vuelve a pedir paso
+        retoma su puesto o su concesión, y lo que nadie reclame en `plazo` segundos se libera.
+        """
+        ahora, ahora_real = self.reloj(), time.time()
+        for registro in registros:
+            tipo = registro[0]
+            if tipo == "ENCOLAR":
+                _, car_id, direccion, instante = registro
+                if (None, car_id) not in self.cola:
+                    self.cola.encolar(direccion, None, car_id, ahora - (ahora_real - instante))
+            elif tipo == "CONCEDER":
+                _, lease_id, car_id, direccion, vence = registro
+                self.cola.cancelar(None, car_id)
+                concesion = Concesion(lease_id, car_id, None, direccion, ahora + max(vence - ahora_real, plazo))
+                self.concesiones[lease_id] = concesion
+                self.por_conexion.setdefault(None, {})[lease_id] = concesion
+                self.siguiente_concesion = max(self.siguiente_concesion, lease_id + 1)
+            elif tipo == "LIBERAR":
+                _, lease_id, vencida = registro
+                concesion = self.concesiones.pop(lease_id, None)
+                if concesion is not None:
+                    del self.por_conexion[None][lease_id]
+                self.recuperadas += vencida
+            elif tipo == "CANCELAR":
+                self.cola.cancelar(None, registro[1])
+            elif tipo == "EVENTO":
+                self.log.eventos.append(registro[1:])
+                self.log.seq = registro[1]
+            elif tipo == "INICIO":
+                # Principio de un diario compactado: lo anterior ya está resumido en lo que sigue
+                _, siguiente, recuperadas, log_seq = registro
+                self.cola = ColaEspera()
+                self.concesiones, self.por_conexion = {}, {}
+                self.log.eventos.clear()
+                self.siguiente_concesion, self.recuperadas, self.log.seq = siguiente, recuperadas, log_seq
+        if not self.por_conexion.get(None, True):
+            del self.por_conexion[None]
+        for concesion in self.concesiones.values():
+            self.rueda.programar(concesion.vence, concesion)
+            self.politica.registrar_concesion(concesion.direccion, ahora)
+        self.cruzando = [c.car_id for c in self.concesiones.values()]
+        self.coches = len(self.cruzando)
+        self.ocupado = self.coches > 0
+        self.direccion = next(iter(self.concesiones.values())).direccion if self.ocupado else None
+        self.fin_reclamo = ahora + plazo
+        self.registrar(f"Sistema: Estado recuperado del diario: {self.cola.longitud('NORTH') + self.cola.longitud('SOUTH')} "
+                       f"en cola y {self.coches} cruzando.")
+        if not self.ocupado:
+            self._siguiente_turno()
+
+    def _reclamar(self, conexion, car_id):
+        """Un carro que vuelve tras una recuperación retoma su puesto en la cola o su concesión."""
+        entrada = self.cola.por_carro.get((None, car_id))
+        if entrada is not None:
+            self.cola.adoptar(entrada, conexion)
+            self.registrar(f"Servidor: Carro {car_id} recupera su puesto en la cola ({entrada.direccion})", "reclamo", car_id)
+            return True
+        huerfanas = self.por_conexion.get(None, {})
+        concesion = next((c for c in huerfanas.values() if c.car_id == car_id), None)
+        if concesion is None:
+            return False
+        del huerfanas[concesion.id]
+        if not huerfanas:
+            del self.por_conexion[None]
+        concesion.conexion = conexion
+        self.por_conexion.setdefault(conexion, {})[concesion.id] = concesion
+        self.salida.append(("GRANT_CROSS", conexion, car_id, concesion.id, max(concesion.vence - self.reloj(), 0.0)))
+        self.registrar(f"Servidor: Carro {car_id} recupera la concesión {concesion.id}", "reclamo", car_id)
+        return True
+
+    def _abandonar_huerfanos(self):
+        """Vence el plazo de reclamo: los carros que no volvieron salen de la cola y del puente."""
+        self.fin_reclamo = None
+        cantidad = len(self.cola.por_conexion.get(None, {})) + len(self.por_conexion.get(None, {}))
+        if cantidad:
+            self.registrar(f"Sistema: {cantidad} carro(s) no volvieron tras la recuperación.", "desconexion")
+            self.desconectar(None)
+
+    # --- Pasos internos ---
+    def _cruzando(self, conexion, car_id):
+        """Si el carro car_id de esa conexión tiene una concesión activa."""
+        return any(c.car_id == car_id for c in self.por_conexion.get(conexion, {}).values())
+
+    def _rechazar(self, conexion, motivo, comando):
+        """Contesta ERROR "<motivo>: <comando>" a una transición que no se aplicó (un huérfano no tiene a quién)."""
+        if conexion is not None:
+            self.salida.append(("ERROR", conexion, f"{motivo}: {comando}"))
+
+    def _conceder(self, conexion, car_id, direccion):
+        """Sube un carro al puente con una concesión nueva y prepara su permiso."""
+        ahora = self.reloj()
+        concesion = Concesion(self.siguiente_concesion, car_id, conexion, direccion, ahora + self.duracion_concesion)
+        self.siguiente_concesion += 1
+        self.concesiones[concesion.id] = concesion
+        self.por_conexion.setdefault(conexion, {})[concesion.id] = concesion
+        self.rueda.programar(concesion.vence, concesion)
+        self.ocupado = True
+        self.direccion = direccion
+        self.coches += 1
+        self.cruzando.append(car_id)
+        self.politica.registrar_concesion(direccion, ahora)
+        self.version += 1
+        self._anotar(("CONCEDER", concesion.id, car_id, direccion, time.time() + self.duracion_concesion))
+        if conexion is not None:  # Un huérfano recibe el permiso cuando vuelva (_reclamar)
+            self.salida.append(("GRANT_CROSS", conexion, car_id, concesion.id, self.duracion_concesion))
+
+    def _admitir_de_cola(self, direccion, cantidad):
+        """Da paso a hasta `cantidad` carros de la cola de una dirección. Devuelve los ids admitidos."""
+        admitidos = []
+        while len(admitidos) < cantidad:
+            entrada = self.cola.desencolar(direccion)
+            if entrada is None: break
+            self._conceder(entrada.conexion, entrada.car_id, direccion)
+            admitidos.append(entrada.car_id)
+        if admitidos:
+            self.registrar(f"Servidor: Permiso a Carro(s) {', '.join(map(str, admitidos))} ({direccion})", "permiso",
+                           admitidos[0] if len(admitidos) == 1 else None)
+        return admitidos
+
+    def _liberar_concesion(self, concesion, motivo, tipo, vencida=False):
+        """Cierra una concesión, baja su carro del puente y da paso a los siguientes."""
+        self._anotar(("LIBERAR", concesion.id, vencida))
+        concesion.activa = False
+        del self.concesiones[concesion.id]
+        de_conexion = self.por_conexion[concesion.conexion]
+        del de_conexion[concesion.id]
+        if not de_conexion:
+            del self.por_conexion[concesion.conexion]
+        if concesion.car_id in self.cruzando:
+            self.cruzando.remove(concesion.car_id)
+        self.coches -= 1
+        self.version += 1
+        self.registrar(f"Cliente: Carro {concesion.car_id} {motivo}. Restantes: {self.coches}", tipo, concesion.car_id)
+        if self.coches <= 0:
+            self.coches = 0
+            self._siguiente_turno()
+        else:
+            # Con el puente aún ocupado, la política puede dejar entrar a más carros del mismo sentido
+            cantidad = min(self.politica.admitir_mas(self.vista()), self.cupo_libre())
+            if cantidad > 0:
+                self._admitir_de_cola(self.direccion, cantidad)
+
+    def _siguiente_turno(self):
+        """Con el puente vacío, la política elige qué dirección pasa y cuántos carros; si nadie espera, queda libre."""
+        while True:
+            turno = self.politica.elegir_turno(self.vista())
+            if turno is None: break
+            direccion, cantidad = turno
+            if self._admitir_de_cola(direccion, min(cantidad, self.cupo_libre())):
+                return
+        self.ocupado = False
+        self.direccion = None
+        self.coches = 0
+        self.cruzando = []
+        self.politica.reiniciar_turno()
+        self.version += 1
+        self.registrar("Servidor: Puente libre y sin colas.", "libre")
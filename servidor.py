@@ -1,165 +1,1082 @@
 import socket
 import threading
-import json
+import selectors
+import argparse
+import queue
 import time
+import atexit
+import signal
+import sys
+import os
+import json
+import inspect
 from collections import deque
+import politicas
+import estado_compartido
+import protocolo
+import puente
+import diario
+import grabacion
+
+# --- Estado de los puentes ---
+# Cada puente es un puente.Puente que solo modifica su Planificador: los manejadores de
+# conexión interpretan lo que reciben y encolan el comando en el planificador del puente
+# que nombra; cada planificador aplica sus comandos en orden, entrega los permisos que
+# resulten y difunde el estado a los observadores de su puente. Los puentes no comparten
+# nada, así que el tráfico de uno nunca espera por el de otro.
+planificadores = {}  # puente -> Planificador de los puentes de este proceso; los crea main()
+total_puentes = 1    # Puentes del servidor (--puentes), repartidos entre sus procesos
+
+# --- Varios procesos (--procesos N) ---
+# Un proceso de Python no pasa de un núcleo por el GIL. Con --procesos N el servidor arranca
+# N trabajadores en modo eventos, y el trabajador t es dueño de los puentes b con b % N == t.
+# Todos escuchan en el mismo puerto con SO_REUSEPORT y el núcleo reparte las conexiones.
+# Una conexión que llega a un trabajador que no es el dueño del primer puente que usa se
+# traspasa antes de aplicar nada: el descriptor del socket viaja al dueño por un socket
+# Unix (SCM_RIGHTS) junto con lo que ya se leyó y lo que quedaba por enviar. Desde ahí la
+# conexión solo la atiende el dueño, y los procesos no comparten ningún estado.
+# Los observadores se quedan donde llegaron: los puentes de otros trabajadores se siguen con
+# un PuenteRemoto, una copia alimentada por un enlace interno con su dueño, así que un
+# SUBSCRIBE * recibe todos los puentes desde cualquier conexión.
+procesos = 1        # Trabajadores del servidor
+trabajador = 0      # Número de este proceso entre los trabajadores
+traspasos = None    # Con --procesos: socket Unix de datagramas por el que se entregan conexiones a cada trabajador
+enlaces = {}        # Con --procesos: trabajador -> socket con el que este observa sus puentes
+enlaces_servidos = {}  # Con --procesos: trabajador -> socket con el que él observa los puentes de este
+espejos = {}        # puente -> PuenteRemoto de los puentes de otros trabajadores
+MAX_TRASPASO = 256 * 1024  # Bytes de un datagrama de traspaso (cabecera, salida pendiente y entrada leída)
+
+# --- Difusión incremental (STATUS_DELTA) ---
+INTERVALO_KEYFRAME = 50  # Cada cuántas difusiones se envía el estado completo
+MAX_COMANDOS_POR_LOTE = 4096  # Comandos aplicados antes de entregar y difundir, aunque queden más en la cola
+
+# --- Suscripciones al log (LOG_SINCE) ---
+EVENTOS_POR_TANDA = 256  # Eventos por mensaje LOG_ENTRIES
+
+# --- Colas de salida por conexión ---
+LIMITE_COLA_SALIDA = 64 * 1024   # Marca de agua alta (bytes pendientes de enviar)
+TIEMPO_MAX_SOBRE_LIMITE = 5.0    # Segundos para vaciarse tras superar la marca antes de ser desalojado
+estadisticas_lock = threading.Lock()
+desalojos = 0                    # Clientes desconectados por consumir demasiado lento
+actualizaciones_fusionadas = 0   # Difusiones de estado descartadas en favor de un keyframe
+
+class Conexion:
+    """Conexión de un cliente con cola de salida acotada. En modo hilos la vacía un hilo escritor propio."""
+    def __init__(self, client_socket, client_address):
+        self.socket = client_socket
+        self.address = client_address
+        self.buffer_entrada = bytearray()
+        self.rol = None  # "CAR" u "OBSERVER", fijado por el saludo HELLO
+        self.planificadores = set()  # Puentes en los que la conexión está registrada (solo la toca su manejador)
+        self.observados = set()      # Planificadores cuyo estado recibe (SUBSCRIBE)
+        self.anclada = False         # Ya usó carros o log de un puente de este proceso: no se puede traspasar
+        self.codec = protocolo.TEXTO  # El saludo puede negociar BIN1 para el resto de la conexión
+        self.condicion = threading.Condition()
+        self.cola_salida = deque()      # (datos, puente de la difusión de estado o None si es de control)
+        self.keyframes_pendientes = {}  # puente -> keyframe que sustituye a sus difusiones descartadas (cliente retrasado)
+        self.bytes_pendientes = 0       # Encolados más los que se están enviando
+        self.sobre_limite_desde = None
+        self.cerrada = False
+        self.desalojada = False
+
+    def __str__(self):
+        return str(self.address)
+
+    def enviar(self, datos):
+        """Encola un mensaje de control (p. ej. GRANT_CROSS); estos nunca se descartan."""
+        with self.condicion:
+            if self.cerrada:
+                raise BrokenPipeError(f"Conexión {self.address} cerrada")
+            self.cola_salida.append((datos, None))
+            self.bytes_pendientes += len(datos)
+            self._revisar_limite()
+            self._despertar()
+
+    def enviar_estado(self, puente_id, datos, obtener_keyframe):
+        """Encola una difusión de estado del puente `puente_id`.
+
+        Si el cliente va retrasado, las difusiones pendientes de ese puente se fusionan en un
+        keyframe suyo; las de los demás puentes observados siguen en la cola.
+        """
+        global actualizaciones_fusionadas
+        with self.condicion:
+            if self.cerrada: return
+            if self.sobre_limite_desde is None:
+                self.cola_salida.append((datos, puente_id))
+                self.bytes_pendientes += len(datos)
+            else:
+                descartadas = [d for d, puente_msg in self.cola_salida if puente_msg == puente_id]
+                if descartadas:
+                    self.cola_salida = deque(m for m in self.cola_salida if m[1] != puente_id)
+                if puente_id in self.keyframes_pendientes:
+                    descartadas.append(self.keyframes_pendientes[puente_id])
+                keyframe = self.keyframes_pendientes[puente_id] = obtener_keyframe(self.codec)
+                self.bytes_pendientes += len(keyframe) - sum(len(d) for d in descartadas)
+                with estadisticas_lock:
+                    actualizaciones_fusionadas += len(descartadas)
+            self._revisar_limite()
+            self._despertar()
+
+    def revisar_limite(self):
+        """Revisión periódica: desaloja al cliente atascado aunque su puente no le envíe nada más."""
+        with self.condicion:
+            if not self.cerrada:
+                self._revisar_limite()
+
+    def _revisar_limite(self):
+        """Marca al cliente como retrasado al superar la marca de agua y lo desaloja si no se pone al día."""
+        if self.sobre_limite_desde is None:
+            if self.bytes_pendientes > LIMITE_COLA_SALIDA:
+                self.sobre_limite_desde = time.monotonic()
+        elif time.monotonic() - self.sobre_limite_desde > TIEMPO_MAX_SOBRE_LIMITE:
+            self.desalojar()
+
+    def desalojar(self):
+        """Corta la conexión; el manejador del cliente se encarga de la limpieza al detectar el cierre."""
+        global desalojos
+        if self.desalojada: return
+        self.desalojada = True
+        with estadisticas_lock:
+            desalojos += 1
+        print(f"[DESALOJO] {self.address}: {self.bytes_pendientes} bytes pendientes.")
+        try:
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def _tomar(self):
+        """Siguiente bloque a enviar, o None si no hay nada pendiente."""
+        if self.cola_salida:
+            return self.cola_salida.popleft()[0]
+        if self.keyframes_pendientes:
+            return self.keyframes_pendientes.pop(next(iter(self.keyframes_pendientes)))
+        return None
+
+    def _confirmar(self, enviados):
+        self.bytes_pendientes -= enviados
+        if self.bytes_pendientes <= 0:
+            self.bytes_pendientes = 0
+            self.sobre_limite_desde = None  # Se puso al día
+
+    def _despertar(self):
+        self.condicion.notify()
 
-# --- Estado Compartido del Puente ---
-bridge_lock = threading.RLock()
-puente_ocupado = False
-direccion_actual = None
-cola_espera = {"NORTH": [], "SOUTH": []}
-clientes_conectados = []
-coches_en_puente = 0
-carros_cruzando = []
-event_log = deque(maxlen=10) 
-
-def log_event(text):
-    """Añade un evento al log con marca de tiempo."""
-    timestamp = time.strftime("%H:%M:%S")
-    event_log.append(f"[{timestamp}] {text}")
-    notificar_a_todos()
-
-def notificar_a_todos():
-    """Envía el estado actual completo, incluyendo logs y semáforos, a todos los clientes."""
-    with bridge_lock:
-        light_status = "NONE"
-        if puente_ocupado:
-            light_status = direccion_actual
-        
-        estado = {
-            "bridge_status": "OCUPADO" if puente_ocupado else "LIBRE",
-            "current_direction": direccion_actual,
-            "waiting_north": len(cola_espera["NORTH"]),
-            "waiting_south": len(cola_espera["SOUTH"]),
-            "crossing_cars": carros_cruzando[:],
-            "traffic_light": light_status,
-            "log": list(event_log)
-        }
-        mensaje = f"STATUS_UPDATE {json.dumps(estado)}\n"
-        for cliente_socket in clientes_conectados:
+    def iniciar_escritor(self):
+        threading.Thread(target=self._escribir, daemon=True).start()
+
+    def _escribir(self):
+        """Hilo escritor: vacía la cola sin bloquear al planificador."""
+        while True:
+            with self.condicion:
+                datos = self._tomar()
+                while datos is None and not self.cerrada:
+                    self.condicion.wait()
+                    datos = self._tomar()
+                if self.cerrada: return
             try:
-                cliente_socket.sendall(mensaje.encode('utf-8'))
-            except socket.error:
-                continue
+                self.socket.sendall(datos)
+            except OSError:
+                return  # handle_client detectará la desconexión
+            with self.condicion:
+                self._confirmar(len(datos))
+
+    def cerrar(self):
+        with self.condicion:
+            if self.cerrada: return
+            self.cerrada = True
+            self.condicion.notify()
+        self.socket.close()
+
+class ConexionNoBloqueante(Conexion):
+    """Conexión atendida por el bucle de eventos: la cola se vacía cuando el socket admite escritura."""
+    def __init__(self, client_socket, client_address, selector):
+        super().__init__(client_socket, client_address)
+        self.selector = selector
+        self.en_curso = b""  # Resto del bloque enviado parcialmente
+        self.esperando_escritura = False
+
+    def _despertar(self):
+        if not self.esperando_escritura and not self.cerrada:
+            self.esperando_escritura = True
+            self.selector.modify(self.socket, selectors.EVENT_READ | selectors.EVENT_WRITE, self)
+
+    def vaciar(self):
+        """Envía lo pendiente sin bloquear. Devuelve False si la conexión falló."""
+        with self.condicion:
+            while True:
+                if not self.en_curso:
+                    self.en_curso = self._tomar() or b""
+                    if not self.en_curso:
+                        self.esperando_escritura = False
+                        self.selector.modify(self.socket, selectors.EVENT_READ, self)
+                        return True
+                try:
+                    enviados = self.socket.send(self.en_curso)
+                except BlockingIOError:
+                    return True
+                except OSError:
+                    return False
+                self.en_curso = self.en_curso[enviados:]
+                self._confirmar(enviados)
+
+    def cerrar(self):
+        with self.condicion:
+            if self.cerrada: return
+            self.cerrada = True
+        self.selector.unregister(self.socket)
+        self.socket.close()
+# --- Planificador: único escritor del estado de un puente ---
+class Planificador:
+    """Dueño de un Puente: aplica en orden los comandos que encolan los manejadores de conexión.
+
+    Tras cada lote entrega los mensajes que produjeron las transiciones y difunde el estado
+    una sola vez. En modo hilos cada planificador corre en su propio hilo (ejecutar); en modo
+    eventos el bucle llama a procesar_pendientes() de los que tengan trabajo.
+    """
+    def __init__(self, puente):
+        self.puente = puente
+        self.id = puente.id
+        self.comandos = queue.SimpleQueue()  # (función, argumentos)
+        self.clientes = set()
+        self.observadores = []  # Solo estas conexiones reciben STATUS_UPDATE
+        self.suscriptores_log = {}  # conexion -> seq del último evento que se le envió
+        self.publicador = None  # estado_compartido.PublicadorEstado con --memoria-compartida, o None
+        self.grabador = None    # grabacion.Grabador con --grabar, o None
+        self.hilo = None        # Hilo que corre ejecutar() en modo hilos
+        self.activo = True
+        # --- Caché del estado serializado ---
+        self.snapshots = {}           # codec -> (versión, STATUS_UPDATE ya codificado)
+        self.version_difundida = -1   # Última versión enviada a los observadores
+        self.log_seq_difundido = 0
+        self.estado_difundido = None  # Campos enviados en la última difusión (sin el log)
+        self.difusiones_sin_keyframe = 0
+
+    def encolar(self, funcion, *args):
+        """Pide una transición; se puede llamar desde cualquier hilo."""
+        self.comandos.put((funcion, args))
+
+    def ejecutar(self):
+        """Hilo del modo hilos: espera comandos y, entre medias, hace avanzar la rueda de concesiones.
+
+        Cada resolución de la rueda revisa también las colas de salida de sus clientes: el escritor
+        de un cliente atascado está bloqueado en sendall y no puede revisarse a sí mismo.
+        """
+        proxima_revision = time.monotonic()
+        while self.activo:
+            try:
+                funcion, args = self.comandos.get(timeout=self.puente.rueda.resolucion)
+            except queue.Empty:
+                pass
+            else:
+                self._aplicar(funcion, args)
+            self.procesar_pendientes()
+            if time.monotonic() >= proxima_revision:
+                proxima_revision = time.monotonic() + self.puente.rueda.resolucion
+                for conexion in self.clientes:
+                    conexion.revisar_limite()
+
+    def procesar_pendientes(self):
+        """Aplica los comandos encolados, reclama concesiones vencidas, entrega los mensajes y difunde una vez."""
+        for _ in range(MAX_COMANDOS_POR_LOTE):
+            try:
+                funcion, args = self.comandos.get_nowait()
+            except queue.Empty:
+                break
+            self._aplicar(funcion, args)
+        self.puente.revisar_concesiones()
+        self.entregar()
+        self.notificar()
+        self.difundir_log()
+        if self.puente.diario is not None:
+            if self.puente.diario.anotados >= diario.REGISTROS_POR_SNAPSHOT:
+                self.puente.diario.compactar(self.puente.instantanea())
+            else:
+                self.puente.diario.confirmar()
+
+    def _aplicar(self, funcion, args):
+        try:
+            funcion(*args)
+        except Exception as e:
+            # Un comando defectuoso no debe detener al único escritor del puente
+            print(f"[ERROR] {funcion.__name__}{args}: {e!r}")
+
+    def cerrar(self):
+        """Escribe lo pendiente del diario y cierra la grabación y la memoria compartida.
 
-def gestionar_siguiente_carro():
-    """Lógica justa para decidir qué carro cruza a continuación."""
-    global puente_ocupado, direccion_actual, coches_en_puente, carros_cruzando
-    with bridge_lock:
-        if direccion_actual == "NORTH":
-            direcciones_a_chequear = ["SOUTH", "NORTH"]
+        Solo desde el escritor del puente, o con su hilo ya detenido (cerrar_planificadores).
+        """
+        if self.puente.diario is not None:
+            self.puente.diario.cerrar()
+        if self.grabador is not None:
+            self.grabador.cerrar()
+        if self.publicador is not None:
+            self.publicador.cerrar()
+
+    # --- Comandos propios (el resto son transiciones del Puente) ---
+    def detener(self):
+        """Último comando del hilo del planificador: ejecutar() termina al acabar este lote."""
+        self.activo = False
+
+    def registrar_cliente(self, conexion):
+        self.clientes.add(conexion)
+
+    def olvidar(self, conexion):
+        """La conexión pasó a otro trabajador (solo observaba): sin pasar por el Puente ni el log."""
+        self.clientes.discard(conexion)
+        self.dejar_de_observar(conexion)
+
+    def desconectar(self, conexion):
+        """Quita la conexión de los clientes, de los observadores y del puente."""
+        if conexion not in self.clientes: return
+        self.clientes.discard(conexion)
+        if conexion in self.observadores:
+            self.observadores.remove(conexion)
+        self.suscriptores_log.pop(conexion, None)
+        self.puente.desconectar(conexion)
+        if conexion.desalojada:
+            self.puente.registrar(f"Sistema: Cliente {conexion.address} desalojado por consumo lento.")
         else:
-            direcciones_a_chequear = ["NORTH", "SOUTH"]
-
-        for dir in direcciones_a_chequear:
-            if len(cola_espera[dir]) > 0:
-                cliente_socket, client_address, car_id = cola_espera[dir].pop(0)
-                puente_ocupado = True
-                direccion_actual = dir
-                coches_en_puente = 1
-                carros_cruzando = [car_id]
-                log_event(f"Servidor: Permiso a Carro {car_id} ({dir})")
+            self.puente.registrar(f"Sistema: Cliente {conexion.address} desconectado.")
+
+    def observar(self, conexion):
+        """HELLO OBSERVER o SUBSCRIBE: estado inicial y alta en la difusión."""
+        self.enviar_keyframe(conexion)
+        if conexion not in self.observadores:
+            self.observadores.append(conexion)
+
+    def dejar_de_observar(self, conexion):
+        if conexion in self.observadores:
+            self.observadores.remove(conexion)
+
+    def enviar_keyframe(self, conexion):
+        """Envía el estado completo a una conexión, alineado con la secuencia de deltas."""
+        self.entregar()
+        self.notificar()  # Difundir antes lo pendiente para que el próximo delta parta de esta versión
+        conexion.enviar_estado(self.id, self.obtener_snapshot(conexion.codec), self.obtener_snapshot)
+
+    def suscribir_log(self, conexion, seq=None):
+        """LOG_SINCE [<seq>]: desde ahora la conexión recibe los eventos posteriores a `seq` (sin seq, solo los nuevos)."""
+        ultimo = self.puente.log.seq
+        if seq is None:
+            seq = ultimo
+        elif seq > ultimo:
+            seq = 0  # Secuencia de un servidor anterior: todo lo que conserva este es nuevo para el cliente
+        self.suscriptores_log[conexion] = seq
+
+    # --- Salida ---
+    def entregar(self):
+        """Envía los permisos, avisos de vencimiento y rechazos que dejaron las transiciones."""
+        for mensaje in self.puente.tomar_mensajes():
+            conexion = mensaje[1]
+            if mensaje[0] == "GRANT_CROSS":
+                datos = conexion.codec.permiso(*mensaje[2:])
+            elif mensaje[0] == "ERROR":
+                datos = conexion.codec.error(mensaje[2])
+            else:
+                datos = conexion.codec.vencida(*mensaje[2:])
+            try:
+                conexion.enviar(datos)
+            except OSError:
+                pass  # Su desconexión ya está encolada y liberará la concesión
+
+    def construir_estado(self):
+        """Campos del estado del puente, sin el log."""
+        return self.puente.estado(desalojos)
+
+    def obtener_snapshot(self, codec=protocolo.TEXTO):
+        """Devuelve el STATUS_UPDATE (keyframe) de la versión actual, construyéndolo una sola vez por versión y codec."""
+        version, datos = self.snapshots.get(codec, (-1, b""))
+        if version == self.puente.version:
+            return datos
+        estado = self.construir_estado()
+        estado["seq"] = self.puente.version
+        estado["log"] = self.puente.log.lineas()
+        datos = codec.keyframe(estado)
+        self.snapshots[codec] = (self.puente.version, datos)
+        return datos
+
+    def construir_delta(self, estado, codec=protocolo.TEXTO):
+        """STATUS_DELTA con los campos que cambiaron y las entradas nuevas del log desde la última difusión."""
+        cambios = {k: v for k, v in estado.items() if self.estado_difundido.get(k) != v}
+        log_nuevo = self.puente.log.lineas(self.log_seq_difundido)
+        return codec.delta(estado, self.puente.version, self.version_difundida, cambios, log_nuevo)
+
+    def notificar(self):
+        """Difunde el estado a los observadores: un keyframe cada INTERVALO_KEYFRAME difusiones y deltas entre medias.
+
+        Con --memoria-compartida también escribe el estado en el bloque compartido, y con --grabar lo graba.
+        """
+        p = self.puente
+        if self.version_difundida == p.version:
+            return  # Nada cambió desde la última difusión
+        estado = (self.construir_estado() if self.observadores or self.publicador is not None or self.grabador is not None
+                  else None)
+        if self.publicador is not None:
+            self.publicador.publicar(p.version, estado, p.log.lineas())
+        if self.grabador is not None:
+            self.grabador.anotar({"seq": p.version, **estado}, p.log.lineas(), log_seq=p.log.seq)
+        if not self.observadores:
+            # Nadie escucha: no hace falta serializar; el próximo observador recibirá un keyframe
+            self.version_difundida = p.version
+            self.log_seq_difundido = p.log.seq
+            self.estado_difundido = None
+            return
+        es_keyframe = (self.estado_difundido is None or self.difusiones_sin_keyframe >= INTERVALO_KEYFRAME
+                       or p.log.seq - self.log_seq_difundido > puente.MAX_LOG)
+        mensajes = {}  # Cada codec se codifica una sola vez para todos sus observadores
+        for conexion in self.observadores:
+            codec = conexion.codec
+            if codec not in mensajes:
+                mensajes[codec] = self.obtener_snapshot(codec) if es_keyframe else self.construir_delta(estado, codec)
+            conexion.enviar_estado(self.id, mensajes[codec], self.obtener_snapshot)
+        self.difusiones_sin_keyframe = 0 if es_keyframe else self.difusiones_sin_keyframe + 1
+        self.version_difundida = p.version
+        self.log_seq_difundido = p.log.seq
+        self.estado_difundido = estado
+
+    def difundir_log(self):
+        """Envía a cada suscriptor de LOG_SINCE los eventos que aún no tiene, en tandas de EVENTOS_POR_TANDA."""
+        log = self.puente.log
+        tandas = {}  # (codec, seq) -> (LOG_ENTRIES codificado, seq de su último evento), compartido entre suscriptores al día
+        for conexion, seq in self.suscriptores_log.items():
+            while seq < log.seq:
+                clave = (conexion.codec, seq)
+                if clave not in tandas:
+                    eventos = log.desde(seq, EVENTOS_POR_TANDA)
+                    tandas[clave] = (conexion.codec.eventos(eventos, self.puente.id), eventos[-1][0])
+                datos, ultimo = tandas[clave]
                 try:
-                    cliente_socket.send("GRANT_CROSS\n".encode('utf-8'))
-                except (socket.error, BrokenPipeError):
-                    log_event(f"Error: Cliente {car_id} desconectado.")
-                    coches_en_puente = 0
-                    carros_cruzando = []
-                    gestionar_siguiente_carro()
-                notificar_a_todos()
+                    conexion.enviar(datos)
+                except OSError:
+                    break  # Su desconexión ya está encolada
+                seq = ultimo
+            self.suscriptores_log[conexion] = seq
+
+# --- Réplica de los puentes de otros trabajadores ---
+class PuenteRemoto:
+    """Copia del estado de un puente de otro trabajador, para los observadores de este.
+
+    Tiene el mismo interfaz que un Planificador para observar, dejar de observar, RESYNC y
+    desconexión. Se suscribe al dueño por el enlace interno mientras alguien la observa y
+    reenvía cada keyframe y delta en el codec de cada observador.
+    """
+    def __init__(self, puente_id, enlace):
+        self.id = puente_id
+        self.enlace = enlace
+        self.estado = None  # Campos del último estado recibido, con seq; None hasta el primer keyframe
+        self.log = deque(maxlen=puente.MAX_LOG)
+        self.observadores = []
+
+    def encolar(self, funcion, *args):
+        """Solo hay modo eventos con --procesos: se aplica en el acto."""
+        funcion(*args)
+
+    def registrar_cliente(self, conexion):
+        pass
+
+    def observar(self, conexion):
+        if conexion in self.observadores: return
+        self.observadores.append(conexion)
+        if len(self.observadores) == 1:
+            self.enlace.suscribir(self.id)  # El dueño contestará con un keyframe para todos
+        else:
+            self.enviar_keyframe(conexion)
+
+    def dejar_de_observar(self, conexion):
+        if conexion not in self.observadores: return
+        self.observadores.remove(conexion)
+        if not self.observadores:
+            self.enlace.desuscribir(self.id)
+            self.estado = None
+
+    desconectar = olvidar = dejar_de_observar
+
+    def obtener_snapshot(self, codec=protocolo.TEXTO):
+        return codec.keyframe({**self.estado, "log": list(self.log)})
+
+    def enviar_keyframe(self, conexion):
+        if self.estado is not None:
+            conexion.enviar_estado(self.id, self.obtener_snapshot(conexion.codec), self.obtener_snapshot)
+
+    def recibir(self, mensaje):
+        """STATUS_UPDATE o STATUS_DELTA del dueño: actualiza la copia y la reenvía."""
+        tipo, datos = mensaje
+        if tipo == "STATUS_UPDATE":
+            self.log.clear()
+            self.log.extend(datos.pop("log"))
+            self.estado = datos
+            codificar = self.obtener_snapshot
+        else:
+            if self.estado is None or datos["base"] != self.estado["seq"]:
+                self.enlace.pedir_keyframe(self.id)
                 return
+            cambios = {clave: valor for clave, valor in datos["changes"].items() if self.estado.get(clave) != valor}
+            self.estado = {**self.estado, **cambios, "seq": datos["seq"]}
+            self.log.extend(datos["log"])
+            codificar = lambda codec: codec.delta(self.estado, datos["seq"], datos["base"], cambios, datos["log"])
+        mensajes = {}
+        for conexion in self.observadores:
+            if conexion.codec not in mensajes:
+                mensajes[conexion.codec] = codificar(conexion.codec)
+            conexion.enviar_estado(self.id, mensajes[conexion.codec], self.obtener_snapshot)
+
+class Enlace:
+    """Extremo cliente del enlace interno con otro trabajador: un observador BIN1 de sus puentes."""
+    def __init__(self, numero, enlace_socket, selector):
+        self.numero = numero
+        self.selector = selector
+        self.socket = enlace_socket
+        self.socket.settimeout(1.0)  # Las lecturas las avisa el selector; los envíos son tramas pequeñas
+        self.buffer = bytearray()
+        self.suscritos = set()
+
+    def suscribir(self, puente_id):
+        self.suscritos.add(puente_id)
+        self.socket.sendall(protocolo.BINARIO.suscripcion(sorted(self.suscritos)))
+
+    def desuscribir(self, puente_id):
+        self.suscritos.discard(puente_id)
+        self.socket.sendall(protocolo.BINARIO.suscripcion(sorted(self.suscritos)))
+
+    def pedir_keyframe(self, puente_id):
+        self.socket.sendall(protocolo.BINARIO.resync(puente_id))
+
+    def __call__(self):
+        """El selector avisa de datos del dueño: se reparten entre sus PuenteRemoto."""
+        datos = self.socket.recv(65536)
+        if not datos:
+            print(f"[ERROR] El trabajador {self.numero} cerró el enlace interno.")
+            self.selector.unregister(self.socket)
+            return
+        self.buffer += datos
+        pos = 0
+        while True:
+            mensaje, pos = protocolo.BINARIO.extraer_respuesta(self.buffer, pos)
+            if mensaje is None: break
+            if mensaje[0] in ("STATUS_UPDATE", "STATUS_DELTA"):
+                espejos[mensaje[1]["bridge"]].recibir(mensaje)
+        del self.buffer[:pos]
+
+# --- Manejadores de conexión: interpretan y encolan ---
+class PuenteAjeno(ValueError):
+    """Comando de carro o de log para un puente que atiende otro trabajador, en una conexión ya anclada a este."""
+
+def planificador_de(conexion, puente_id, remoto=False):
+    """Planificador del puente `puente_id`; la primera vez que la conexión lo usa, la registra en él.
 
-        # Si no hay nadie esperando, el puente queda libre
-        puente_ocupado = False
-        direccion_actual = None
-        coches_en_puente = 0
-        carros_cruzando = []
-        log_event("Servidor: Puente libre y sin colas.")
-        notificar_a_todos()
+    Con remoto=True (solo para observar) un puente de otro trabajador da su PuenteRemoto.
+    """
+    puente_id = int(puente_id)
+    planificador = planificadores.get(puente_id) or (espejos.get(puente_id) if remoto else None)
+    if planificador is None:
+        if 0 <= puente_id < total_puentes:
+            raise PuenteAjeno(f"El puente {puente_id} lo atiende otro proceso")
+        raise ValueError(f"Puente desconocido: {puente_id}")
+    if not remoto:
+        conexion.anclada = True
+    if planificador not in conexion.planificadores:
+        conexion.planificadores.add(planificador)
+        planificador.encolar(planificador.registrar_cliente, conexion)
+    return planificador
+
+def observar(conexion, puentes):
+    """Deja a la conexión observando exactamente los puentes dados (un keyframe por cada puente nuevo)."""
+    nuevos = {planificador_de(conexion, puente_id, remoto=True) for puente_id in puentes}
+    for planificador in conexion.observados - nuevos:
+        planificador.encolar(planificador.dejar_de_observar, conexion)
+    for planificador in nuevos - conexion.observados:
+        planificador.encolar(planificador.observar, conexion)
+    conexion.observados = nuevos
+
+def interpretar_comando(conexion, partes):
+    """Traduce un comando (palabras de texto o trama BIN1 decodificada) a la transición que aplicará el planificador de su puente.
+
+    HELLO se resuelve aquí mismo: el rol y el codec deciden cómo se lee el resto del flujo.
+    Los comandos sin número de puente van al puente 0.
+    """
+    if not partes: return
+    comando = partes[0]
+
+    if comando == "HELLO":
+        rol = partes[1] if len(partes) > 1 else ""
+        if rol not in ("CAR", "OBSERVER"):
+            conexion.enviar(conexion.codec.error(f"Rol desconocido: {rol}"))
+            return
+        if conexion.rol is None and len(partes) > 2:
+            # HELLO <rol> <versión>: se confirma en texto y desde aquí se usa el codec acordado
+            codec = protocolo.codec_para(partes[2])
+            conexion.enviar(f"WELCOME {codec.nombre}\n".encode('utf-8'))
+            conexion.codec = codec
+        conexion.rol = rol
+        if rol == "OBSERVER" and not conexion.observados:
+            observar(conexion, [0])
+
+    elif comando == "SUBSCRIBE":
+        # SUBSCRIBE <puente> [<puente> ...] | SUBSCRIBE *: puentes cuyo estado recibe el observador
+        if conexion.rol == "OBSERVER":
+            observar(conexion, range(total_puentes) if partes[1:] == ["*"] else partes[1:])
+
+    elif comando == "RESYNC":
+        # RESYNC [<puente>]: el observador detectó un hueco en la secuencia de deltas de un puente (o de todos)
+        if conexion.rol == "OBSERVER":
+            observados = [planificador_de(conexion, partes[1], remoto=True)] if len(partes) > 1 else conexion.observados
+            for planificador in observados:
+                planificador.encolar(planificador.enviar_keyframe, conexion)
+
+    elif comando == "REQUEST_CROSS":
+        # REQUEST_CROSS [<puente>] <dir> <car_id>
+        puente_id, direccion, car_id = partes[1:] if len(partes) > 3 else (0, *partes[1:3])
+        car_id = protocolo.id_32(car_id)
+        if direccion not in ("NORTH", "SOUTH"):
+            raise ValueError(f"Dirección desconocida: {direccion}")
+        planificador = planificador_de(conexion, puente_id)
+        planificador.encolar(planificador.puente.solicitar, conexion, car_id, direccion)
+
+    elif comando == "RELEASE_BRIDGE":
+        if len(partes) > 3:
+            # RELEASE_BRIDGE <puente> <lease_id> <car_id>; lease_id 0 = la más antigua, car_id -1 = sin comprobar
+            puente_id, lease_id, car_id = int(partes[1]), protocolo.id_32(partes[2]), protocolo.id_32(partes[3])
+            lease_id = lease_id or None
+            car_id = car_id if car_id >= 0 else None
+        else:
+            # RELEASE_BRIDGE <lease_id> [<car_id>] en el puente 0; sin id se libera la concesión más antigua de la conexión
+            puente_id = 0
+            lease_id = protocolo.id_32(partes[1]) if len(partes) > 1 else None
+            car_id = protocolo.id_32(partes[2]) if len(partes) > 2 else None
+        planificador = planificador_de(conexion, puente_id)
+        planificador.encolar(planificador.puente.liberar, conexion, lease_id, car_id)
+
+    elif comando == "LOG_SINCE":
+        # LOG_SINCE [<seq> [<puente>]]: suscripción al log de un puente en tandas de LOG_ENTRIES (seq -1 = solo los nuevos)
+        seq = int(partes[1]) if len(partes) > 1 else -1
+        planificador = planificador_de(conexion, partes[2] if len(partes) > 2 else 0)
+        planificador.encolar(planificador.suscribir_log, conexion, seq if seq >= 0 else None)
+
+def procesar_datos(conexion, datos):
+    """Acumula los bytes recibidos y encola los comandos completos.
+
+    Una conexión compartida por muchos carros envía en una sola escritura las solicitudes
+    y liberaciones de todos ellos; el planificador las aplica seguidas y difunde una sola vez.
+    """
+    buf = conexion.buffer_entrada
+    buf += datos
+    try:
+        # Hasta el saludo se lee línea a línea: HELLO puede cambiar el codec del resto del flujo
+        pos = 0
+        while conexion.rol is None:
+            partes, pos = protocolo.TEXTO.extraer_comando(buf, pos)
+            if partes is None: break
+            interpretar_comando_seguro(conexion, partes)
+        del buf[:pos]
+        if traspasos is not None and conexion.rol is not None and not conexion.anclada:
+            destino = trabajador_destino(conexion)
+            if destino is not None:
+                traspasar(conexion, destino)
+                return
+        if conexion.rol is not None:
+            comandos, pos = conexion.codec.extraer_comandos(buf)
+            del buf[:pos]
+            for partes in comandos:
+                interpretar_comando_seguro(conexion, partes)
+    except (protocolo.ErrorProtocolo, UnicodeDecodeError) as e:
+        # Sin forma de encontrar el siguiente mensaje: se avisa y se corta la lectura
+        buf.clear()
+        conexion.enviar(conexion.codec.error(f"Flujo no válido: {e}"))
+        try:
+            conexion.socket.shutdown(socket.SHUT_RD)
+        except OSError:
+            pass
+
+def interpretar_comando_seguro(conexion, partes):
+    """Interpreta un comando y contesta ERROR si está mal formado, sin interrumpir el resto del lote."""
+    try:
+        interpretar_comando(conexion, partes)
+    except PuenteAjeno:
+        conexion.enviar(conexion.codec.error(f"Puente de otro proceso: {' '.join(map(str, partes))}"))
+    except (ValueError, IndexError):
+        conexion.enviar(conexion.codec.error(f"Comando mal formado: {' '.join(map(str, partes))}"))
+
+def puente_del_comando(partes):
+    """Puente que nombra un comando de carro o de log, o None si el comando no es de un puente."""
+    comando = partes[0] if partes else None
+    try:
+        if comando in ("REQUEST_CROSS", "RELEASE_BRIDGE"):
+            return int(partes[1]) if len(partes) > 3 else 0
+        if comando == "LOG_SINCE":
+            return int(partes[2]) if len(partes) > 2 else 0
+    except ValueError:
+        pass
+    return None
+
+def trabajador_destino(conexion):
+    """Trabajador al que hay que traspasar una conexión aún no anclada, o None si el primer puente que usa es de este."""
+    comandos, _ = conexion.codec.extraer_comandos(conexion.buffer_entrada)
+    for partes in comandos:
+        puente_id = puente_del_comando(partes)
+        if puente_id is None: continue
+        if puente_id in planificadores or not 0 <= puente_id < total_puentes:
+            return None  # Se atiende aquí (o se contesta el error aquí)
+        return puente_id % procesos
+    return None
+
+def traspasar(conexion, destino):
+    """Entrega el socket al trabajador `destino` con lo leído, lo pendiente de enviar y los puentes que observa, y lo olvida aquí."""
+    with conexion.condicion:
+        salida = conexion.en_curso + b"".join(datos for datos, _ in conexion.cola_salida)
+    cabecera = json.dumps({"rol": conexion.rol, "codec": conexion.codec.nombre, "direccion": list(conexion.address),
+                           "observados": sorted(p.id for p in conexion.observados), "salida": len(salida)}).encode('utf-8')
+    mensaje = cabecera + b"\n" + salida + bytes(conexion.buffer_entrada)
+    try:
+        if len(mensaje) > MAX_TRASPASO:
+            raise OSError(f"{len(mensaje)} bytes por traspasar")
+        socket.send_fds(traspasos[destino], [mensaje], [conexion.socket.fileno()])
+    except OSError as e:
+        print(f"[ERROR] No se pudo traspasar {conexion.address} al trabajador {destino}: {e}")
+        conexion.enviar(conexion.codec.error("No se pudo entregar la conexión al proceso de su puente"))
+        return
+    conexion.cerrar()  # Cierra solo este descriptor: el trabajador destino tiene el suyo
+    for planificador in conexion.planificadores:
+        planificador.encolar(planificador.olvidar, conexion)
+
+def recibir_traspasos(selector):
+    """Adopta las conexiones que otros trabajadores entregan a este."""
+    while True:
+        try:
+            mensaje, descriptores, _, _ = socket.recv_fds(traspasos[trabajador], MAX_TRASPASO, 1)
+        except BlockingIOError:
+            return
+        if not descriptores: continue
+        cabecera, _, resto = mensaje.partition(b"\n")
+        datos = json.loads(cabecera)
+        client_socket = socket.socket(fileno=descriptores[0])
+        client_socket.setblocking(False)
+        conexion = ConexionNoBloqueante(client_socket, tuple(datos["direccion"]), selector)
+        conexion.rol = datos["rol"]
+        conexion.codec = protocolo.codec_para(datos["codec"])
+        selector.register(client_socket, selectors.EVENT_READ, conexion)
+        if datos["salida"]:
+            conexion.enviar(resto[:datos["salida"]])
+        if datos["observados"]:
+            observar(conexion, datos["observados"])  # Un keyframe de cada uno, detrás de lo que quedaba por enviar
+        procesar_datos(conexion, resto[datos["salida"]:])
+
+def registrar_cliente(conexion):
+    """Conexión nueva; se registra en cada puente cuando lo usa por primera vez (planificador_de)."""
+    print(f"[NUEVA CONEXIÓN] {conexion.address} conectado.")
+
+def desconectar_cliente(conexion):
+    """Cierra la conexión y pide a los planificadores de sus puentes que la retiren de las colas."""
+    conexion.cerrar()
+    for planificador in conexion.planificadores:
+        planificador.encolar(planificador.desconectar, conexion)
 
 def handle_client(client_socket, client_address):
-    global puente_ocupado, direccion_actual, coches_en_puente, carros_cruzando
-    print(f"[NUEVA CONEXIÓN] {client_address} conectado.")
-    with bridge_lock:
-        clientes_conectados.append(client_socket)
-    
-    notificar_a_todos() # Enviar estado inicial
+    conexion = Conexion(client_socket, client_address)
+    conexion.iniciar_escritor()
+    registrar_cliente(conexion)
 
     try:
         while True:
-            mensaje = client_socket.recv(1024).decode('utf-8').strip()
-            if not mensaje: break
-
-            partes = mensaje.split()
-            comando = partes[0]
-
-            if comando == "REQUEST_CROSS":
-                direccion = partes[1]
-                car_id = int(partes[2])
-                with bridge_lock:
-                    log_event(f"Cliente: Carro {car_id} solicita cruce ({direccion})")
-                    opuesta = "NORTH" if direccion == "SOUTH" else "SOUTH"
-                    
-                    if not puente_ocupado or (direccion_actual == direccion and len(cola_espera[opuesta]) == 0):
-                        puente_ocupado = True
-                        direccion_actual = direccion
-                        coches_en_puente += 1
-                        if car_id not in carros_cruzando:
-                            carros_cruzando.append(car_id)
-                        log_event(f"Servidor: Permiso inmediato a Carro {car_id}")
-                        try:
-                            client_socket.send("GRANT_CROSS\n".encode('utf-8'))
-                        except socket.error:
-                            coches_en_puente -= 1
-                            if car_id in carros_cruzando: carros_cruzando.remove(car_id)
-                    else:
-                        log_event(f"Servidor: Encolado Carro {car_id} ({direccion})")
-                        cola_espera[direccion].append((client_socket, client_address, car_id))
-                notificar_a_todos()
-
-            elif comando == "RELEASE_BRIDGE":
-                car_id_released = -1
-                with bridge_lock:
-
-                    if carros_cruzando: car_id_released = carros_cruzando[0]
-
-                    coches_en_puente -= 1
-                    if car_id_released != -1 and car_id_released in carros_cruzando:
-                        carros_cruzando.remove(car_id_released)
-                    
-                    log_event(f"Cliente: Carro liberó el puente. Restantes: {coches_en_puente}")
-                    if coches_en_puente <= 0:
-                        coches_en_puente = 0
-                        gestionar_siguiente_carro()
-                notificar_a_todos()
-
-    except (ConnectionResetError, BrokenPipeError):
+            datos = client_socket.recv(65536)
+            if not datos: break
+            procesar_datos(conexion, datos)
+
+    except OSError:
         print(f"[DESCONEXIÓN] {client_address} se desconectó.")
     finally:
-        with bridge_lock:
-            if client_socket in clientes_conectados:
-                clientes_conectados.remove(client_socket)
-            for dir in cola_espera:
-                cola_espera[dir] = [(s, a, cid) for s, a, cid in cola_espera[dir] if s != client_socket]
-        client_socket.close()
-        log_event(f"Sistema: Cliente {client_address} desconectado.")
-
-def main():
-    HOST = '127.0.0.1'
-    PORT = 65432
-    
-    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    server.bind((HOST, PORT))
-    server.listen()
-    print(f"[ESCUCHANDO] El servidor está escuchando en {HOST}:{PORT}")
-    log_event("Servidor iniciado y escuchando.")
+        desconectar_cliente(conexion)
 
+def servir_con_hilos(server):
+    """Modelo original: un hilo por conexión, más un hilo por planificador."""
+    for planificador in planificadores.values():
+        planificador.hilo = threading.Thread(target=planificador.ejecutar, daemon=True)
+        planificador.hilo.start()
     while True:
         client_socket, client_address = server.accept()
+        client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
         thread = threading.Thread(target=handle_client, args=(client_socket, client_address))
         thread.daemon = True
         thread.start()
 
+def servir_con_eventos(server):
+    """Atiende todas las conexiones en un único bucle con sockets no bloqueantes.
+
+    Al final de cada vuelta corren los planificadores con comandos pendientes, y todos cada
+    resolución de la rueda para reclamar concesiones vencidas. Con la misma frecuencia se revisan
+    las colas de salida, para desalojar a los clientes atascados en puentes sin actividad.
+    """
+    selector = selectors.DefaultSelector()
+    server.setblocking(False)
+    selector.register(server, selectors.EVENT_READ, None)
+    if traspasos is not None:
+        registrar_canales_internos(selector)
+    resolucion = next(iter(planificadores.values())).puente.rueda.resolucion
+    proxima_revision = time.monotonic()
+
+    while True:
+        eventos = selector.select(timeout=resolucion)
+        for key, mask in eventos:
+            if callable(key.data):
+                key.data()  # Canal interno entre trabajadores
+                continue
+            if key.data is None:
+                try:
+                    client_socket, client_address = server.accept()
+                except BlockingIOError:
+                    continue
+                client_socket.setblocking(False)
+                client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                conexion = ConexionNoBloqueante(client_socket, client_address, selector)
+                selector.register(client_socket, selectors.EVENT_READ, conexion)
+                registrar_cliente(conexion)
+                continue
+
+            conexion = key.data
+            if conexion.cerrada: continue
+            if mask & selectors.EVENT_WRITE and not conexion.vaciar():
+                desconectar_cliente(conexion)
+                continue
+            if mask & selectors.EVENT_READ:
+                try:
+                    datos = conexion.socket.recv(65536)
+                except BlockingIOError:
+                    continue
+                except OSError:
+                    print(f"[DESCONEXIÓN] {conexion.address} se desconectó.")
+                    datos = b""
+                if not datos:
+                    desconectar_cliente(conexion)
+                    continue
+                procesar_datos(conexion, datos)
+        revisar_todos = time.monotonic() >= proxima_revision
+        if revisar_todos:
+            proxima_revision = time.monotonic() + resolucion
+            for key in list(selector.get_map().values()):
+                if isinstance(key.data, Conexion):
+                    key.data.revisar_limite()
+        for planificador in planificadores.values():
+            if revisar_todos or not planificador.comandos.empty():
+                planificador.procesar_pendientes()
+
+def registrar_canales_internos(selector):
+    """Trabajador: socket de traspasos, enlaces como cliente y los extremos por los que lo observan los demás."""
+    traspasos[trabajador].setblocking(False)
+    selector.register(traspasos[trabajador], selectors.EVENT_READ, lambda: recibir_traspasos(selector))
+    for numero, enlace_socket in enlaces_servidos.items():
+        # Un observador BIN1 más, ya saludado
+        enlace_socket.setblocking(False)
+        conexion = ConexionNoBloqueante(enlace_socket, ("trabajador", numero), selector)
+        conexion.rol, conexion.codec = "OBSERVER", protocolo.BINARIO
+        selector.register(enlace_socket, selectors.EVENT_READ, conexion)
+    por_trabajador = {numero: Enlace(numero, enlace_socket, selector) for numero, enlace_socket in enlaces.items()}
+    for enlace in por_trabajador.values():
+        selector.register(enlace.socket, selectors.EVENT_READ, enlace)
+    for puente_id in range(total_puentes):
+        if puente_id not in planificadores:
+            espejos[puente_id] = PuenteRemoto(puente_id, por_trabajador[puente_id % procesos])
+
+def ruta_de_puente(ruta, planificador):
+    """Con varios puentes, cada uno tiene su archivo: RUTA.<puente>."""
+    return ruta if total_puentes == 1 else f"{ruta}.{planificador.puente.id}"
+
+def iniciar_memoria_compartida(nombre):
+    """Crea el bloque de estado compartido del puente 0 y lo borra al terminar (también con SIGTERM, como lo detiene main.py)."""
+    planificador = planificadores[0]
+    publicador = estado_compartido.PublicadorEstado(nombre)
+    publicador.publicar(planificador.puente.version, planificador.construir_estado(), planificador.puente.log.lineas())
+    planificador.publicador = publicador
+
+def iniciar_diario(planificador, ruta):
+    """Recupera el estado del diario en RUTA, si lo hay, y empieza a anotar en él las transiciones del puente."""
+    inicio = time.perf_counter()
+    registros, largo_valido = diario.leer(ruta)
+    if registros:
+        planificador.puente.restaurar(registros)
+        print(f"[DIARIO] {len(registros)} registros recuperados de {ruta} en {(time.perf_counter() - inicio) * 1000:.0f} ms")
+    escritor = diario.Diario(ruta, largo_valido)
+    planificador.puente.diario = escritor
+    escritor.compactar(planificador.puente.instantanea())  # Empieza con un diario compacto
+
+def iniciar_grabacion(planificador, ruta):
+    """Graba cada estado difundido del puente en RUTA (grabacion.py) hasta que el servidor termine."""
+    planificador.grabador = grabacion.Grabador(ruta)
+
+def cerrar_planificadores():
+    """Al terminar (también con SIGTERM, como lo detiene main.py): diario, grabación y memoria compartida.
+
+    En modo hilos cada planificador sigue corriendo mientras se ejecuta atexit, así que primero
+    se le pide que se detenga y se espera a su hilo; solo entonces se cierra lo que escribe.
+    """
+    for planificador in planificadores.values():
+        if planificador.hilo is not None:
+            planificador.encolar(planificador.detener)
+            planificador.hilo.join(timeout=5)
+            if planificador.hilo.is_alive():
+                print(f"[ERROR] El planificador del puente {planificador.id} no se detuvo; no se cierra su diario.")
+                continue
+        planificador.cerrar()
+
+def abrir_escucha(host, port, reutilizar_puerto=False):
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reutilizar_puerto:
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    server.bind((host, port))
+    server.listen(socket.SOMAXCONN)
+    return server
+
+def lanzar_trabajadores(server, host, port):
+    """Crea los canales internos y un proceso por trabajador; en cada trabajador devuelve su socket de escucha.
+
+    El proceso original se queda supervisando y no vuelve de aquí.
+    """
+    global trabajador, traspasos
+    # Traspasos: datagramas Unix, así varios trabajadores pueden escribir al mismo sin mezclar mensajes
+    pares_traspaso = [socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM) for _ in range(procesos)]
+    pares_enlace = {(i, j): socket.socketpair() for i in range(procesos) for j in range(procesos) if i != j}  # i observa a j
+    hijos = []
+    for numero in range(procesos):
+        pid = os.fork()
+        if pid == 0:
+            trabajador = numero
+            traspasos = []
+            for destino, (envio, recepcion) in enumerate(pares_traspaso):
+                propio, ajeno = (recepcion, envio) if destino == numero else (envio, recepcion)
+                propio.settimeout(1.0)  # Un trabajador atascado no bloquea a los demás
+                traspasos.append(propio)
+                ajeno.close()
+            for (i, j), (cliente, servido) in pares_enlace.items():
+                if i == numero:
+                    enlaces[j] = cliente
+                    servido.close()
+                elif j == numero:
+                    enlaces_servidos[i] = servido
+                    cliente.close()
+                else:
+                    cliente.close()
+                    servido.close()
+            if numero == 0:
+                return server
+            server.close()
+            return abrir_escucha(host, port, reutilizar_puerto=True)
+        hijos.append(pid)
+    server.close()
+    for par in [*pares_traspaso, *pares_enlace.values()]:
+        for extremo in par:
+            extremo.close()
+    supervisar(hijos)
+    sys.exit(0)
+
+def supervisar(hijos):
+    """Espera a los trabajadores; si uno termina (o llega SIGTERM), detiene a los demás."""
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        pid, estado = os.wait()
+        print(f"[ERROR] El trabajador {hijos.index(pid)} terminó (estado {estado}); se detiene el servidor.")
+    finally:
+        for pid in hijos:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in hijos:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+
+def main():
+    HOST = '127.0.0.1'
+    PORT = 65432
+
+    parser = argparse.ArgumentParser(description="Servidor del puente de una vía.")
+    parser.add_argument("--modo", choices=["hilos", "eventos"], default="hilos",
+                        help="hilos: un hilo por conexión; eventos: un único bucle con selectors.")
+    parser.add_argument("--puentes", type=int, default=1,
+                        help="Puentes independientes que atiende el servidor, numerados desde 0.")
+    parser.add_argument("--procesos", type=int, default=1,
+                        help="Procesos trabajadores (modo eventos); cada uno atiende los puentes b con b %% N igual a su número.")
+    parser.add_argument("--capacidad", type=int, default=None,
+                        help="Máximo de carros a la vez sobre el puente (0 = sin límite).")
+    parser.add_argument("--lote", type=int, default=1,
+                        help="Carros de la misma dirección admitidos en cada turno: el k de la política (por defecto, --politica lote).")
+    parser.add_argument("--politica", choices=sorted(politicas.POLITICAS), default=None,
+                        help="Política de planificación del puente (por defecto alternancia).")
+    parser.add_argument("--param", action="append", default=[], metavar="CLAVE=VALOR",
+                        help="Parámetro de la política; se puede repetir.")
+    parser.add_argument("--duracion-concesion", type=float, default=puente.DURACION_CONCESION,
+                        help="Segundos que un carro puede ocupar el puente antes de que se reclame su permiso.")
+    parser.add_argument("--memoria-compartida", default=None, metavar="NOMBRE",
+                        help="Publica además el estado en el bloque de memoria compartida NOMBRE para la interfaz local.")
+    parser.add_argument("--diario", default=None, metavar="RUTA",
+                        help="Anota las transiciones en el diario RUTA y, al arrancar, recupera el estado que haya en él.")
+    parser.add_argument("--grabar", default=None, metavar="RUTA",
+                        help="Graba la secuencia de estados del puente en RUTA para reproducirla con interfaz.py --reproducir.")
+    parser.add_argument("--config", default=None,
+                        help="Archivo JSON con 'politica', 'parametros' y 'capacidad'.")
+    args = parser.parse_args()
+    if args.lote < 1:
+        parser.error("--lote debe ser al menos 1")
+    if not 1 <= args.puentes <= protocolo.CodecBinario.TODOS:
+        parser.error(f"--puentes debe estar entre 1 y {protocolo.CodecBinario.TODOS}")
+    if args.procesos > 1:
+        if args.modo != "eventos":
+            parser.error("--procesos necesita --modo eventos")
+        if args.procesos > args.puentes:
+            parser.error("--procesos no puede ser mayor que --puentes: cada trabajador necesita al menos un puente")
+        if not hasattr(socket, "SO_REUSEPORT") or not hasattr(os, "fork"):
+            parser.error("--procesos necesita SO_REUSEPORT y fork (Linux)")
+    elif args.procesos < 1:
+        parser.error("--procesos debe ser al menos 1")
+
+    config = politicas.cargar_configuracion(args.config) if args.config else {}
+    nombre = args.politica or config.get("politica") or ("lote" if args.lote > 1 else "alternancia")
+    parametros = dict(config.get("parametros", {}))
+    if args.lote > 1:
+        if nombre in politicas.POLITICAS and "k" not in inspect.signature(politicas.POLITICAS[nombre]).parameters:
+            parser.error(f"--lote no se aplica a la política {nombre}, que no tiene parámetro k")
+        parametros["k"] = args.lote
+    parametros.update(politicas.leer_parametros(args.param))
+    capacidad = args.capacidad if args.capacidad is not None else config.get("capacidad", puente.CAPACIDAD_PUENTE)
+    try:
+        politica = politicas.crear_politica(nombre, **parametros)
+    except (ValueError, TypeError) as e:
+        parser.error(f"Configuración de política no válida: {e}")
+
+    global total_puentes, procesos
+    total_puentes, procesos = args.puentes, args.procesos
+    server = abrir_escucha(HOST, PORT, reutilizar_puerto=procesos > 1)
+    if procesos > 1:
+        server = lanzar_trabajadores(server, HOST, PORT)  # Desde aquí, en cada trabajador
+
+    # Cada puente lleva su propia instancia de la política: guardan el estado del turno
+    for puente_id in range(trabajador, total_puentes, procesos):
+        politica = politicas.crear_politica(nombre, **parametros)
+        planificadores[puente_id] = Planificador(puente.Puente(politica, capacidad, args.duracion_concesion, puente_id=puente_id))
+    atexit.register(cerrar_planificadores)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    for planificador in planificadores.values():
+        if args.diario:
+            try:
+                iniciar_diario(planificador, ruta_de_puente(args.diario, planificador))
+            except (ValueError, OSError) as e:
+                parser.error(f"No se pudo abrir el diario: {e}")
+        if args.grabar:
+            iniciar_grabacion(planificador, ruta_de_puente(args.grabar, planificador))
+    if args.memoria_compartida and 0 in planificadores:
+        iniciar_memoria_compartida(args.memoria_compartida)
+
+    if trabajador == 0:
+        print(f"[ESCUCHANDO] El servidor está escuchando en {HOST}:{PORT} (modo {args.modo}, política {politica.describir()}"
+              f"{f', {args.puentes} puentes' if args.puentes > 1 else ''}{f', {procesos} procesos' if procesos > 1 else ''})")
+    for planificador in planificadores.values():
+        planificador.puente.registrar("Servidor iniciado y escuchando.")
+
+    if args.modo == "eventos":
+        servir_con_eventos(server)
+    else:
+        servir_con_hilos(server)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
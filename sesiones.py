@@ -0,0 +1,125 @@
+import asyncio
+import socket
+
+import protocolo
+
+# --- Sesiones de muchos carros sobre una sola conexión ---
+# Cada carro se identifica por su car_id en REQUEST_CROSS y RELEASE_BRIDGE, así que
+# cientos de carros pueden compartir un socket: los GRANT_CROSS se reparten por car_id
+# y los comandos de un mismo ciclo del bucle se envían juntos en una sola escritura,
+# que el servidor aplica como un lote. Habla texto o BIN1 (protocolo.py). La usan
+# interfaz.py y carga.py. Los GRANT_CROSS no dicen de qué puente son: en una misma
+# conexión, cada car_id espera permiso de un solo puente a la vez.
+#
+# El servidor contesta ERROR "<motivo>: <comando>" a un comando que no puede aplicar; si es
+# un REQUEST_CROSS, la espera de ese carro (el car_id es la última palabra) falla con
+# SolicitudRechazada en lugar de quedarse esperando un permiso que no llegará. Un RELEASE_BRIDGE
+# no espera respuesta: los rechazados solo se cuentan en liberaciones_rechazadas.
+
+class SolicitudRechazada(Exception):
+    """El servidor contestó ERROR a la solicitud de un carro."""
+
+class ConexionCompartida:
+    """Conexión HELLO CAR por la que viajan las sesiones de muchos carros; se usa desde un único bucle asyncio."""
+    def __init__(self, reader, writer, codec=protocolo.TEXTO):
+        self.reader, self.writer = reader, writer
+        self.codec = codec
+        self.permisos = {}       # car_id -> futuro que recibe el lease_id de su GRANT_CROSS
+        self.pendientes = []     # Mensajes del lote que se enviará al final del ciclo del bucle
+        self.cerrada = False
+        self.concesiones_vencidas = 0
+        self.liberaciones_rechazadas = 0  # RELEASE_BRIDGE que el servidor contestó con ERROR
+        self.lector = asyncio.create_task(self._leer())
+
+    @classmethod
+    async def abrir(cls, host, port, codec=protocolo.TEXTO):
+        """Conecta y saluda; con un codec distinto de texto espera el WELCOME con el que acepte el servidor."""
+        reader, writer = await asyncio.open_connection(host, port)
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        writer.write(protocolo.saludo("CAR", codec))
+        if codec is not protocolo.TEXTO:
+            respuesta = (await reader.readline()).split()
+            if respuesta[:1] != [b"WELCOME"]:
+                writer.close()
+                raise ConnectionError(f"El servidor no respondió al saludo: {respuesta}")
+            codec = protocolo.codec_para(respuesta[1].decode() if len(respuesta) > 1 else "")
+        return cls(reader, writer, codec)
+
+    def _enviar(self, datos):
+        if not self.pendientes:
+            asyncio.get_running_loop().call_soon(self._vaciar)
+        self.pendientes.append(datos)
+
+    def _vaciar(self):
+        """Escribe de una vez todos los mensajes acumulados en este ciclo del bucle."""
+        if self.pendientes and not self.cerrada:
+            self.writer.write(b"".join(self.pendientes))
+        self.pendientes = []
+
+    async def solicitar(self, car_id, direccion, puente=0):
+        """Pide paso para un carro en el puente dado y espera su GRANT_CROSS; devuelve el lease_id."""
+        if self.cerrada:
+            raise ConnectionResetError("La conexión compartida está cerrada")
+        futuro = asyncio.get_running_loop().create_future()
+        self.permisos[car_id] = futuro
+        self._enviar(self.codec.solicitud(direccion, car_id, puente))
+        try:
+            return await futuro
+        finally:
+            if self.permisos.get(car_id) is futuro:
+                del self.permisos[car_id]
+
+    def liberar(self, car_id, lease_id, puente=0):
+        """Libera el puente de un carro; sale en el mismo lote que el resto de comandos del ciclo."""
+        self._enviar(self.codec.liberacion(lease_id, car_id, puente))
+
+    async def _leer(self):
+        """Reparte los permisos entre los carros que los esperan."""
+        buf = bytearray()
+        try:
+            while True:
+                datos = await self.reader.read(65536)
+                if not datos: break
+                buf += datos
+                pos = 0
+                while True:
+                    mensaje, pos = self.codec.extraer_respuesta(buf, pos)
+                    if mensaje is None: break
+                    if mensaje[0] == "GRANT_CROSS":
+                        futuro = self.permisos.get(mensaje[1])
+                        if futuro is not None and not futuro.done():
+                            futuro.set_result(mensaje[2])
+                    elif mensaje[0] == "LEASE_EXPIRED":
+                        self.concesiones_vencidas += 1
+                    elif mensaje[0] == "ERROR":
+                        self._rechazar(mensaje[1])
+                del buf[:pos]
+        except (ConnectionError, OSError, ValueError):
+            pass
+        finally:
+            self.cerrada = True
+            for futuro in self.permisos.values():
+                if not futuro.done():
+                    futuro.set_exception(ConnectionResetError("El servidor cerró la conexión compartida"))
+
+    def _rechazar(self, texto):
+        """Hace fallar la espera del carro cuyo REQUEST_CROSS rechazó el servidor, o cuenta un RELEASE_BRIDGE rechazado."""
+        palabras = texto.rpartition(": ")[2].split()
+        if palabras[:1] == ["RELEASE_BRIDGE"]:
+            self.liberaciones_rechazadas += 1
+            return
+        if palabras[:1] != ["REQUEST_CROSS"]: return
+        try:
+            futuro = self.permisos.get(int(palabras[-1]))
+        except ValueError:
+            return
+        if futuro is not None and not futuro.done():
+            futuro.set_exception(SolicitudRechazada(texto))
+
+    def cerrar(self):
+        self._vaciar()
+        self.cerrada = True
+        self.lector.cancel()
+        self.writer.close()
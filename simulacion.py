@@ -0,0 +1,217 @@
+import argparse
+import heapq
+import json
+import random
+import time
+
+import escena
+import politicas
+import puente
+from estadisticas import percentil
+
+# --- Motor de simulación por eventos discretos ---
+# Reproduce el ciclo de carro_lifecycle (descanso, llegada a la cola, REQUEST_CROSS, cruce,
+# RELEASE_BRIDGE y regreso) contra la misma máquina de estados que usa servidor.py (puente.py),
+# pero con un reloj virtual que salta de un evento al siguiente en lugar de dormir: una hora
+# de tráfico tarda segundos. Cada carro hace de su propia conexión ante el Puente.
+#
+# Cada tramo dura lo que tardaría el Carro de interfaz.py a FPS cuadros por segundo con las
+# distancias de escena.py. Dos simplificaciones: la cola se compacta al instante cuando sale
+# el primero, y en el puente un carro no sale antes que el de delante más la distancia de seguridad.
+
+class CarroSimulado:
+    """Parámetros y estado de un carro dentro de la simulación."""
+    __slots__ = ("id", "direccion", "velocidad", "descanso", "instante_solicitud", "concesion")
+
+    def __init__(self, car_id, direccion, velocidad, descanso):
+        self.id = car_id
+        self.direccion = direccion
+        self.velocidad = velocidad   # Píxeles por cuadro, como Carro.original_speed
+        self.descanso = descanso     # Segundos entre viajes, como Carro.delay_time
+        self.instante_solicitud = None
+        self.concesion = None
+
+class Simulacion:
+    """Ejecuta un escenario de `duracion` segundos virtuales sobre un Puente con la política dada."""
+    def __init__(self, carros, duracion, politica=None, capacidad=puente.CAPACIDAD_PUENTE,
+                 duracion_concesion=puente.DURACION_CONCESION):
+        self.carros = carros
+        self.duracion = duracion
+        self.ahora = 0.0
+        self.puente = puente.Puente(politica, capacidad, duracion_concesion, reloj=lambda: self.ahora)
+        self.eventos = []  # Montículo de (instante, orden, función, argumentos)
+        self.orden = 0
+        self.en_cola = {"NORTH": [], "SOUTH": []}       # Carros camino de la cola o esperando, por orden de salida
+        self.ultima_salida = {"NORTH": 0.0, "SOUTH": 0.0}  # Cuándo deja el puente el último carro admitido
+        # --- Estadísticas ---
+        self.esperas = {"NORTH": [], "SOUTH": []}  # Segundos entre REQUEST_CROSS y GRANT_CROSS
+        self.cruces = {"NORTH": 0, "SOUTH": 0}
+        self.tiempo_ocupado = 0.0
+        self.cola_maxima = 0
+        self.concesiones_vencidas = 0
+        self.eventos_procesados = 0
+
+    def programar(self, instante, funcion, *args):
+        heapq.heappush(self.eventos, (instante, self.orden, funcion, args))
+        self.orden += 1
+
+    def ejecutar(self):
+        """Corre la simulación hasta `duracion` y devuelve sus estadísticas."""
+        for carro in self.carros:
+            self.programar(carro.descanso, self.salir_a_la_carretera, carro)
+        while self.eventos and self.eventos[0][0] <= self.duracion:
+            instante, _, funcion, args = heapq.heappop(self.eventos)
+            self._avanzar_reloj(instante)
+            funcion(*args)
+            self.eventos_procesados += 1
+        self._avanzar_reloj(self.duracion)
+        return self.resultados()
+
+    def _avanzar_reloj(self, instante):
+        if self.puente.coches > 0:
+            self.tiempo_ocupado += instante - self.ahora
+        self.ahora = instante
+
+    # --- Ciclo de vida de un carro (mismo orden que carro_lifecycle) ---
+    def salir_a_la_carretera(self, carro):
+        """Termina el descanso: el carro conduce hasta su lugar en la cola."""
+        direccion = carro.direccion
+        destino = escena.lugar_en_cola(direccion, len(self.en_cola[direccion]))
+        self.en_cola[direccion].append(carro)
+        recorrido = destino - escena.posicion_inicial(direccion)
+        self.programar(self.ahora + escena.segundos_para_recorrer(recorrido, carro.velocidad), self.solicitar_cruce, carro)
+
+    def solicitar_cruce(self, carro):
+        carro.instante_solicitud = self.ahora
+        self.puente.solicitar(carro, carro.id, carro.direccion)
+        self.cola_maxima = max(self.cola_maxima, self.puente.cola.longitud("NORTH"), self.puente.cola.longitud("SOUTH"))
+        self.recibir()
+
+    def recibir(self):
+        """Mensajes del Puente para los carros: GRANT_CROSS sube al carro al puente; el resto solo se cuenta."""
+        for mensaje in self.puente.tomar_mensajes():
+            if mensaje[0] == "GRANT_CROSS":
+                _, carro, _, lease_id, duracion_concesion = mensaje
+                self.entrar_al_puente(carro, lease_id, duracion_concesion)
+            elif mensaje[0] == "LEASE_EXPIRED":
+                self.concesiones_vencidas += 1
+
+    def entrar_al_puente(self, carro, lease_id, duracion_concesion):
+        direccion = carro.direccion
+        self.esperas[direccion].append(self.ahora - carro.instante_solicitud)
+        cola = self.en_cola[direccion]
+        puesto = cola.index(carro)
+        cola.pop(puesto)
+        carro.concesion = lease_id
+
+        recorrido = escena.salida_del_puente(direccion) - escena.lugar_en_cola(direccion, puesto)
+        salida = self.ahora + escena.segundos_para_recorrer(recorrido, carro.velocidad)
+        if self.ultima_salida[direccion] > self.ahora:
+            # Distancia de seguridad con el carro que va delante en el puente
+            separacion = escena.segundos_para_recorrer(escena.CAR_WIDTH + escena.SAFE_DISTANCE_ON_BRIDGE, carro.velocidad)
+            salida = max(salida, self.ultima_salida[direccion] + separacion)
+        self.ultima_salida[direccion] = salida
+        self.programar(salida, self.liberar_puente, carro)
+        # Revisión de la rueda de concesiones por si el carro no libera a tiempo
+        self.programar(self.ahora + duracion_concesion + self.puente.rueda.resolucion, self.revisar_concesiones)
+
+    def liberar_puente(self, carro):
+        self.cruces[carro.direccion] += 1
+        self.puente.liberar(carro, carro.concesion)
+        self.recibir()
+        recorrido = escena.salida_de_escena(carro.direccion) - escena.salida_del_puente(carro.direccion)
+        self.programar(self.ahora + escena.segundos_para_recorrer(recorrido, carro.velocidad), self.volver_a_casa, carro)
+
+    def revisar_concesiones(self):
+        self.puente.revisar_concesiones()
+        self.recibir()
+
+    def volver_a_casa(self, carro):
+        """Como reset_position_and_direction: el próximo viaje es en sentido contrario, tras el descanso."""
+        carro.direccion = politicas.opuesta(carro.direccion)
+        self.programar(self.ahora + carro.descanso, self.salir_a_la_carretera, carro)
+
+    def resultados(self):
+        esperas = sorted(self.esperas["NORTH"] + self.esperas["SOUTH"])
+        cruces = sum(self.cruces.values())
+        return {
+            "duracion": self.duracion,
+            "carros": len(self.carros),
+            "cruces": cruces,
+            "cruces_por_hora": cruces * 3600 / self.duracion if self.duracion else 0.0,
+            "cruces_norte": self.cruces["NORTH"],
+            "cruces_sur": self.cruces["SOUTH"],
+            "espera_media": sum(esperas) / len(esperas) if esperas else float('nan'),
+            "espera_p50": percentil(esperas, 50),
+            "espera_p95": percentil(esperas, 95),
+            "espera_p99": percentil(esperas, 99),
+            "espera_max": esperas[-1] if esperas else float('nan'),
+            "espera_media_norte": sum(self.esperas["NORTH"]) / len(self.esperas["NORTH"]) if self.esperas["NORTH"] else float('nan'),
+            "espera_media_sur": sum(self.esperas["SOUTH"]) / len(self.esperas["SOUTH"]) if self.esperas["SOUTH"] else float('nan'),
+            "ocupacion": self.tiempo_ocupado / self.duracion if self.duracion else 0.0,
+            "cola_maxima": self.cola_maxima,
+            "concesiones_vencidas": self.concesiones_vencidas,
+            "eventos": self.eventos_procesados,
+        }
+
+def generar_carros(cantidad, semilla, velocidad=(2.0, 4.0), descanso=(4.0, 10.0)):
+    """Carros aleatorios con los mismos rangos que interfaz.py; la misma semilla da el mismo escenario."""
+    azar = random.Random(semilla)
+    return [CarroSimulado(i + 1, azar.choice(["NORTH", "SOUTH"]), azar.uniform(*velocidad), azar.uniform(*descanso))
+            for i in range(cantidad)]
+
+def leer_politica(especificacion):
+    """Convierte "lote:k=8,max_espera=20" en (nombre, {"k": "8", "max_espera": "20"})."""
+    nombre, _, parametros = especificacion.partition(":")
+    return nombre, politicas.leer_parametros(p for p in parametros.split(",") if p)
+
+def simular(especificacion, args):
+    """Ejecuta las repeticiones de un escenario con una política y agrega sus resultados."""
+    nombre, parametros = leer_politica(especificacion)
+    total = None
+    inicio = time.perf_counter()
+    for repeticion in range(args.repeticiones):
+        politica = politicas.crear_politica(nombre, **parametros)
+        carros = generar_carros(args.carros, args.semilla + repeticion, tuple(args.velocidad), tuple(args.descanso))
+        resultado = Simulacion(carros, args.duracion, politica, args.capacidad, args.duracion_concesion).ejecutar()
+        if total is None:
+            total = {clave: [] for clave in resultado}
+        for clave, valor in resultado.items():
+            total[clave].append(valor)
+    agregado = {clave: sum(valores) / len(valores) for clave, valores in total.items()}
+    agregado["politica"] = politica.describir()
+    agregado["repeticiones"] = args.repeticiones
+    agregado["segundos_reales"] = time.perf_counter() - inicio
+    agregado["aceleracion"] = args.duracion * args.repeticiones / agregado["segundos_reales"]
+    return agregado
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulación por eventos discretos del puente, más rápida que el tiempo real.")
+    parser.add_argument("--politica", nargs="+", default=["alternancia"], metavar="NOMBRE[:CLAVE=VALOR,...]",
+                        help="Una o varias políticas a comparar, p. ej. alternancia lote:k=8 fases:duracion=6.")
+    parser.add_argument("--capacidad", type=int, default=puente.CAPACIDAD_PUENTE, help="Máximo de carros en el puente (0 = sin límite).")
+    parser.add_argument("--duracion-concesion", type=float, default=puente.DURACION_CONCESION)
+    parser.add_argument("--carros", type=int, default=7)
+    parser.add_argument("--velocidad", type=float, nargs=2, default=[2.0, 4.0], metavar=("MIN", "MAX"), help="Píxeles por cuadro.")
+    parser.add_argument("--descanso", type=float, nargs=2, default=[4.0, 10.0], metavar=("MIN", "MAX"), help="Segundos entre viajes.")
+    parser.add_argument("--duracion", type=float, default=3600.0, help="Segundos simulados por repetición.")
+    parser.add_argument("--repeticiones", type=int, default=1)
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="Imprime un objeto JSON por política.")
+    args = parser.parse_args()
+
+    for especificacion in args.politica:
+        try:
+            resultado = simular(especificacion, args)
+        except (ValueError, TypeError) as e:
+            parser.error(f"Configuración de política no válida: {e}")
+        if args.json:
+            print(json.dumps(resultado))
+            continue
+        print(f"{resultado['politica']}: {resultado['cruces_por_hora']:.0f} cruces/h, ocupación {resultado['ocupacion']:.0%}, "
+              f"espera media {resultado['espera_media']:.2f}s (p50 {resultado['espera_p50']:.2f}, p95 {resultado['espera_p95']:.2f}, "
+              f"p99 {resultado['espera_p99']:.2f}, max {resultado['espera_max']:.2f}), cola máxima {resultado['cola_maxima']:.0f} "
+              f"[{resultado['aceleracion']:.0f}x tiempo real]")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import os
+import tempfile
+import unittest
+
+import diario
+from test_puente import nuevo_puente, permisos
+
+# --- Pruebas del diario de transiciones ---
+# El formato se prueba escribiendo registros y dañando el archivo; la recuperación, con un
+# puente que anota en un diario real, se "cae" y se rehace en otro desde lo leído.
+
+REGISTROS = [
+    ("INICIO", 7, 2, 40),
+    ("EVENTO", 41, 1700000000.25, "solicitud", 3, "Cliente: Carro 3 solicita cruce (NORTH)"),
+    ("ENCOLAR", 3, "NORTH", 1700000000.5),
+    ("CONCEDER", 7, 3, "NORTH", 1700000030.5),
+    ("EVENTO", 42, 1700000001.0, "libre", None, "Servidor: Puente libre y sin colas."),
+    ("CANCELAR", 4),
+    ("LIBERAR", 7, 1),
+]
+
+class PruebaFormato(unittest.TestCase):
+    def setUp(self):
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        self.ruta = os.path.join(carpeta.name, "puente.diario")
+        self.fines = []  # Byte en que termina cada registro
+        with open(self.ruta, "wb") as archivo:
+            archivo.write(diario.MAGICO)
+            for registro in REGISTROS:
+                archivo.write(diario.codificar(registro))
+                self.fines.append(archivo.tell())
+
+    def test_ida_y_vuelta(self):
+        self.assertEqual(diario.leer(self.ruta), (REGISTROS, self.fines[-1]))
+
+    def test_registro_cortado_se_descarta(self):
+        for corte in (1, 3, 6):
+            with self.subTest(corte=corte):
+                os.truncate(self.ruta, self.fines[-1] - corte)
+                self.assertEqual(diario.leer(self.ruta), (REGISTROS[:-1], self.fines[-2]))
+
+    def test_crc_incorrecto_detiene_la_lectura(self):
+        for indice in (len(REGISTROS) - 1, 3):
+            with self.subTest(registro=indice):
+                with open(self.ruta, "r+b") as archivo:
+                    archivo.seek(self.fines[indice] - 1)  # Último byte del CRC
+                    byte = archivo.read(1)
+                    archivo.seek(-1, os.SEEK_CUR)
+                    archivo.write(bytes([byte[0] ^ 0xFF]))
+                self.assertEqual(diario.leer(self.ruta), (REGISTROS[:indice], self.fines[indice - 1]))
+
+    def test_archivo_ajeno(self):
+        with open(self.ruta, "wb") as archivo:
+            archivo.write(b"XXXX")
+        with self.assertRaises(ValueError):
+            diario.leer(self.ruta)
+
+    def test_sin_archivo(self):
+        self.assertEqual(diario.leer(self.ruta + ".no"), ([], 0))
+
+class PruebaRecuperacion(unittest.TestCase):
+    def setUp(self):
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        self.ruta = os.path.join(carpeta.name, "puente.diario")
+
+    def con_diario(self):
+        """Un puente que anota en un diario nuevo, como servidor.iniciar_diario."""
+        p, reloj = nuevo_puente()
+        p.diario = diario.Diario(self.ruta)
+        p.diario.compactar(p.instantanea())
+        return p, reloj
+
+    def recuperado(self):
+        registros, _ = diario.leer(self.ruta)
+        p, _ = nuevo_puente()
+        p.restaurar(registros)
+        return p
+
+    def assertInstantaneasIguales(self, antes, despues):
+        """Igual salvo el evento que añade la recuperación y los instantes, que pasan por el reloj real."""
+        inicio_antes, inicio_despues = antes[0], despues[0]
+        self.assertEqual(inicio_despues, inicio_antes[:3] + (inicio_antes[3] + 1,))
+        despues = [r for r in despues[1:] if not (r[0] == "EVENTO" and r[1] == inicio_despues[3])]
+        antes = antes[1:]
+        self.assertEqual(len(despues), len(antes))
+        for registro_antes, registro_despues in zip(antes, despues):
+            self.assertEqual(len(registro_antes), len(registro_despues))
+            for campo_antes, campo_despues in zip(registro_antes, registro_despues):
+                if isinstance(campo_antes, float):
+                    self.assertAlmostEqual(campo_antes, campo_despues, delta=0.5)
+                else:
+                    self.assertEqual(campo_antes, campo_despues)
+
+    def transiciones(self, p, carros):
+        """Solicitudes y dos liberaciones, con un lote confirmado por transición como el planificador.
+
+        El reloj falso no avanza: el diario guarda instantes del reloj real y no tienen que divergir."""
+        for car_id in carros:
+            p.solicitar("a", car_id, "NORTH" if car_id % 2 else "SOUTH")
+            p.diario.confirmar()
+        concedidos = permisos(p)
+        for car_id, lease in list(concedidos.items())[:2]:
+            p.liberar("a", lease, car_id)
+            p.diario.confirmar()
+
+    def test_recuperacion_rehace_la_instantanea(self):
+        p, _ = self.con_diario()
+        self.transiciones(p, range(1, 9))
+        antes = p.instantanea()
+        p.diario.cerrar()
+        self.assertInstantaneasIguales(antes, self.recuperado().instantanea())
+
+    def test_recuperacion_tras_compactar(self):
+        p, _ = self.con_diario()
+        self.transiciones(p, range(1, 9))
+        p.diario.compactar(p.instantanea())
+        self.transiciones(p, range(20, 26))
+        antes = p.instantanea()
+        p.diario.cerrar()
+        registros, _ = diario.leer(self.ruta)
+        self.assertEqual(registros[0][0], "INICIO")  # El diario empieza en la compactación
+        self.assertEqual(sum(1 for r in registros if r[0] == "INICIO"), 1)
+        self.assertInstantaneasIguales(antes, self.recuperado().instantanea())
+
+    def test_recuperado_sigue_anotando_detras(self):
+        p, _ = self.con_diario()
+        self.transiciones(p, range(1, 5))
+        p.diario.cerrar()
+        registros, largo = diario.leer(self.ruta)
+        q, _ = nuevo_puente()
+        q.restaurar(registros)
+        q.diario = diario.Diario(self.ruta, largo)
+        q.diario.compactar(q.instantanea())  # Como servidor.iniciar_diario
+        q.solicitar("b", 50, "NORTH")
+        q.diario.confirmar()
+        antes = q.instantanea()
+        q.diario.cerrar()
+        self.assertInstantaneasIguales(antes, self.recuperado().instantanea())
+
+if __name__ == "__main__":
+    unittest.main()
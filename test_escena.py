@@ -0,0 +1,117 @@
+import unittest
+
+import numpy as np
+
+import escena
+from escena import (CAR_WIDTH, DRIVING_TO_BRIDGE, WAITING, CROSSING, RETURNING, IDLE,
+                    BRIDGE_Y_CENTER, CAR_HEIGHT, SIM_WIDTH)
+
+# --- Pruebas de FlotaCarros contra las reglas de un solo carro ---
+# Cada paso de la flota tiene que dar lo mismo que aplicar a cada carro, por separado, las
+# reglas que tenía Carro.update: seguir al de delante en la cola a QUEUE_GAP, frenar en el
+# puente a menos de SAFE_DISTANCE_ON_BRIDGE y pasar de la cola al puente, al regreso y al
+# descanso. Todos los carros ven las posiciones del paso anterior, como en actualizar().
+
+class CarroEscalar:
+    def __init__(self, x, velocidad, direccion, estado):
+        self.x, self.y = x, escena.carril_y(direccion)
+        self.velocidad = self.velocidad_original = velocidad
+        self.direccion, self.estado = direccion, estado
+
+def paso_escalar(carros):
+    """Un paso con las reglas de un carro; devuelve [(indice, estado nuevo)] de los que cambiaron."""
+    anteriores = [(c.x, c.estado) for c in carros]
+    cambios = []
+    for i, c in enumerate(carros):
+        s = escena.sentido(c.direccion)
+        x, estado = anteriores[i]
+        c.velocidad = c.velocidad_original
+        if estado in (DRIVING_TO_BRIDGE, WAITING):
+            delante = [ox for j, (ox, oe) in enumerate(anteriores) if j != i and carros[j].direccion == c.direccion
+                       and oe in (DRIVING_TO_BRIDGE, WAITING) and s * ox > s * x]
+            objetivo = (min(delante, key=lambda ox: s * ox) - s * (escena.QUEUE_GAP + CAR_WIDTH) if delante
+                        else escena.linea_de_espera(c.direccion))
+            if s * x < s * objetivo:
+                c.x = min(x + c.velocidad, SIM_WIDTH - CAR_WIDTH) if s > 0 else max(x - c.velocidad, 0)
+            else:
+                c.x, c.estado = objetivo, WAITING
+        elif estado == CROSSING:
+            c.y = BRIDGE_Y_CENTER - CAR_HEIGHT / 2
+            for j, (ox, oe) in enumerate(anteriores):
+                if j != i and carros[j].direccion == c.direccion and oe == CROSSING \
+                        and s * ox > s * x and s * (ox - x) - CAR_WIDTH < escena.SAFE_DISTANCE_ON_BRIDGE:
+                    c.velocidad = 0
+            if s * x < s * escena.salida_del_puente(c.direccion):
+                c.x = x + s * c.velocidad
+            else:
+                c.estado = RETURNING
+        elif estado == RETURNING:
+            c.y = escena.carril_y(c.direccion)
+            if s * x < s * escena.salida_de_escena(c.direccion):
+                c.x = x + s * c.velocidad
+            else:
+                c.estado = IDLE
+        if c.estado != estado:
+            cambios.append((i, c.estado))
+    return cambios
+
+def flota_mixta():
+    """Carros de las dos direcciones en cola, llegando, sobre el puente y regresando."""
+    especificacion = [
+        (-30, 3.0, 'NORTH', DRIVING_TO_BRIDGE), (-90, 2.5, 'NORTH', DRIVING_TO_BRIDGE), (40, 2.0, 'NORTH', DRIVING_TO_BRIDGE),
+        (120, 4.0, 'NORTH', DRIVING_TO_BRIDGE), (900, 3.5, 'SOUTH', DRIVING_TO_BRIDGE), (850, 2.0, 'SOUTH', DRIVING_TO_BRIDGE),
+        (960, 3.0, 'SOUTH', DRIVING_TO_BRIDGE), (250, 1.5, 'NORTH', CROSSING), (200, 3.0, 'NORTH', CROSSING),
+        (160, 4.0, 'NORTH', CROSSING), (600, 2.0, 'SOUTH', RETURNING), (100, 3.0, 'SOUTH', RETURNING),
+    ]
+    flota = escena.FlotaCarros(capacidad=4)  # Menos que los carros: también crece
+    carros = []
+    for x, velocidad, direccion, estado in especificacion:
+        i = flota.agregar(None, x, escena.carril_y(direccion), velocidad, direccion)
+        flota.estado[i] = estado
+        carros.append(CarroEscalar(x, velocidad, direccion, estado))
+    return flota, carros
+
+class PruebaFlota(unittest.TestCase):
+    def comparar(self, flota, carros):
+        n = flota.n
+        np.testing.assert_allclose(flota.x[:n], [c.x for c in carros])
+        np.testing.assert_allclose(flota.y[:n], [c.y for c in carros])
+        np.testing.assert_allclose(flota.velocidad[:n], [c.velocidad for c in carros])
+        self.assertEqual(flota.estado[:n].tolist(), [c.estado for c in carros])
+
+    def test_igual_que_las_reglas_de_un_carro(self):
+        flota, carros = flota_mixta()
+        recibidos = []
+        flota.al_cambiar_estado = recibidos.append
+        for paso in range(600):
+            if paso % 60 == 59:
+                # Como carro_lifecycle al recibir GRANT_CROSS: el primero de cada cola sube al puente
+                for direccion in ('NORTH', 'SOUTH'):
+                    s = escena.sentido(direccion)
+                    en_espera = [i for i, c in enumerate(carros) if c.direccion == direccion and c.estado == WAITING]
+                    if en_espera:
+                        i = max(en_espera, key=lambda i: s * carros[i].x)
+                        flota.estado[i] = carros[i].estado = CROSSING
+            recibidos.clear()
+            esperados = paso_escalar(carros)
+            flota.actualizar()
+            with self.subTest(paso=paso):
+                self.comparar(flota, carros)
+                obtenidos = sorted((int(i), codigo) for cambios in recibidos for codigo, indices in cambios for i in indices)
+                self.assertEqual(obtenidos, sorted(esperados))
+        self.assertIn(IDLE, [c.estado for c in carros])  # Algunos completaron el recorrido
+
+    def test_cola_respeta_el_hueco(self):
+        flota, carros = flota_mixta()
+        for _ in range(400):
+            flota.actualizar()
+        for direccion in ('NORTH', 'SOUTH'):
+            s = escena.sentido(direccion)
+            posiciones = sorted((s * flota.x[i] for i, c in enumerate(carros)
+                                 if c.direccion == direccion and flota.estado[i] == WAITING), reverse=True)
+            self.assertEqual(posiciones[0], s * escena.linea_de_espera(direccion))
+            for delante, detras in zip(posiciones, posiciones[1:]):
+                self.assertEqual(delante - detras, escena.QUEUE_GAP + CAR_WIDTH)
+
+if __name__ == "__main__":
+    unittest.main()
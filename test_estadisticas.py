@@ -0,0 +1,26 @@
+import unittest
+
+from estadisticas import percentil, percentiles_censurados
+
+# --- Pruebas de los percentiles del generador de carga y la simulación ---
+
+class PruebaPercentiles(unittest.TestCase):
+    def test_percentil(self):
+        valores = list(range(1, 101))
+        self.assertEqual([percentil(valores, p) for p in (0, 50, 100)], [1, 51, 100])
+
+    def test_pendientes_cortas_no_marcan_cota(self):
+        # Unas pocas solicitudes con 30 ms de espera entre latencias mayores: nada que acotar
+        latencias = [0.02 + i * 0.001 for i in range(100)]
+        resultado = percentiles_censurados(latencias, [0.03] * 6, (50, 95, 100))
+        self.assertEqual([cota for _, cota in resultado.values()], [False, False, False])
+
+    def test_pendiente_en_la_posicion_marca_cota(self):
+        latencias = [0.01] * 90
+        resultado = percentiles_censurados(latencias, [5.0] * 10, (50, 95, 100))
+        self.assertEqual(resultado[50], (0.01, False))
+        self.assertEqual(resultado[95], (5.0, True))
+        self.assertEqual(resultado[100], (5.0, True))
+
+if __name__ == "__main__":
+    unittest.main()
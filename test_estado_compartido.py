@@ -0,0 +1,109 @@
+import os
+import struct
+import unittest
+from unittest import mock
+
+import estado_compartido
+from test_puente import nuevo_puente
+
+# --- Pruebas del canal de estado en memoria compartida ---
+# Publicador y lector viven en el mismo proceso sobre un bloque con nombre propio de la
+# prueba. Una escritura a medias se simula dejando impar el contador del seqlock, o
+# publicando otro estado mientras el lector copia el registro.
+
+def adjuntando():
+    """El lector de Python < 3.13 se quita del resource_tracker para no borrar el bloque del
+    servidor al salir; en el mismo proceso quitaría también el registro del publicador."""
+    return mock.patch("multiprocessing.resource_tracker.unregister")
+
+def estado_de_prueba():
+    """Campos de construir_estado de un puente con carros cruzando y en cola, y su log."""
+    p, _ = nuevo_puente()
+    for car_id in (1, 2, 3):
+        p.solicitar("a", car_id, "NORTH")
+    for car_id in (10, 11):
+        p.solicitar("b", car_id, "SOUTH")
+    p.registrar("Sistema: entrada con acentos y ñ " + "x" * 200)  # Más larga que LARGO_ENTRADA_LOG
+    return p.version, p.estado(desalojos=4), p.log.lineas()
+
+class PruebaEstadoCompartido(unittest.TestCase):
+    def setUp(self):
+        self.nombre = f"prueba_puente_{os.getpid()}"
+        self.publicador = estado_compartido.PublicadorEstado(self.nombre)
+        self.addCleanup(self.publicador.cerrar)
+        with adjuntando():
+            self.lector = estado_compartido.LectorEstado(self.nombre)
+        self.addCleanup(self.lector.cerrar)
+
+    def assertEstadoPublicado(self, leido, seq, estado, log):
+        estado_leido, log_leido = leido
+        esperado = {clave: valor for clave, valor in estado.items() if clave != "bridge"}
+        self.assertEqual(estado_leido, {**esperado, "seq": seq})
+        self.assertEqual(log_leido[:-1], log[:-1])
+        self.assertTrue(log[-1].startswith(log_leido[-1]))
+        self.assertLessEqual(len(log_leido[-1].encode('utf-8')), estado_compartido.LARGO_ENTRADA_LOG)
+
+    def test_ida_y_vuelta(self):
+        seq, estado, log = estado_de_prueba()
+        self.publicador.publicar(seq, estado, log)
+        self.assertEstadoPublicado(self.lector.leer(), seq, estado, log)
+
+    def test_sin_cambios_devuelve_lo_mismo(self):
+        self.publicador.publicar(*estado_de_prueba())
+        primero = self.lector.leer()
+        self.assertIs(self.lector.leer(), primero)
+
+    def test_contador_impar_devuelve_el_ultimo_estado(self):
+        self.publicador.publicar(*estado_de_prueba())
+        anterior = self.lector.leer()
+        struct.pack_into("<Q", self.publicador.memoria.buf, 8, self.publicador.contador + 1)  # Escritura a medias
+        self.assertIs(self.lector.leer(), anterior)
+
+    def test_contador_que_cambia_durante_la_lectura_se_repite(self):
+        seq, estado, log = estado_de_prueba()
+        self.publicador.publicar(seq, estado, log)
+        nuevo = {**estado, "waiting_north": 7, "crossing_cars": [42]}
+        registro = estado_compartido.REGISTRO
+        lecturas = []
+
+        def copiar_con_escritura(buf, pos):
+            valores = registro.unpack_from(buf, pos)
+            if not lecturas:
+                self.publicador.publicar(seq + 1, nuevo, log)  # El servidor escribe mientras se copia
+            lecturas.append(valores)
+            return valores
+
+        with mock.patch.object(estado_compartido, "REGISTRO", mock.Mock(wraps=registro, unpack_from=copiar_con_escritura)):
+            leido = self.lector.leer()
+        self.assertEqual(len(lecturas), 2)
+        self.assertEstadoPublicado(leido, seq + 1, nuevo, log)
+
+    def test_servidor_reiniciado_se_adopta(self):
+        seq, estado, log = estado_de_prueba()
+        self.publicador.publicar(seq, estado, log)
+        self.lector.leer()
+        # Otro servidor (otro pid) crea de nuevo el bloque; el anterior ya no existe
+        viejo = self.publicador
+        self.publicador = estado_compartido.PublicadorEstado(self.nombre)
+        viejo.memoria.close()
+        nuevo_pid = os.getppid()
+        struct.pack_into("<I", self.publicador.memoria.buf, 4, nuevo_pid)
+        self.publicador.publicar(1, estado, log[:1])
+        self.lector.proxima_revision = 0.0
+        with adjuntando(), mock.patch.object(estado_compartido.LectorEstado, "_vivo", staticmethod(lambda pid: pid == nuevo_pid)):
+            leido = self.lector.leer()
+        self.assertEqual(self.lector.pid, nuevo_pid)
+        self.assertEqual(leido[0]["seq"], 1)
+        self.assertEqual(leido[1], log[:1])
+
+    def test_servidor_caido_sin_reemplazo(self):
+        self.publicador.publicar(*estado_de_prueba())
+        _, log = self.lector.leer()
+        self.lector.proxima_revision = 0.0
+        with adjuntando(), mock.patch.object(estado_compartido.LectorEstado, "_vivo", staticmethod(lambda pid: False)):
+            estado, log_leido = self.lector.leer()
+        self.assertEqual(estado, {"error": "Servidor no conectado"})
+        self.assertEqual(log_leido, log)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import os
+import tempfile
+import unittest
+
+import grabacion
+
+# --- Pruebas de la grabación y su índice ---
+# Se graba una secuencia sintética con instantes conocidos (con huecos de varios intervalos
+# sin cuadros) y se comprueba que el Reproductor rehace en cada instante el estado grabado.
+# Las líneas del log se repiten, como dos eventos iguales en el mismo segundo: solo la
+# secuencia del log dice cuáles son nuevas.
+
+INICIO = 1000.0
+
+def secuencia():
+    """(instante, estado, log, log_seq) de cada estado anotado; algunos se repiten y no generan cuadro."""
+    cuadros, log = [], []
+    instante = INICIO
+    for i in range(60):
+        instante += 3.5 if i in (20, 41) else 0.3  # Dos huecos sin cuadros
+        if i % 3:
+            log = log + [f"[..] evento {i % 2}"] * (1 + i % 2)
+        if i == 33:
+            log = log + ["[..] ráfaga"] * (grabacion.MAX_LOG + 2)  # Más líneas nuevas que la ventana
+        estado = {"seq": i // 2, "bridge": 0, "waiting_north": i % 4, "crossing_cars": [i // 5]}
+        cuadros.append((instante, estado, log[-grabacion.MAX_LOG:], len(log)))
+    return cuadros
+
+def grabar(ruta, cuadros, con_secuencia=True):
+    grabador = grabacion.Grabador(ruta)
+    for instante, estado, log, log_seq in cuadros:
+        grabador.anotar(estado, log, instante, log_seq=log_seq if con_secuencia else None)
+    grabador.cerrar()
+
+class PruebaReproductor(unittest.TestCase):
+    def setUp(self):
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        self.carpeta = carpeta.name
+        ruta = os.path.join(carpeta.name, "puente.grab")
+        self.cuadros = secuencia()
+        grabar(ruta, self.cuadros)
+        self.reproductor = grabacion.Reproductor(ruta)
+        self.addCleanup(self.reproductor.cerrar)
+
+    def esperado(self, instante):
+        """Estado y log del último estado anotado en o antes de `instante` (el primero si es anterior a todos)."""
+        previos = [c for c in self.cuadros if c[0] <= instante] or self.cuadros[:1]
+        return previos[-1][1], previos[-1][2]
+
+    def instantes(self):
+        fin = self.cuadros[-1][0]
+        return [INICIO + i * 0.17 for i in range(int((fin - INICIO) / 0.17) + 1)]
+
+    def test_buscar_rehace_el_estado_grabado(self):
+        r = self.reproductor
+        for instante in self.instantes():
+            with self.subTest(instante=instante):
+                self.assertEqual(r.buscar(instante), self.esperado(instante))
+                self.assertLessEqual(r.instante, max(instante, r.inicio))
+
+    def test_sin_secuencia_del_log_tambien_se_rehace(self):
+        ruta = os.path.join(self.carpeta, "sin_secuencia.grab")
+        grabar(ruta, self.cuadros, con_secuencia=False)
+        r = grabacion.Reproductor(ruta)
+        self.addCleanup(r.cerrar)
+        for instante in self.instantes():
+            with self.subTest(instante=instante):
+                self.assertEqual(r.buscar(instante), self.esperado(instante))
+
+    def test_buscar_parte_del_ultimo_keyframe_anterior(self):
+        r = self.reproductor
+        keyframes = [(instante, posicion) for posicion, tipo, instante, _ in r._cuadros(grabacion.CABECERA.size)
+                     if tipo == grabacion.KEYFRAME]
+        for instante in self.instantes():
+            with self.subTest(instante=instante):
+                intervalo = r._intervalo(instante)
+                posicion = r._keyframe(intervalo)
+                if intervalo > 0 and grabacion.CUADRO.unpack_from(r.datos, posicion)[2] > instante:
+                    posicion = r._keyframe(intervalo - 1)
+                previos = [p for t, p in keyframes if t <= instante] or [keyframes[0][1]]
+                self.assertEqual(posicion, previos[-1])
+                # Como mucho se aplican los deltas de un intervalo
+                tipo, inicio_keyframe = grabacion.CUADRO.unpack_from(r.datos, posicion)[1:]
+                self.assertEqual(tipo, grabacion.KEYFRAME)
+                self.assertLess(instante - inicio_keyframe, 2 * r.resolucion + 3.5)
+
+    def test_avanzar_hasta_equivale_a_buscar(self):
+        r = self.reproductor
+        r.buscar(INICIO)
+        for instante in self.instantes():
+            with self.subTest(instante=instante):
+                self.assertEqual(r.avanzar_hasta(instante), self.esperado(instante))
+
+    def test_siguiente_y_anterior_recorren_todos_los_cuadros(self):
+        r = self.reproductor
+        r.buscar(INICIO)
+        ida = [(r.instante, r.estado, list(r.log))]
+        while r.siguiente():
+            ida.append((r.instante, r.estado, list(r.log)))
+        vuelta = [(r.instante, r.estado, list(r.log))]
+        while r.anterior():
+            vuelta.append((r.instante, r.estado, list(r.log)))
+        self.assertEqual(vuelta[::-1], ida)
+        for instante, estado, log in ida:
+            self.assertEqual((estado, log), self.esperado(instante))
+
+    def test_extremos(self):
+        r = self.reproductor
+        r.buscar(INICIO - 100)
+        self.assertFalse(r.anterior())
+        self.assertEqual((r.estado, list(r.log)), self.esperado(INICIO))
+        ultimo = self.cuadros[-1]
+        self.assertEqual(r.buscar(ultimo[0] + 1000), (ultimo[1], ultimo[2]))
+        self.assertFalse(r.siguiente())
+        self.assertEqual(r.fin, ultimo[0])
+
+if __name__ == "__main__":
+    unittest.main()
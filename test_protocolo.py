@@ -0,0 +1,160 @@
+import struct
+import unittest
+
+import protocolo
+from protocolo import BINARIO, TEXTO, ErrorProtocolo
+
+# --- Pruebas de los codecs del protocolo ---
+# Cada mensaje se codifica con un codec y se vuelve a leer con el lector incremental del
+# otro lado (extraer_comandos en el servidor, extraer_respuesta en el cliente), entero o
+# byte a byte, como llegaría en lecturas sueltas del socket.
+
+ESTADO = {"bridge": 2, "bridge_status": "OCUPADO", "current_direction": "NORTH", "waiting_north": 3,
+          "waiting_south": 1, "crossing_cars": [7, 9], "traffic_light": "NORTH", "evicted_clients": 0,
+          "policy": "lote(k=4)", "reclaimed_leases": 1}
+EVENTOS = [(5, 1700000000.5, "permiso", 7, "Servidor: Permiso a Carro 7"), (6, 1700000001.0, "libre", None, "Puente libre")]
+
+def comandos_de(codec):
+    """Un mensaje de cada tipo que envía un cliente."""
+    return b"".join([
+        codec.solicitud("NORTH", 7), codec.solicitud("SOUTH", 8, 3),
+        codec.liberacion(4, 7), codec.liberacion(5, 8, 3),
+        codec.resync(), codec.resync(1),
+        codec.log_desde(12), codec.log_desde(None, 2),
+        codec.suscripcion([0, 2]), codec.suscripcion(),
+    ])
+
+def respuestas_de(codec):
+    """Un mensaje de cada tipo que envía el servidor."""
+    return b"".join([
+        codec.permiso(7, 4, 30.0), codec.vencida(8, 5), codec.error("Comando mal formado: X"),
+        codec.keyframe({**ESTADO, "seq": 10, "log": ["a", "b"]}),
+        codec.delta(ESTADO, 11, 10, {"waiting_north": 3}, ["c"]),
+        codec.eventos(EVENTOS, 2),
+    ])
+
+def leer_comandos(codec, datos, trozo=None):
+    """Comandos de `datos` entregados de `trozo` en `trozo` bytes (todo de una vez si es None)."""
+    comandos, buf = [], bytearray()
+    for inicio in range(0, len(datos), trozo or len(datos)):
+        buf += datos[inicio:inicio + (trozo or len(datos))]
+        nuevos, pos = codec.extraer_comandos(buf)
+        comandos += nuevos
+        del buf[:pos]
+    return comandos, bytes(buf)
+
+def leer_respuestas(codec, datos, trozo=None):
+    mensajes, buf = [], bytearray()
+    for inicio in range(0, len(datos), trozo or len(datos)):
+        buf += datos[inicio:inicio + (trozo or len(datos))]
+        pos = 0
+        while True:
+            mensaje, pos = codec.extraer_respuesta(buf, pos)
+            if mensaje is None: break
+            mensajes.append(mensaje)
+        del buf[:pos]
+    return mensajes, bytes(buf)
+
+class PruebaIdaYVuelta(unittest.TestCase):
+    def test_comandos_texto(self):
+        comandos, resto = leer_comandos(TEXTO, comandos_de(TEXTO))
+        self.assertEqual(resto, b"")
+        self.assertEqual(comandos, [
+            ["REQUEST_CROSS", "NORTH", "7"], ["REQUEST_CROSS", "3", "SOUTH", "8"],
+            ["RELEASE_BRIDGE", "4", "7"], ["RELEASE_BRIDGE", "3", "5", "8"],
+            ["RESYNC"], ["RESYNC", "1"],
+            ["LOG_SINCE", "12"], ["LOG_SINCE", "-1", "2"],
+            ["SUBSCRIBE", "0", "2"], ["SUBSCRIBE", "*"],
+        ])
+
+    def test_comandos_binario(self):
+        comandos, resto = leer_comandos(BINARIO, comandos_de(BINARIO))
+        self.assertEqual(resto, b"")
+        self.assertEqual(comandos, [
+            ["REQUEST_CROSS", 0, "NORTH", 7], ["REQUEST_CROSS", 3, "SOUTH", 8],
+            ["RELEASE_BRIDGE", 0, 4, 7], ["RELEASE_BRIDGE", 3, 5, 8],
+            ["RESYNC"], ["RESYNC", 1],
+            ["LOG_SINCE", 12, 0], ["LOG_SINCE", -1, 2],
+            ["SUBSCRIBE", 0, 2], ["SUBSCRIBE", "*"],
+        ])
+
+    def test_respuestas(self):
+        for codec in (TEXTO, BINARIO):
+            with self.subTest(codec=codec.nombre):
+                mensajes, resto = leer_respuestas(codec, respuestas_de(codec))
+                self.assertEqual(resto, b"")
+                self.assertEqual([m[0] for m in mensajes],
+                                 ["GRANT_CROSS", "LEASE_EXPIRED", "ERROR", "STATUS_UPDATE", "STATUS_DELTA", "LOG_ENTRIES"])
+                self.assertEqual(mensajes[0], ("GRANT_CROSS", 7, 4, 30.0))
+                self.assertEqual(mensajes[1], ("LEASE_EXPIRED", 8, 5))
+                self.assertEqual(mensajes[2], ("ERROR", "Comando mal formado: X"))
+                self.assertEqual(mensajes[3][1], {**ESTADO, "seq": 10, "log": ["a", "b"]})
+                delta = mensajes[4][1]
+                self.assertEqual((delta["bridge"], delta["seq"], delta["base"], delta["log"]), (2, 11, 10, ["c"]))
+                self.assertEqual(delta["changes"]["waiting_north"], 3)
+                eventos = mensajes[5][1]
+                self.assertEqual((eventos["bridge"], eventos["seq"]), (2, 6))
+                self.assertEqual([(e["seq"], e["kind"], e["car_id"], e["text"]) for e in eventos["entries"]],
+                                 [(s, k, c, t) for s, _, k, c, t in EVENTOS])
+
+class PruebaLecturaIncremental(unittest.TestCase):
+    def test_byte_a_byte_da_lo_mismo(self):
+        for codec in (TEXTO, BINARIO):
+            with self.subTest(codec=codec.nombre, lado="servidor"):
+                datos = comandos_de(codec)
+                self.assertEqual(leer_comandos(codec, datos, 1), leer_comandos(codec, datos))
+            with self.subTest(codec=codec.nombre, lado="cliente"):
+                datos = respuestas_de(codec)
+                self.assertEqual(leer_respuestas(codec, datos, 1), leer_respuestas(codec, datos))
+
+    def test_trama_incompleta_espera_al_resto(self):
+        datos = BINARIO.log_desde(3, 1)
+        comandos, pos = BINARIO.extraer_comandos(bytearray(datos[:-1]))
+        self.assertEqual((comandos, pos), ([], 0))
+        self.assertEqual(BINARIO.extraer_respuesta(bytearray(BINARIO.permiso(1, 2, 3.0)[:-1]), 0), (None, 0))
+
+class PruebaTramasNoValidas(unittest.TestCase):
+    def comandos(self, datos):
+        return BINARIO.extraer_comandos(bytearray(datos))
+
+    def test_tramas_fijas_mas_cortas_que_su_formato(self):
+        for tipo in (BINARIO.T_LOG_DESDE, BINARIO.T_RESYNC, BINARIO.T_SOLICITUD, BINARIO.T_LIBERACION):
+            with self.subTest(tipo=tipo), self.assertRaises(ErrorProtocolo):
+                self.comandos(struct.pack("<IB", 1, tipo) + b"\0" * 20)
+        with self.assertRaises(ErrorProtocolo):
+            self.comandos(struct.pack("<IB", 0, BINARIO.T_LOG_DESDE))
+
+    def test_respuestas_fijas_con_longitud_incorrecta(self):
+        for tipo in (BINARIO.T_PERMISO, BINARIO.T_VENCIDA):
+            with self.subTest(tipo=tipo), self.assertRaises(ErrorProtocolo):
+                BINARIO.extraer_respuesta(bytearray(struct.pack("<IB", 2, tipo) + b"\0\0"), 0)
+
+    def test_trama_demasiado_grande(self):
+        with self.assertRaises(ErrorProtocolo):
+            self.comandos(struct.pack("<IB", BINARIO.MAX_TRAMA + 1, BINARIO.T_SUSCRIPCION))
+        with self.assertRaises(ErrorProtocolo):
+            BINARIO.extraer_respuesta(bytearray(struct.pack("<IB", BINARIO.MAX_TRAMA + 1, BINARIO.T_ESTADO)), 0)
+
+    def test_direccion_desconocida(self):
+        datos = bytearray(BINARIO.solicitud("NORTH", 1))
+        datos[5] = 9  # Byte de la dirección
+        with self.assertRaises(ErrorProtocolo):
+            self.comandos(datos)
+
+    def test_suscripcion_de_longitud_impar(self):
+        with self.assertRaises(ErrorProtocolo):
+            self.comandos(struct.pack("<IB", 3, BINARIO.T_SUSCRIPCION) + b"\1\0\2")
+
+class PruebaIds(unittest.TestCase):
+    def test_ids_de_32_bits(self):
+        for valor in (0, -1, (1 << 31) - 1, -(1 << 31), "42"):
+            with self.subTest(valor=valor):
+                self.assertEqual(protocolo.id_32(valor), int(valor))
+
+    def test_ids_fuera_de_rango_se_rechazan(self):
+        for valor in (1 << 31, -(1 << 31) - 1, 99999999999, "99999999999"):
+            with self.subTest(valor=valor), self.assertRaises(ValueError):
+                protocolo.id_32(valor)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,336 @@
+import unittest
+
+import politicas
+import puente
+
+# --- Pruebas de la máquina de estados del puente ---
+# Puente no usa sockets ni hilos, así que se prueba directamente: las conexiones son
+# cadenas, el reloj es un reloj falso que avanza a mano y los permisos se leen de
+# tomar_mensajes(). Se ejecutan con `python -m unittest` (o pytest) desde la raíz.
+
+class RelojFalso:
+    def __init__(self, ahora=1000.0):
+        self.ahora = ahora
+
+    def __call__(self):
+        return self.ahora
+
+def nuevo_puente(politica=None, capacidad=0, duracion=30.0):
+    reloj = RelojFalso()
+    return puente.Puente(politica, capacidad, duracion, reloj=reloj), reloj
+
+def permisos(p):
+    """car_id -> lease_id de los GRANT_CROSS pendientes, en orden de concesión."""
+    return {m[2]: m[3] for m in p.tomar_mensajes() if m[0] == "GRANT_CROSS"}
+
+class PruebaTransiciones(unittest.TestCase):
+    def test_permiso_inmediato_con_el_puente_libre(self):
+        p, _ = nuevo_puente()
+        p.solicitar("a", 1, "NORTH")
+        self.assertEqual(list(permisos(p)), [1])
+        self.assertEqual(p.estado()["bridge_status"], "OCUPADO")
+        self.assertEqual(p.estado()["current_direction"], "NORTH")
+
+    def test_misma_direccion_pasa_si_nadie_espera_enfrente(self):
+        p, _ = nuevo_puente()
+        p.solicitar("a", 1, "NORTH")
+        p.solicitar("a", 2, "NORTH")
+        self.assertEqual(list(permisos(p)), [1, 2])
+
+    def test_direccion_contraria_espera_y_pasa_al_vaciarse(self):
+        p, _ = nuevo_puente()
+        p.solicitar("a", 1, "NORTH")
+        lease = permisos(p)[1]
+        p.solicitar("b", 2, "SOUTH")
+        self.assertEqual(permisos(p), {})
+        self.assertEqual(p.estado()["waiting_south"], 1)
+        p.liberar("a", lease, 1)
+        self.assertEqual(list(permisos(p)), [2])
+        self.assertEqual(p.estado()["current_direction"], "SOUTH")
+
+    def test_liberar_vacia_el_puente(self):
+        p, _ = nuevo_puente()
+        p.solicitar("a", 1, "NORTH")
+        p.liberar("a", permisos(p)[1], 1)
+        estado = p.estado()
+        self.assertEqual((estado["bridge_status"], estado["current_direction"], estado["crossing_cars"]),
+                         ("LIBRE", None, []))
+
+    def test_liberar_sin_id_suelta_la_concesion_mas_antigua_de_la_conexion(self):
+        p, _ = nuevo_puente()
+        p.solicitar("a", 1, "NORTH")
+        p.solicitar("a", 2, "NORTH")
+        p.liberar("a")
+        self.assertEqual(p.cruzando, [2])
+
+    def test_liberacion_ajena_o_desconocida_se_rechaza(self):
+        p, _ = nuevo_puente()
+        p.solicitar("a", 1, "NORTH")
+        lease = permisos(p)[1]
+        p.liberar("a", lease, car_id=99)    # No es de ese carro
+        p.liberar("b", lease, 1)            # Otra conexión
+        p.liberar("a", lease + 100, 1)      # No existe
+        p.liberar("b")                      # Sin concesión en esa conexión
+        self.assertEqual(p.cruzando, [1])
+        self.assertEqual([e[2] for e in p.log.desde(0)][-4:], ["rechazo"] * 4)
+        self.assertEqual(p.tomar_mensajes(), [
+            ("ERROR", "a", f"La concesión es de otro carro: RELEASE_BRIDGE 0 {lease} 99"),
+            ("ERROR", "b", f"Concesión desconocida o vencida: RELEASE_BRIDGE 0 {lease} 1"),
+            ("ERROR", "a", f"Concesión desconocida o vencida: RELEASE_BRIDGE 0 {lease + 100} 1"),
+            ("ERROR", "b", "Sin concesión que liberar: RELEASE_BRIDGE 0 0 -1"),
+        ])
+
+    def test_solicitud_repetida_se_rechaza(self):
+        p, _ = nuevo_puente()
+        p.solicitar("a", 1, "NORTH")
+        p.solicitar("a", 1, "NORTH")
+        self.assertEqual(p.cruzando, [1])
+        self.assertEqual(p.log.desde(0)[-1][2], "rechazo")
+        self.assertEqual(p.tomar_mensajes()[-1], ("ERROR", "a", "Carro ya en cola o cruzando: REQUEST_CROSS 0 NORTH 1"))
+
+    def test_mismo_car_id_en_otra_conexion_no_choca(self):
+        p, _ = nuevo_puente()
+        p.solicitar("a", 1, "NORTH")
+        p.solicitar("b", 1, "NORTH")  # Otro cliente que también numera desde 1
+        p.solicitar("c", 1, "SOUTH")
+        mensajes = p.tomar_mensajes()
+        self.assertNotIn("ERROR", [m[0] for m in mensajes])
+        self.assertEqual([m[1] for m in mensajes if m[0] == "GRANT_CROSS"], ["a", "b"])
+        self.assertIn(("c", 1), p.cola)
+        p.desconectar("a")
+        self.assertEqual(p.cruzando, [1])  # Sigue el de "b"
+        self.assertIn(("c", 1), p.cola)
+
+    def test_colas_fifo(self):
+        p, _ = nuevo_puente()
+        p.solicitar("a", 1, "NORTH")
+        lease = permisos(p)[1]
+        for car_id in (10, 11, 12):
+            p.solicitar("b", car_id, "SOUTH")
+        p.liberar("a", lease, 1)
+        concedidos = permisos(p)
+        self.assertEqual(list(concedidos), [10])  # Alternancia: un carro por turno
+        p.liberar("b", concedidos[10], 10)
+        self.assertEqual(list(permisos(p)), [11])
+
+    def test_desconectar_cancela_colas_y_libera_concesiones(self):
+        p, _ = nuevo_puente()
+        p.solicitar("a", 1, "NORTH")
+        p.solicitar("b", 2, "SOUTH")
+        p.solicitar("c", 3, "SOUTH")
+        permisos(p)
+        p.desconectar("b")
+        self.assertEqual(p.estado()["waiting_south"], 1)
+        p.desconectar("a")
+        self.assertEqual(list(permisos(p)), [3])
+        self.assertEqual(p.cruzando, [3])
+
+class PruebaCapacidad(unittest.TestCase):
+    def test_capacidad_limita_los_carros_sobre_el_puente(self):
+        p, _ = nuevo_puente(capacidad=2)
+        for car_id in (1, 2, 3):
+            p.solicitar("a", car_id, "NORTH")
+        self.assertEqual(list(permisos(p)), [1, 2])
+        self.assertEqual(p.estado()["waiting_north"], 1)
+
+    def test_sitio_libre_admite_al_siguiente_de_la_misma_direccion(self):
+        p, _ = nuevo_puente(politicas.Lote(k=5), capacidad=1)
+        p.solicitar("a", 1, "NORTH")
+        lease = permisos(p)[1]
+        p.solicitar("a", 2, "NORTH")
+        self.assertEqual(permisos(p), {})
+        p.liberar("a", lease, 1)
+        self.assertEqual(list(permisos(p)), [2])
+
+    def test_capacidad_cero_o_negativa_es_sin_limite(self):
+        for capacidad in (0, -1):
+            with self.subTest(capacidad=capacidad):
+                p, _ = nuevo_puente(capacidad=capacidad)
+                for car_id in range(20):
+                    p.solicitar("a", car_id, "NORTH")
+                self.assertEqual(len(permisos(p)), 20)
+
+    def test_fases_llena_el_cupo_en_cada_turno(self):
+        p, _ = nuevo_puente(politicas.Fases(duracion=10), capacidad=3)
+        p.solicitar("a", 1, "NORTH")
+        lease = permisos(p)[1]
+        for car_id in range(10, 15):
+            p.solicitar("b", car_id, "SOUTH")
+        p.liberar("a", lease, 1)
+        self.assertEqual(list(permisos(p)), [10, 11, 12])
+
+class PruebaLote(unittest.TestCase):
+    def test_k_uno_equivale_a_alternancia(self):
+        p, _ = nuevo_puente(politicas.Lote(k=1))
+        p.solicitar("a", 1, "NORTH")
+        lease = permisos(p)[1]
+        for car_id in (10, 11):
+            p.solicitar("b", car_id, "SOUTH")
+        p.solicitar("a", 2, "NORTH")
+        p.liberar("a", lease, 1)
+        self.assertEqual(list(permisos(p)), [10])
+
+    def test_turno_admite_hasta_k_carros(self):
+        p, _ = nuevo_puente(politicas.Lote(k=3))
+        p.solicitar("a", 1, "NORTH")
+        lease = permisos(p)[1]
+        for car_id in range(10, 15):
+            p.solicitar("b", car_id, "SOUTH")
+        p.liberar("a", lease, 1)
+        self.assertEqual(list(permisos(p)), [10, 11, 12])
+
+    def test_k_no_supera_la_capacidad(self):
+        p, _ = nuevo_puente(politicas.Lote(k=8), capacidad=2)
+        p.solicitar("a", 1, "NORTH")
+        lease = permisos(p)[1]
+        for car_id in range(10, 15):
+            p.solicitar("b", car_id, "SOUTH")
+        p.liberar("a", lease, 1)
+        self.assertEqual(list(permisos(p)), [10, 11])
+
+    def test_llegadas_durante_el_turno_cuentan_para_k(self):
+        p, _ = nuevo_puente(politicas.Lote(k=2))
+        p.solicitar("a", 1, "NORTH")
+        permisos(p)
+        p.solicitar("b", 10, "SOUTH")
+        p.solicitar("a", 2, "NORTH")   # Segundo del turno: entra
+        p.solicitar("a", 3, "NORTH")   # Tercero: espera a su turno
+        self.assertEqual(list(permisos(p)), [2])
+        self.assertEqual(p.estado()["waiting_north"], 1)
+
+class PruebaParametros(unittest.TestCase):
+    def test_k_menor_que_uno_se_rechaza(self):
+        for nombre in ("lote", "antiguedad", "cola_larga"):
+            for k in (0, -1, "0"):
+                with self.subTest(politica=nombre, k=k), self.assertRaises(ValueError):
+                    politicas.crear_politica(nombre, k=k)
+
+    def test_tiempos_negativos_se_rechazan(self):
+        for nombre, parametro in (("fases", "duracion"), ("antiguedad", "bono"), ("cola_larga", "max_espera")):
+            with self.subTest(politica=nombre), self.assertRaises(ValueError):
+                politicas.crear_politica(nombre, **{parametro: -1})
+
+    def test_limites_validos(self):
+        self.assertEqual(politicas.crear_politica("lote", k="1").k, 1)
+        self.assertEqual(politicas.crear_politica("fases", duracion=0).duracion, 0.0)
+
+class PruebaVencimiento(unittest.TestCase):
+    def test_concesion_vencida_se_reclama_y_pasa_el_siguiente(self):
+        p, reloj = nuevo_puente(duracion=5.0)
+        p.solicitar("a", 1, "NORTH")
+        lease = permisos(p)[1]
+        p.solicitar("b", 2, "SOUTH")
+        reloj.ahora += 4.0
+        self.assertEqual(p.revisar_concesiones(), 0)
+        reloj.ahora += 2.0
+        self.assertEqual(p.revisar_concesiones(), 1)
+        mensajes = p.tomar_mensajes()
+        self.assertEqual(mensajes[0], ("LEASE_EXPIRED", "a", 1, lease))
+        self.assertEqual([m[2] for m in mensajes if m[0] == "GRANT_CROSS"], [2])
+        self.assertEqual(p.estado()["reclaimed_leases"], 1)
+
+    def test_concesion_liberada_no_vence(self):
+        p, reloj = nuevo_puente(duracion=5.0)
+        p.solicitar("a", 1, "NORTH")
+        p.liberar("a", permisos(p)[1], 1)
+        reloj.ahora += 10.0
+        self.assertEqual(p.revisar_concesiones(), 0)
+        self.assertEqual(p.recuperadas, 0)
+
+    def test_liberar_una_concesion_vencida_se_rechaza(self):
+        p, reloj = nuevo_puente(duracion=5.0)
+        p.solicitar("a", 1, "NORTH")
+        lease = permisos(p)[1]
+        reloj.ahora += 6.0
+        p.revisar_concesiones()
+        p.liberar("a", lease, 1)
+        self.assertEqual(p.log.desde(0)[-1][2], "rechazo")
+        self.assertEqual(p.tomar_mensajes()[-1][:2], ("ERROR", "a"))
+
+class PruebaRecuperacion(unittest.TestCase):
+    def recuperado(self, original, plazo=15.0):
+        p, reloj = nuevo_puente(duracion=original.duracion_concesion)
+        p.restaurar(original.instantanea(), plazo)
+        return p, reloj
+
+    def test_carro_recupera_su_concesion(self):
+        original, _ = nuevo_puente()
+        original.solicitar("a", 1, "NORTH")
+        lease = permisos(original)[1]
+        p, _ = self.recuperado(original)
+        self.assertEqual(p.cruzando, [1])
+        p.solicitar("b", 1, "NORTH")
+        self.assertEqual(permisos(p), {1: lease})
+        p.liberar("b", lease, 1)
+        self.assertEqual(p.estado()["bridge_status"], "LIBRE")
+
+    def test_carro_recupera_su_puesto_en_la_cola(self):
+        original, _ = nuevo_puente()
+        original.solicitar("a", 1, "NORTH")
+        for car_id in (10, 11):
+            original.solicitar("b", car_id, "SOUTH")
+        permisos(original)
+        p, _ = self.recuperado(original)
+        p.solicitar("c", 11, "SOUTH")
+        p.solicitar("c", 10, "SOUTH")
+        self.assertEqual(p.estado()["waiting_south"], 2)
+        p.solicitar("d", 1, "NORTH")
+        p.liberar("d", permisos(p)[1], 1)
+        self.assertEqual(list(permisos(p)), [10])  # Conserva el orden de antes del reinicio
+
+    def test_huerfanos_sin_reclamar_se_liberan_al_vencer_el_plazo(self):
+        original, _ = nuevo_puente()
+        original.solicitar("a", 1, "NORTH")
+        original.solicitar("b", 2, "SOUTH")
+        original.solicitar("c", 3, "SOUTH")
+        permisos(original)
+        p, reloj = self.recuperado(original, plazo=5.0)
+        p.solicitar("e", 3, "SOUTH")   # Solo el 3 vuelve
+        reloj.ahora += 6.0
+        p.revisar_concesiones()
+        self.assertEqual(list(permisos(p)), [3])
+        self.assertEqual(p.cruzando, [3])
+        self.assertEqual(p.estado()["waiting_south"], 0)
+
+    def test_los_lease_id_no_se_repiten_tras_recuperar(self):
+        original, _ = nuevo_puente()
+        original.solicitar("a", 1, "NORTH")
+        lease = permisos(original)[1]
+        p, _ = self.recuperado(original)
+        p.solicitar("b", 2, "NORTH")
+        self.assertGreater(permisos(p)[2], lease)
+
+class PruebaPoliticas(unittest.TestCase):
+    """Con cualquier política, todo carro en cola acaba cruzando y nunca hay dos sentidos a la vez."""
+
+    def test_sin_bloqueos_ni_sentidos_mezclados(self):
+        for nombre, cls in politicas.POLITICAS.items():
+            for capacidad in (0, 1, 3):
+                with self.subTest(politica=nombre, capacidad=capacidad):
+                    p, reloj = nuevo_puente(cls(), capacidad)
+                    concesiones = {}
+                    pedidos = set()
+                    for car_id in range(40):
+                        p.solicitar("a", car_id, "NORTH" if car_id % 3 else "SOUTH")
+                        pedidos.add(car_id)
+                        reloj.ahora += 0.5
+                    concedidos = set()
+                    for _ in range(200):
+                        for m in p.tomar_mensajes():
+                            if m[0] == "GRANT_CROSS":
+                                concesiones[m[2]] = m[3]
+                                concedidos.add(m[2])
+                        sentidos = {p.concesiones[lease].direccion for lease in p.concesiones}
+                        self.assertLessEqual(len(sentidos), 1)
+                        if capacidad:
+                            self.assertLessEqual(len(p.cruzando), capacidad)
+                        if not concesiones: break
+                        car_id, lease = next(iter(concesiones.items()))
+                        del concesiones[car_id]
+                        reloj.ahora += 1.0
+                        p.liberar("a", lease, car_id)
+                    self.assertEqual(concedidos, pedidos)
+                    self.assertEqual(p.estado()["bridge_status"], "LIBRE")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,201 @@
+import os
+import socket
+import tempfile
+import threading
+import unittest
+from collections import deque
+from unittest import mock
+
+import diario
+import protocolo
+import puente
+import servidor
+from test_puente import nuevo_puente
+
+# --- Pruebas de la difusión de estado del Planificador ---
+# Un observador falso recoge lo que el planificador le encola y lo lee como lo haría la
+# interfaz: aplica cada delta sobre el último keyframe, comprobando que su base sea la
+# versión que ya tiene. Al final, lo reconstruido tiene que ser la instantánea del puente.
+
+class ObservadorFalso:
+    def __init__(self, codec):
+        self.codec = codec
+        self.address = ("prueba", 0)
+        self.desalojada = False
+        self.recibido = bytearray()
+        self.estado = None   # Estado reconstruido (con seq), None hasta el primer keyframe
+        self.log = deque(maxlen=puente.MAX_LOG)
+        self.tipos = []      # "STATUS_UPDATE"/"STATUS_DELTA" en el orden recibido
+
+    def enviar(self, datos):
+        self.recibido += datos
+
+    def enviar_estado(self, puente_id, datos, obtener_keyframe):
+        self.recibido += datos
+
+    def leer(self, prueba):
+        """Aplica lo recibido; los deltas tienen que encadenar con la versión reconstruida."""
+        pos = 0
+        while True:
+            mensaje, pos = self.codec.extraer_respuesta(self.recibido, pos)
+            if mensaje is None: break
+            tipo, datos = mensaje
+            self.tipos.append(tipo)
+            if tipo == "STATUS_UPDATE":
+                self.log.clear()
+                self.log.extend(datos.pop("log"))
+                self.estado = datos
+            elif tipo == "STATUS_DELTA":
+                prueba.assertIsNotNone(self.estado, "Delta antes del primer keyframe")
+                prueba.assertEqual(datos["base"], self.estado["seq"], "Hueco en la secuencia de deltas")
+                self.estado = {**self.estado, **datos["changes"], "seq": datos["seq"]}
+                self.log.extend(datos["log"])
+        del self.recibido[:pos]
+
+class CarrosFalsos:
+    """Conexión de los carros: recibe permisos y vencimientos, que aquí no se leen."""
+    codec = protocolo.TEXTO
+    address = ("carros", 0)
+    desalojada = False
+
+    def enviar(self, datos):
+        pass
+
+def esperado(planificador, codec):
+    """El keyframe de la versión actual, decodificado: la instantánea del puente que ve un observador."""
+    estado = codec.extraer_respuesta(bytearray(planificador.obtener_snapshot(codec)), 0)[0][1]
+    return estado, estado.pop("log")
+
+class PruebaDifusion(unittest.TestCase):
+    def setUp(self):
+        p, self.reloj = nuevo_puente(capacidad=2)
+        self.planificador = servidor.Planificador(p)
+        self.observadores = [ObservadorFalso(protocolo.TEXTO), ObservadorFalso(protocolo.BINARIO)]
+        for observador in self.observadores:
+            self.planificador.observar(observador)
+        self.carros = CarrosFalsos()
+
+    def trafico(self, rondas):
+        """Solicitudes y liberaciones, con un lote del planificador tras cada una."""
+        p = self.planificador.puente
+        for i in range(rondas):
+            p.solicitar(self.carros, 100 + i, "NORTH" if i % 3 else "SOUTH")
+            self.planificador.procesar_pendientes()
+            if i % 2 and p.concesiones:
+                concesion = next(iter(p.concesiones.values()))
+                p.liberar(concesion.conexion, concesion.id, concesion.car_id)
+                self.planificador.procesar_pendientes()
+
+    def comprobar(self):
+        for observador in self.observadores:
+            with self.subTest(codec=observador.codec.nombre):
+                observador.leer(self)
+                estado, log = esperado(self.planificador, observador.codec)
+                self.assertEqual(observador.estado, estado)
+                self.assertEqual(list(observador.log), log)
+
+    def test_deltas_sobre_el_keyframe_dan_la_instantanea(self):
+        for _ in range(5):
+            self.trafico(7)
+            self.comprobar()
+        for observador in self.observadores:
+            self.assertIn("STATUS_DELTA", observador.tipos)
+
+    def test_keyframe_cada_intervalo(self):
+        self.trafico(servidor.INTERVALO_KEYFRAME * 2)
+        self.comprobar()
+        for observador in self.observadores:
+            seguidos = 0
+            for tipo in observador.tipos:
+                seguidos = 0 if tipo == "STATUS_UPDATE" else seguidos + 1
+                self.assertLessEqual(seguidos, servidor.INTERVALO_KEYFRAME)
+            self.assertGreater(observador.tipos.count("STATUS_UPDATE"), 1)
+
+    def test_sin_cambios_no_se_difunde(self):
+        self.trafico(3)
+        self.comprobar()
+        recibidos = [len(o.tipos) for o in self.observadores]
+        self.planificador.procesar_pendientes()
+        self.comprobar()
+        self.assertEqual([len(o.tipos) for o in self.observadores], recibidos)
+
+    def test_log_largo_entre_difusiones_fuerza_un_keyframe(self):
+        self.trafico(2)
+        self.comprobar()
+        for i in range(puente.MAX_LOG + 1):
+            self.planificador.puente.registrar(f"Sistema: evento {i}")
+        self.planificador.procesar_pendientes()
+        self.comprobar()
+        for observador in self.observadores:
+            self.assertEqual(observador.tipos[-1], "STATUS_UPDATE")
+
+    def test_resync_tras_un_hueco(self):
+        self.trafico(4)
+        self.comprobar()
+        perdido = self.observadores[0]
+        self.trafico(3)
+        perdido.recibido.clear()          # Se pierden difusiones
+        perdido.estado = None
+        self.planificador.enviar_keyframe(perdido)  # RESYNC
+        self.trafico(5)
+        self.comprobar()
+
+    def test_observador_nuevo_empieza_con_keyframe(self):
+        self.trafico(6)
+        nuevo = ObservadorFalso(protocolo.BINARIO)
+        self.planificador.observar(nuevo)
+        self.observadores.append(nuevo)
+        self.trafico(4)
+        self.comprobar()
+        self.assertEqual(nuevo.tipos[0], "STATUS_UPDATE")
+
+class PruebaDesalojo(unittest.TestCase):
+    """Un cliente que no lee, sobre un puente que ya no le envía nada: solo lo desaloja la revisión periódica."""
+    def setUp(self):
+        extremo, self.cliente = socket.socketpair()
+        self.addCleanup(self.cliente.close)
+        self.conexion = servidor.Conexion(extremo, ("lento", 0))  # Sin hilo escritor: nada se vacía
+        self.addCleanup(self.conexion.cerrar)
+
+    def test_revision_periodica_desaloja_al_atascado(self):
+        with mock.patch("time.monotonic", return_value=100.0):
+            self.conexion.enviar(b"x" * (servidor.LIMITE_COLA_SALIDA + 1))
+        self.assertEqual(self.conexion.sobre_limite_desde, 100.0)
+        with mock.patch("time.monotonic", return_value=100.0 + servidor.TIEMPO_MAX_SOBRE_LIMITE / 2):
+            self.conexion.revisar_limite()
+        self.assertFalse(self.conexion.desalojada)
+        with mock.patch("time.monotonic", return_value=101.0 + servidor.TIEMPO_MAX_SOBRE_LIMITE):
+            self.conexion.revisar_limite()
+        self.assertTrue(self.conexion.desalojada)
+        self.assertEqual(self.cliente.recv(1), b"")  # El otro extremo ve el cierre
+
+    def test_cola_bajo_la_marca_no_se_desaloja(self):
+        self.conexion.enviar(b"x" * 100)
+        with mock.patch("time.monotonic", return_value=10.0 ** 9):
+            self.conexion.revisar_limite()
+        self.assertFalse(self.conexion.desalojada)
+
+class PruebaCierre(unittest.TestCase):
+    """Al terminar en modo hilos, el diario se cierra con el hilo del planificador ya detenido."""
+    def test_cierre_detiene_al_planificador_antes_del_diario(self):
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        ruta = os.path.join(carpeta.name, "puente.diario")
+        p, _ = nuevo_puente()
+        planificador = servidor.Planificador(p)
+        servidor.iniciar_diario(planificador, ruta)
+        planificador.hilo = threading.Thread(target=planificador.ejecutar, daemon=True)
+        planificador.hilo.start()
+        carros = CarrosFalsos()
+        for car_id in range(1, 201):
+            planificador.encolar(p.solicitar, carros, car_id, "NORTH" if car_id % 2 else "SOUTH")
+        with mock.patch.dict(servidor.planificadores, {0: planificador}, clear=True):
+            servidor.cerrar_planificadores()
+        self.assertFalse(planificador.hilo.is_alive())
+        registros, _ = diario.leer(ruta)
+        q, _ = nuevo_puente()
+        q.restaurar(registros)
+        self.assertEqual(len(q.cola.por_carro) + len(q.cruzando), 200)
+
+if __name__ == "__main__":
+    unittest.main()